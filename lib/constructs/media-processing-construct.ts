@@ -138,6 +138,8 @@ export class MediaProcessingConstruct extends Construct {
           POST_TABLE: postsTable.tableName,
           QUEUE: this.processingQueue.queueUrl,
           BUCKET: this.mediaBucket.bucketName,
+          // Claims of a crashed invocation lapse before the S3 event is retried
+          IDEMPOTENCY_LOCK_SECONDS: "30",
         },
       }
     );
@@ -165,6 +167,9 @@ export class MediaProcessingConstruct extends Construct {
             transcribeMediaStateMachine.stateMachineArn || "",
           STRANDS_KNOWLEDGE_BASE_ID: knowledgeBase.knowledgeBaseId,
           BYPASS_TOOL_CONSENT: "True",
+          // The function timeout: a crashed invocation's claims lapse by the
+          // time SQS redelivers its messages (visibility timeout)
+          IDEMPOTENCY_LOCK_SECONDS: "300",
         },
       }
     );
@@ -175,6 +180,7 @@ export class MediaProcessingConstruct extends Construct {
           "bedrock:InvokeModel",
           "bedrock:InvokeModelWithResponseStream",
           "bedrock:ListDataSources",
+          "bedrock:GetDataSource",
           "bedrock:StartIngestionJob",
           "bedrock:GetIngestionJob",
           "bedrock:ListIngestionJobs",
@@ -233,6 +239,8 @@ export class MediaProcessingConstruct extends Construct {
       new cdk.aws_lambda_event_sources.SqsEventSource(this.processingQueue, {
         batchSize: 10,
         maxBatchingWindow: cdk.Duration.seconds(30),
+        // Only messages listed in batchItemFailures are redelivered
+        reportBatchItemFailures: true,
       })
     );
 
@@ -147,6 +147,7 @@ export class WorkflowConstruct extends Construct {
           "bedrock:InvokeModel",
           "bedrock:InvokeModelWithResponseStream",
           "bedrock:ListDataSources",
+          "bedrock:GetDataSource",
           "bedrock:StartIngestionJob",
           "bedrock:GetIngestionJob",
           "bedrock:ListIngestionJobs",
@@ -77,6 +77,13 @@ export class SchedulePostsStack extends cdk.Stack {
       cdk.Tags.of(eventBus).add(key, value);
     });
 
+    // Let the invoke agent function stream completion frames to subscribers
+    knowledgeBaseConstruct.invokeAgentFunction.addEnvironment(
+      "EVENT_BUS_NAME",
+      eventBus.eventBusName
+    );
+    eventBus.grantPutEventsTo(knowledgeBaseConstruct.invokeAgentFunction);
+
     // Create the workflow construct
     const workflowConstruct = new WorkflowConstruct(this, "WorkflowConstruct", {
       eventBus: eventBus,
@@ -0,0 +1,114 @@
+"""
+agent_pool.py
+-------------
+Per-container reuse of Strands agents and of the asyncio event loop.
+
+Building a ``BedrockModel`` + ``Agent`` (and a fresh event loop through
+``asyncio.run``) on every invocation adds fixed overhead to each request.
+Lambda keeps module globals alive between warm invocations, so both are
+created once and handed out again reset: conversation history, agent
+state and event-loop metrics/traces are cleared between callers.
+
+Usage
+~~~~~
+from agent_pool import AgentPool, run_coroutine
+
+agent_pool = AgentPool(build_agent)
+
+with agent_pool.acquire(MODEL_ID, 0.3, SYSTEM_PROMPT) as agent:
+    run_coroutine(process_streaming_response(agent, topic))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Coroutine, Dict, Iterator, List, Tuple
+
+AgentKey = Tuple[str, float, str]
+
+
+def reset_conversation(agent: Any) -> None:
+    """Drop what a Strands agent accumulated during one invocation.
+
+    Besides the messages, ``state`` may hold caller data and
+    ``event_loop_metrics`` keeps every cycle's traces and usage, which would
+    otherwise leak to the next caller and grow for the container's lifetime.
+    Both are replaced with fresh instances of their own types.
+    """
+    agent.messages.clear()
+    for attribute in ("state", "event_loop_metrics"):
+        current = getattr(agent, attribute, None)
+        if current is not None:
+            setattr(agent, attribute, type(current)())
+    if hasattr(agent, "trace_span"):
+        agent.trace_span = None
+
+
+class AgentPool:
+    """Cache agents keyed by ``(model_id, temperature, system_prompt)``.
+
+    Each key holds a list of idle agents so concurrent callers never share
+    one conversation; an agent is returned to the list, reset, once the
+    caller is done with it.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str, float, str], Any],
+        *,
+        reset: Callable[[Any], None] = reset_conversation,
+    ) -> None:
+        self._factory = factory
+        self._reset = reset
+        self._idle: Dict[AgentKey, List[Any]] = {}
+        self._lock = threading.Lock()
+
+        # Counters surfaced for logging / benchmarks
+        self.created = 0
+        self.reused = 0
+
+    @contextmanager
+    def acquire(self, model_id: str, temperature: float, system_prompt: str) -> Iterator[Any]:
+        """Yield an agent for *key*, building one only if none is idle."""
+        key = (model_id, temperature, system_prompt)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            agent = idle.pop() if idle else None
+            if agent is None:
+                self.created += 1
+            else:
+                self.reused += 1
+
+        if agent is None:
+            agent = self._factory(model_id, temperature, system_prompt)
+
+        try:
+            yield agent
+        finally:
+            self._reset(agent)
+            with self._lock:
+                self._idle[key].append(agent)
+
+    def clear(self) -> None:
+        """Forget every cached agent."""
+        with self._lock:
+            self._idle.clear()
+
+
+_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the container-wide event loop, creating it on first use."""
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def run_coroutine(coro: Coroutine[Any, Any, Any]) -> Any:
+    """Drop-in for ``asyncio.run`` that keeps the loop for warm invocations."""
+    return get_event_loop().run_until_complete(coro)
@@ -0,0 +1,160 @@
+"""
+bedrock_clients.py
+------------------
+One tuned botocore configuration, and one client per service, for every
+Bedrock call a container makes.
+
+Left to themselves, ``invoke_agent``'s ``bedrock-agent-runtime`` client and
+each Strands ``BedrockModel`` build their own client with botocore defaults:
+10 pooled connections, ``legacy`` retries, a 60 s connect timeout and no TCP
+keepalive.  Concurrent agents then queue for connections, reconnect after
+idle periods and retry throttling without a shared rate estimate.
+
+:py:func:`bedrock_client` hands out a single client per (service, region),
+built once from :py:func:`client_config`:
+
+* ``BEDROCK_MAX_POOL_CONNECTIONS`` – connection pool size (default 50).
+* ``BEDROCK_RETRY_MODE`` / ``BEDROCK_MAX_ATTEMPTS`` – ``adaptive`` retries,
+  whose client-side rate limiter now sees every caller's throttling.
+* ``BEDROCK_CONNECT_TIMEOUT`` / ``BEDROCK_READ_TIMEOUT`` – seconds; the read
+  timeout must cover the longest gap between streamed tokens.
+* ``BEDROCK_TCP_KEEPALIVE`` – keep pooled connections alive while idle.
+
+:py:func:`bedrock_model` builds a Strands ``BedrockModel`` that uses the
+shared ``bedrock-runtime`` client.
+
+Agents that converse with the model send the same system prompt and tool
+definitions on every call.  With ``BEDROCK_PROMPT_CACHE`` on (the default),
+:py:func:`cached_system_prompt` ends the system prompt with a Bedrock
+prompt-cache checkpoint and ``bedrock_model(cache_tools=True)`` adds one
+after the tool definitions, so
+repeated calls read that prefix from the cache instead of processing it
+again.  Bedrock only caches prefixes above a per-model minimum (1,024
+tokens for Claude 3.7 Sonnet); shorter ones are processed as usual.  Direct
+tool calls (``agent.tool.memory(...)``) never reach the model, so agents
+used only for those gain nothing from either checkpoint.
+
+System prompt content blocks need ``strands-agents`` 1.15 and the tools
+checkpoint (``CacheConfig.tools_ttl``) 1.55, hence the floor in
+``requirements.txt``.
+
+Usage
+~~~~~
+from bedrock_clients import bedrock_client, bedrock_model, cached_system_prompt
+
+runtime = bedrock_client("bedrock-agent-runtime", region_name="us-east-1")
+model = bedrock_model(model_id=MODEL_ID, region_name="us-east-1", temperature=0.3)
+agent = Agent(model=model, system_prompt=cached_system_prompt(SYSTEM_PROMPT))
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+MAX_POOL_CONNECTIONS = int(os.environ.get("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+RETRY_MODE = os.environ.get("BEDROCK_RETRY_MODE", "adaptive")
+MAX_ATTEMPTS = int(os.environ.get("BEDROCK_MAX_ATTEMPTS", "5"))
+CONNECT_TIMEOUT = float(os.environ.get("BEDROCK_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("BEDROCK_READ_TIMEOUT", "120"))
+TCP_KEEPALIVE = os.environ.get("BEDROCK_TCP_KEEPALIVE", "true").lower() == "true"
+PROMPT_CACHE = os.environ.get("BEDROCK_PROMPT_CACHE", "true").lower() == "true"
+
+_clients: Dict[Tuple[str, str | None, str | None], Any] = {}
+_session: Any = None
+_lock = threading.Lock()
+
+
+def client_config(**overrides: Any) -> Any:
+    """The botocore ``Config`` every Bedrock client is built with."""
+    from botocore.config import Config
+
+    settings: Dict[str, Any] = {
+        "max_pool_connections": MAX_POOL_CONNECTIONS,
+        "retries": {"mode": RETRY_MODE, "max_attempts": MAX_ATTEMPTS},
+        "connect_timeout": CONNECT_TIMEOUT,
+        "read_timeout": READ_TIMEOUT,
+        "tcp_keepalive": TCP_KEEPALIVE,
+    }
+    settings.update(overrides)
+    return Config(**settings)
+
+
+def _get_session() -> Any:
+    # boto3 sessions are not thread-safe; callers hold ``_lock``
+    global _session
+    if _session is None:
+        import boto3
+
+        _session = boto3.session.Session()
+    return _session
+
+
+def bedrock_client(
+    service_name: str, *, region_name: str | None = None, endpoint_url: str | None = None
+) -> Any:
+    """Return the container-wide client for *service_name*, building it once."""
+    key = (service_name, region_name, endpoint_url)
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = _get_session().client(
+                    service_name,
+                    region_name=region_name,
+                    endpoint_url=endpoint_url,
+                    config=client_config(),
+                )
+    return client
+
+
+def bedrock_model(
+    *,
+    region_name: str | None = None,
+    endpoint_url: str | None = None,
+    cache_tools: bool = False,
+    **model_config: Any,
+) -> Any:
+    """
+    A Strands ``BedrockModel`` whose requests go through the shared client.
+
+    With *cache_tools* (and ``BEDROCK_PROMPT_CACHE`` on) the tool
+    definitions end in a prompt-cache checkpoint.  For Claude models Strands
+    then also places one on the latest message, so each turn of the agent's
+    tool loop reads the previous turns from the cache.
+    """
+    from strands.models import BedrockModel, CacheConfig
+
+    if cache_tools and PROMPT_CACHE:
+        model_config["cache_config"] = CacheConfig(tools_ttl=True)
+    client = bedrock_client("bedrock-runtime", region_name=region_name, endpoint_url=endpoint_url)
+    # The model builds a throwaway client of its own; swapping in the shared
+    # one puts every agent on the same pool and retry rate limiter
+    with _lock:
+        model = BedrockModel(
+            boto_session=_get_session(),
+            boto_client_config=client_config(),
+            **model_config,
+        )
+    model.client = client
+    return model
+
+
+def cached_system_prompt(system_prompt: str, *, enabled: bool | None = None) -> Any:
+    """
+    *system_prompt* followed by a prompt-cache checkpoint, as Strands system
+    content blocks; the plain string when caching is off.
+    """
+    if not (PROMPT_CACHE if enabled is None else enabled):
+        return system_prompt
+    return [{"text": system_prompt}, {"cachePoint": {"type": "default"}}]
+
+
+def reset() -> None:
+    """Forget every cached client (tests, or after changing the settings)."""
+    global _session
+    with _lock:
+        _clients.clear()
+        _session = None
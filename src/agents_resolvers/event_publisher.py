@@ -0,0 +1,410 @@
+"""
+event_publisher.py
+------------------
+Coalescing publisher that turns a stream of agent tokens into as few
+EventBridge ``PutEvents`` calls as possible.
+
+Tokens are grouped into *frames*: a frame is closed once it has been open
+for ``flush_interval`` seconds or once it reaches ``max_frame_bytes``, as
+measured after JSON escaping (a single token larger than that is split).
+``add`` only checks the window when the next token arrives, so text
+buffered before a pause in the stream (e.g. a tool call) is published by
+whoever watches :py:meth:`CoalescingEventPublisher.flush_due_in`: the
+worker of :py:class:`AsyncEventPublisher`, or a :py:class:`FlushTimer`
+thread next to a synchronous producer.
+Closed frames become event entries which are packed into ``PutEvents``
+calls of at most 10 entries / 256 KB.  Every frame carries a monotonically
+increasing ``sequence`` number so subscribers can restore order even when a
+failed entry is retried after its successors were delivered.
+
+:py:class:`AsyncEventPublisher` moves the blocking boto3 calls off the event
+loop: tokens go into a bounded :py:class:`asyncio.Queue` that a background
+worker drains in a thread, so the agent stream only waits when the queue
+is full.
+
+Usage
+~~~~~
+from event_publisher import AsyncEventPublisher, CoalescingEventPublisher, FlushTimer
+
+publisher = AsyncEventPublisher(CoalescingEventPublisher(client, EVENT_BUS_NAME))
+async with publisher:
+    async for event in agent.stream_async(topic):
+        if "data" in event:
+            await publisher.publish(event["data"])
+
+# Synchronous producers
+publisher = CoalescingEventPublisher(client, EVENT_BUS_NAME)
+with FlushTimer(publisher):
+    for chunk in stream:
+        publisher.add(chunk)
+publisher.flush()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Dict, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+# Hard limits of the EventBridge PutEvents API
+MAX_ENTRIES_PER_CALL = 10
+MAX_BYTES_PER_CALL = 256 * 1024
+# PutEvents counts the Time field as a fixed 14 bytes
+_TIME_FIELD_BYTES = 14
+
+
+def entry_size(entry: Dict[str, Any]) -> int:
+    """Return the size of a PutEvents entry as computed by EventBridge."""
+    size = _TIME_FIELD_BYTES if entry.get("Time") is not None else 0
+    for field in ("Source", "DetailType", "Detail", "EventBusName"):
+        value = entry.get(field)
+        if value:
+            size += len(value.encode("utf-8"))
+    for resource in entry.get("Resources", ()):
+        size += len(resource.encode("utf-8"))
+    return size
+
+
+def escaped_size(text: str) -> int:
+    """Bytes *text* takes inside the JSON ``Detail`` string, quotes excluded."""
+    return len(encode_basestring_ascii(text)) - 2
+
+
+def split_text(text: str, max_bytes: int) -> Iterator[str]:
+    """Split *text* into pieces of at most *max_bytes* once JSON-escaped.
+
+    Escaping is per character, so the sizes of the pieces add up to the size
+    of *text*.  A single character is never split, even if it is larger.
+    """
+    while text:
+        cut = min(len(text), max_bytes)
+        size = escaped_size(text[:cut])
+        while size > max_bytes and cut > 1:
+            cut = max(1, min(cut - 1, cut * max_bytes // size))
+            size = escaped_size(text[:cut])
+        yield text[:cut]
+        text = text[cut:]
+
+
+class CoalescingEventPublisher:
+    """Buffer streamed text and publish it to EventBridge in batched frames."""
+
+    def __init__(
+        self,
+        client: Any,
+        event_bus_name: str,
+        *,
+        source: str = "generatedText.response",
+        detail_type: str = "generated.text",
+        detail: Dict[str, Any] | None = None,
+        flush_interval: float = 0.2,
+        max_frame_bytes: int = 8 * 1024,
+        max_retries: int = 3,
+        retry_backoff: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if max_frame_bytes <= 0 or max_frame_bytes >= MAX_BYTES_PER_CALL // 2:
+            raise ValueError("max_frame_bytes must be between 1 and 128 KB")
+
+        self.client = client
+        self.event_bus_name = event_bus_name
+        self.source = source
+        self.detail_type = detail_type
+        self.detail = dict(detail or {})
+        self.flush_interval = flush_interval
+        self.max_frame_bytes = max_frame_bytes
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._clock = clock
+        self._sleep = sleep
+
+        self._frame: List[str] = []
+        self._frame_bytes = 0
+        self._frame_opened_at: float | None = None
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_bytes = 0
+        self._sequence = 0
+        # add/flush may race with a FlushTimer thread
+        self._lock = threading.RLock()
+
+        # Counters surfaced for logging / benchmarks
+        self.calls = 0
+        self.entries_sent = 0
+        self.entries_retried = 0
+        self.entries_failed = 0
+        # Seconds spent in each PutEvents call
+        self.publish_latencies: List[float] = []
+
+    # ─── Producer API ────────────────────────────────────────────────────────
+    def add(self, text: str) -> None:
+        """Append *text* to the current frame, publishing when a limit is hit."""
+        if not text:
+            return
+        with self._lock:
+            if self._frame_opened_at is None:
+                self._frame_opened_at = self._clock()
+
+            size = escaped_size(text)
+            if size <= self.max_frame_bytes:
+                self._append(text, size)
+            else:
+                for piece in split_text(text, self.max_frame_bytes):
+                    self._append(piece, escaped_size(piece))
+            if self._clock() - self._frame_opened_at >= self.flush_interval:
+                self.flush()
+
+    def flush(self) -> None:
+        """Close the open frame and publish everything still pending."""
+        with self._lock:
+            self._close_frame()
+            self._frame_opened_at = None
+            if self._pending:
+                self._send(self._pending)
+                self._pending = []
+                self._pending_bytes = 0
+
+    def flush_due_in(self) -> float | None:
+        """Seconds until buffered text is due (``<= 0``: now); None when nothing is buffered."""
+        opened_at = self._frame_opened_at
+        if opened_at is None:
+            return None
+        return opened_at + self.flush_interval - self._clock()
+
+    def flush_if_due(self) -> None:
+        """Flush if buffered text has waited ``flush_interval`` without a new token."""
+        with self._lock:
+            due_in = self.flush_due_in()
+            if due_in is not None and due_in <= 0:
+                self.flush()
+
+    def close(self) -> None:
+        """Flush remaining text; alias kept for ``contextlib.closing``."""
+        self.flush()
+
+    # ─── Internals ───────────────────────────────────────────────────────────
+    def _append(self, text: str, size: int) -> None:
+        # Close the frame first if *text* would take it over the budget
+        if self._frame and self._frame_bytes + size > self.max_frame_bytes:
+            self._close_frame()
+        self._frame.append(text)
+        self._frame_bytes += size
+        if self._frame_bytes >= self.max_frame_bytes:
+            self._close_frame()
+
+    def _close_frame(self) -> None:
+        if not self._frame:
+            return
+        entry = self._build_entry("".join(self._frame))
+        self._frame = []
+        self._frame_bytes = 0
+
+        size = entry_size(entry)
+        if (
+            len(self._pending) >= MAX_ENTRIES_PER_CALL
+            or self._pending_bytes + size > MAX_BYTES_PER_CALL
+        ):
+            self._send(self._pending)
+            self._pending = []
+            self._pending_bytes = 0
+        self._pending.append(entry)
+        self._pending_bytes += size
+
+        if len(self._pending) >= MAX_ENTRIES_PER_CALL:
+            self._send(self._pending)
+            self._pending = []
+            self._pending_bytes = 0
+
+    def _build_entry(self, text: str) -> Dict[str, Any]:
+        entry = {
+            "Time": datetime.now(timezone.utc),
+            "Source": self.source,
+            "DetailType": self.detail_type,
+            "Detail": json.dumps({**self.detail, "input": text, "sequence": self._sequence}),
+            "EventBusName": self.event_bus_name,
+        }
+        self._sequence += 1
+        return entry
+
+    def _send(self, entries: List[Dict[str, Any]]) -> None:
+        """Send *entries*, retrying only the ones EventBridge rejected."""
+        attempt = 0
+        while entries:
+            start = self._clock()
+            response = self.client.put_events(Entries=entries)
+            self.publish_latencies.append(self._clock() - start)
+            self.calls += 1
+
+            if not response.get("FailedEntryCount"):
+                self.entries_sent += len(entries)
+                return
+
+            results = response.get("Entries", [])
+            failed = [
+                entry
+                for entry, result in zip(entries, results)
+                if result.get("ErrorCode")
+            ]
+            self.entries_sent += len(entries) - len(failed)
+
+            if attempt >= self.max_retries:
+                self.entries_failed += len(failed)
+                logger.error(
+                    "Dropping %d event(s) after %d retries: %s",
+                    len(failed),
+                    attempt,
+                    [r.get("ErrorCode") for r in results if r.get("ErrorCode")],
+                )
+                return
+
+            self.entries_retried += len(failed)
+            self._sleep(self.retry_backoff * (2**attempt))
+            attempt += 1
+            entries = failed
+
+
+class AsyncEventPublisher:
+    """Feed a :py:class:`CoalescingEventPublisher` from a background worker.
+
+    ``publish`` only awaits when ``max_pending`` tokens are already queued,
+    which gives the producer backpressure without blocking it on every
+    network round trip.  ``drain`` flushes everything and must be awaited
+    before the Lambda returns.
+    """
+
+    _DONE = object()
+
+    def __init__(self, publisher: CoalescingEventPublisher, *, max_pending: int = 1000) -> None:
+        self.publisher = publisher
+        self._queue: asyncio.Queue | None = None
+        self._max_pending = max_pending
+        self._worker: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "AsyncEventPublisher":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.drain()
+        else:
+            await self.cancel()
+
+    def start(self) -> None:
+        """Start the background worker on the running event loop."""
+        if self._worker is None:
+            self._queue = asyncio.Queue(maxsize=self._max_pending)
+            self._worker = asyncio.create_task(self._run())
+
+    async def publish(self, text: str) -> None:
+        """Queue *text* for publishing, waiting only if the queue is full."""
+        if self._worker is None:
+            self.start()
+        await self._put(text, self._worker)
+
+    async def drain(self) -> None:
+        """Publish everything queued so far and stop the worker."""
+        if self._worker is None:
+            return
+        worker, self._worker = self._worker, None
+        if not worker.done():
+            await self._put(self._DONE, worker)
+        await worker
+
+    async def _put(self, item: Any, worker: asyncio.Task) -> None:
+        if worker.done():
+            # Surface the worker's exception instead of queueing forever
+            await worker
+            raise RuntimeError("Event publisher worker has stopped")
+        if not self._queue.full():
+            self._queue.put_nowait(item)
+            return
+        # A full queue is only drained by the worker: stop waiting if it dies
+        put = asyncio.ensure_future(self._queue.put(item))
+        await asyncio.wait({put, worker}, return_when=asyncio.FIRST_COMPLETED)
+        if not put.done():
+            put.cancel()
+            await worker
+            raise RuntimeError("Event publisher worker has stopped")
+
+    async def cancel(self) -> None:
+        """Stop the worker without publishing what is still queued."""
+        if self._worker is None:
+            return
+        worker, self._worker = self._worker, None
+        worker.cancel()
+        try:
+            await worker
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            # Wake up when the open frame's window expires, even if no token comes
+            timeout = self.publisher.flush_due_in()
+            try:
+                item = await asyncio.wait_for(
+                    self._queue.get(), None if timeout is None else max(0.0, timeout)
+                )
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(self.publisher.flush_if_due)
+                continue
+
+            batch = [item]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            done = batch[-1] is self._DONE
+            if done:
+                batch.pop()
+            await asyncio.to_thread(self._feed, batch, done)
+            if done:
+                return
+
+    def _feed(self, batch: List[str], flush: bool) -> None:
+        for text in batch:
+            self.publisher.add(text)
+        if flush:
+            self.publisher.flush()
+
+
+class FlushTimer:
+    """Publish a :py:class:`CoalescingEventPublisher`'s buffered text on time.
+
+    A daemon thread that calls ``flush_if_due`` when the open frame's window
+    expires, for producers that block between tokens.  Use it as a context
+    manager around the stream; the caller still flushes at the end.
+    """
+
+    def __init__(self, publisher: CoalescingEventPublisher) -> None:
+        self.publisher = publisher
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="event-flush-timer", daemon=True)
+
+    def __enter__(self) -> "FlushTimer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        # Nothing is buffered: check again after one window (never spin)
+        idle = max(self.publisher.flush_interval, 0.01)
+        while True:
+            due_in = self.publisher.flush_due_in()
+            if self._stop.wait(idle if due_in is None else max(0.0, due_in)):
+                return
+            try:
+                self.publisher.flush_if_due()
+            except Exception:
+                # The producer's own flush surfaces persistent failures
+                logger.exception("Timed flush failed")
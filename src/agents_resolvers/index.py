@@ -1,17 +1,38 @@
-import asyncio
-from datetime import datetime
-import json
 import os
-import boto3
 
 from strands import Agent
-from strands_tools import use_llm, memory
-from strands.models import BedrockModel
 import logging
+from aws_lambda_powertools import Logger, Tracer, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
+from agent_pool import AgentPool, run_coroutine
+from bedrock_clients import bedrock_model, cached_system_prompt
+from event_publisher import AsyncEventPublisher, CoalescingEventPublisher
+from lazy import Lazy, lazy_client
+from post_batch import JobFailed, PostJob, is_batch, parse_jobs, run_batch
+from rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, build_rate_limiter
+from response_cache import build_response_cache
+from stream_metrics import StreamStats, annotate, emit_stream_metrics
+
+logger = Logger()
+tracer = Tracer()
+metrics = Metrics()
 # Async function that iterates over streamed agent events
 EVENT_BUS_NAME = os.environ["EVENT_BUS_NAME"]  
-client   = boto3.client("events") 
+client   = lazy_client("events")  # built on first publish
+# Disabled when RESPONSE_CACHE_TTL_SECONDS=0
+response_cache = Lazy(build_response_cache)
+# Size of the pieces a cached response is replayed in
+REPLAY_CHUNK_CHARS = 256
+# Admits model calls per model ID; single posts go ahead of batch posts
+rate_limiter = Lazy(build_rate_limiter)
 STRANDS_KNOWLEDGE_BASE_ID=os.environ["STRANDS_KNOWLEDGE_BASE_ID"] 
+# Batch mode: agent streams in flight, attempts per throttled post, backoff base
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", "4"))
+BATCH_MAX_ATTEMPTS = int(os.environ.get("BATCH_MAX_ATTEMPTS", "3"))
+BATCH_RETRY_BASE_DELAY = float(os.environ.get("BATCH_RETRY_BASE_DELAY", "1.0"))
+BATCH_MAX_POSTS = int(os.environ.get("BATCH_MAX_POSTS", "50"))
+MODEL_ID = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+TEMPERATURE = 0.3
 SYSTEM_PROMPT = """
 You are an AI Social Media Post Scheduler Agent designed to create insightful, engaging, and relevant social media posts tailored to user queries. Your responses must always be:
 
@@ -48,81 +69,233 @@ Adhere strictly to platform-specific constraints, such as character limits or fo
 Always reflect thoughtfully, ensuring each generated post is an exemplary piece of content designed to engage, inform, and inspire social media audiences.
 """
 
-# Enables Strands debug log level
-logging.getLogger("strands").setLevel(logging.DEBUG)
+# Strands logs at WARNING unless STRANDS_LOG_LEVEL asks for more
+logging.getLogger("strands").setLevel(os.environ.get("STRANDS_LOG_LEVEL", "WARNING").upper())
 
 # Sets the logging format and streams logs to stderr
 logging.basicConfig(
     format="%(levelname)s | %(name)s | %(message)s",
     handlers=[logging.StreamHandler()]
 )
-def lambda_handler(event, context):
-
-    prompt_args = event["input"]
-    logging.info(f"prompt_args: {prompt_args}")
-    logging.info(f"prompt_args: {prompt_args["topic"]}")
-
-    topic = prompt_args["topic"]
-
-
-    bedrock_model = BedrockModel(
-    model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+def _build_agent(model_id: str, temperature: float, system_prompt: str) -> Agent:
+    # Every pooled agent streams through the container's shared bedrock-runtime client
+    model = bedrock_model(
+    model_id=model_id,
     region_name='us-east-1',
-    temperature=0.3,
+    temperature=temperature,
     )
-    # Initialize our agent without a callback handler
-    agent = Agent(
-        model=bedrock_model,
-        system_prompt=SYSTEM_PROMPT,
+    # Initialize our agent without a callback handler; the static system
+    # prompt ends in a prompt-cache checkpoint (BEDROCK_PROMPT_CACHE)
+    return Agent(
+        model=model,
+        system_prompt=cached_system_prompt(system_prompt),
         
         callback_handler=None,
         
     )
-    # Run the agent with the async event processing
-    asyncio.run(process_streaming_response(agent,topic))
 
 
+# Agents and the event loop survive between warm invocations of this container
+agent_pool = AgentPool(_build_agent)
+
+
+@logger.inject_lambda_context
+@tracer.capture_lambda_handler
+@metrics.log_metrics
+def lambda_handler(event, context):
+
+    prompt_args = event["input"]
+    logger.info("prompt_args: %s", prompt_args)
+
+    # "cache": false forces a fresh generation, e.g. when the user asks to regenerate
+    use_cache = prompt_args.get("cache", True) is not False
+    # Cached posts are scoped to the caller; anonymous requests bypass the cache
+    user_id = event.get("userId") or prompt_args.get("userId")
+
+    if is_batch(prompt_args):
+        return _handle_batch(parse_jobs(prompt_args, max_jobs=BATCH_MAX_POSTS), use_cache, user_id)
+
+    topic = prompt_args["topic"]
+
+    stats = StreamStats(logger=logger)
+    with tracer.provider.in_subsegment("## agent_stream") as subsegment:
+        # Run the agent with the async event processing
+        cached = run_coroutine(generate_response(topic, stats, use_cache=use_cache, user_id=user_id))
+        subsegment.put_annotation("cache_hit", cached)
+        annotate(subsegment, stats)
+    _emit_response_metrics(stats, cached)
+    _emit_rate_limit_metrics()
+
     return {"status": "success"}
-    
 
 
-async def process_streaming_response(agent:Agent,topic:str):
+def _handle_batch(jobs: list[PostJob], use_cache: bool = True, user_id: str | None = None) -> dict:
+    """Generate every (topic, platform) post of a batch on the shared event loop."""
+
+    async def generate_post(job: PostJob) -> bool:
+        return await _generate_post(job, use_cache, user_id)
+
+    with tracer.provider.in_subsegment("## agent_batch") as subsegment:
+        results = run_coroutine(
+            run_batch(
+                jobs,
+                generate_post,
+                concurrency=BATCH_CONCURRENCY,
+                max_attempts=BATCH_MAX_ATTEMPTS,
+                base_delay=BATCH_RETRY_BASE_DELAY,
+            )
+        )
+        failed = sum(result["status"] != "success" for result in results)
+        subsegment.put_annotation("posts", len(results))
+        subsegment.put_annotation("failed_posts", failed)
+
+    metrics.add_metric(name="BatchPosts", unit=MetricUnit.Count, value=len(results))
+    metrics.add_metric(name="BatchFailedPosts", unit=MetricUnit.Count, value=failed)
+    metrics.add_metric(
+        name="BatchRetries", unit=MetricUnit.Count, value=sum(result["attempts"] - 1 for result in results)
+    )
+    _emit_rate_limit_metrics()
+    for result in results:
+        result["cached"] = result.pop("result", False)
+    if not failed:
+        status = "success"
+    else:
+        status = "partial" if failed < len(results) else "error"
+    return {"status": status, "results": results}
+
+
+async def _generate_post(job: PostJob, use_cache: bool = True, user_id: str | None = None) -> bool:
+    """Stream one batch post; a failure after text was published is final."""
+    stats = StreamStats(logger=logger)
+    try:
+        cached = await generate_response(
+            job.prompt,
+            stats,
+            detail=job.detail,
+            use_cache=use_cache,
+            user_id=user_id,
+            priority=PRIORITY_BACKGROUND,
+        )
+    except Exception as exc:
+        if stats.chunks:
+            # Subscribers already saw part of this post; retrying would duplicate it
+            raise JobFailed(str(exc)) from exc
+        raise
+    _emit_response_metrics(stats, cached)
+    return cached
+
+
+def _emit_response_metrics(stats: StreamStats, cached: bool) -> None:
+    # Replays would skew the model latency metrics, so they are only counted
+    if cached:
+        metrics.add_metric(name="ResponseCacheHits", unit=MetricUnit.Count, value=1)
+    else:
+        emit_stream_metrics(metrics, stats)
+
+
+def _emit_rate_limit_metrics() -> None:
+    for name, unit, value in rate_limiter.drain_stats().metrics():
+        metrics.add_metric(name=name, unit=unit, value=value)
+
+
+async def generate_response(
+    prompt: str,
+    stats: StreamStats,
+    *,
+    detail: dict | None = None,
+    use_cache: bool = True,
+    user_id: str | None = None,
+    priority: int = PRIORITY_INTERACTIVE,
+) -> bool:
+    """Publish the response to *prompt*, from the cache if possible; returns True on a hit.
+
+    Cache entries belong to *user_id*: one user's post is never replayed to
+    another, and requests without a user ID neither read nor fill the cache.
+    """
+    context = (MODEL_ID, TEMPERATURE, SYSTEM_PROMPT)
+    cache_context = (user_id, *context)
+    use_cache = use_cache and bool(user_id)
+
+    text = response_cache.lookup(prompt, *cache_context) if use_cache else None
+    if text is not None:
+        await replay_cached_response(text, stats, detail=detail)
+        return True
+
+    transcript: list[str] = []
+    # Cache hits never reach the model, so only misses wait for a token
+    await rate_limiter.acquire_async(MODEL_ID, priority)
+    try:
+        with agent_pool.acquire(*context) as agent:
+            await process_streaming_response(agent, prompt, stats, detail=detail, transcript=transcript)
+    except Exception as exc:
+        rate_limiter.observe(MODEL_ID, exc)
+        raise
+    rate_limiter.observe(MODEL_ID)
+    if transcript and user_id:
+        # A forced regeneration refreshes the entry for later requests
+        response_cache.remember(prompt, "".join(transcript), *cache_context)
+    return False
+
+
+async def replay_cached_response(text: str, stats: StreamStats, *, detail: dict | None = None):
+    """Publish *text* through the same event stream a live response uses."""
+    publisher = AsyncEventPublisher(CoalescingEventPublisher(client, EVENT_BUS_NAME, detail=detail))
+    async with publisher:
+        for start in range(0, len(text), REPLAY_CHUNK_CHARS):
+            piece = text[start:start + REPLAY_CHUNK_CHARS]
+            stats.chunk(piece)
+            await publisher.publish(piece)
+    stats.publish_latencies.extend(publisher.publisher.publish_latencies)
+    return stats
+
+
+async def process_streaming_response(
+    agent: Agent,
+    topic: str,
+    stats: StreamStats | None = None,
+    detail: dict | None = None,
+    transcript: list | None = None,
+):
    
-
-        # Get an async iterator for the agent's response stream
-        agent_stream = agent.stream_async(topic)
-
-        # Process events as they arrive
-        async for event in agent_stream:
-
-            if "data" in event:
-                # send generated text to an eventbridge rule
-                logging.info(f"\n[Generated text for: {event['data']}]")
-                
-                client.put_events(
-                    Entries=[
-                        {
-                            "Time": datetime.utcnow(),
-                             "Source":"generatedText.response",
-                             "DetailType":  "generated.text",
-                            "Detail": json.dumps({
-                                        "input":   event["data"]
-                                    }),
-                            'EventBusName': EVENT_BUS_NAME,
-                           
-                        },
-                    ],
-            
-                )
-                
-            elif "current_tool_use" in event and event["current_tool_use"].get("name"):
-                # Print tool usage information
-               logging.info(f"\n[Tool use delta for: {event['current_tool_use']['name']}]")
-
-
-
-  
-    
-
-
-    
+        stats = stats or StreamStats(logger=logger)
+
+        # Tokens are coalesced into frames and sent in batched PutEvents calls
+        # from a background worker, so the stream never waits on the network.
+        # ``detail`` (e.g. the batch topic ID) is added to every event and the
+        # text is appended to ``transcript`` when one is given.
+        publisher = AsyncEventPublisher(CoalescingEventPublisher(client, EVENT_BUS_NAME, detail=detail))
+        publisher.start()
+
+        try:
+            # Get an async iterator for the agent's response stream
+            agent_stream = agent.stream_async(topic)
+
+            # Process events as they arrive
+            async for event in agent_stream:
+
+                if "data" in event:
+                    # send generated text to an eventbridge rule
+                    stats.chunk(event["data"])
+                    if transcript is not None:
+                        transcript.append(event["data"])
+                    await publisher.publish(event["data"])
+
+                elif "current_tool_use" in event and event["current_tool_use"].get("name"):
+                    # Tool input streams as many deltas; count each tool use once
+                    stats.tool_use(event["current_tool_use"].get("toolUseId") or event["current_tool_use"]["name"])
+
+                elif "metadata" in event.get("event", {}):
+                    stats.usage(event["event"]["metadata"].get("usage", {}))
+        except Exception:
+            await publisher.cancel()
+            raise
+
+        # Wait for everything still queued to reach EventBridge
+        await publisher.drain()
+        stats.publish_latencies.extend(publisher.publisher.publish_latencies)
+        logger.info(
+            "Published %d frames in %d PutEvents calls",
+            publisher.publisher.entries_sent,
+            publisher.publisher.calls,
+        )
+        return stats
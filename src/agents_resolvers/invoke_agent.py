@@ -1,21 +1,44 @@
+import codecs
+import contextlib
 import json
 import os
 import uuid
 
-import boto3
-from aws_lambda_powertools import Logger, Tracer
+from aws_lambda_powertools import Logger, Metrics, Tracer
 from aws_lambda_powertools.utilities.data_classes.appsync import scalar_types_utils 
-bedrock_agent_runtime_client = boto3.client("bedrock-agent-runtime", region_name="us-east-1")
+from bedrock_clients import bedrock_client
+from event_publisher import CoalescingEventPublisher, FlushTimer
+from lazy import Lazy, lazy_client
+from rate_limiter import PRIORITY_INTERACTIVE, build_rate_limiter
+from stream_metrics import StreamStats, annotate, emit_stream_metrics
+
+# Built on first use; ``events_client`` only when a completion is streamed
+bedrock_agent_runtime_client = Lazy(lambda: bedrock_client("bedrock-agent-runtime", region_name="us-east-1"))
+events_client = lazy_client("events")
 
 logger = Logger(service="invoke_agent_lambda")
 tracer = Tracer(service="invoke_agent_lambda")
+metrics = Metrics(service="invoke_agent_lambda")
 
 AGENT_ID    = os.environ["AGENT_ID"]    # fail fast if missing
 AGENT_ALIAS = os.environ["AGENT_ALIAS"]
 
+# Streaming mode forwards completion frames to the generatedText subscription
+EVENT_BUS_NAME   = os.environ.get("EVENT_BUS_NAME")
+STREAM_BY_DEFAULT = os.environ.get("STREAM_AGENT_COMPLETION", "false").lower() == "true"
+# Small frames keep time-to-first-token low without one event per chunk
+STREAM_FRAME_INTERVAL = float(os.environ.get("STREAM_FRAME_INTERVAL", "0.05"))
+STREAM_FRAME_BYTES    = int(os.environ.get("STREAM_FRAME_BYTES", "512"))
+
+# Agent calls are interactive: they are admitted ahead of background work.
+# Set AGENT_MODEL_ID to share the bucket of the agent's foundation model
+RATE_LIMIT_KEY = os.environ.get("AGENT_MODEL_ID") or f"agent:{AGENT_ID}"
+rate_limiter = Lazy(build_rate_limiter)
+
 
 @logger.inject_lambda_context
 @tracer.capture_lambda_handler
+@metrics.log_metrics
 def handler(event, context):
     """
     AppSync resolver → Bedrock Agent streaming invocation
@@ -27,34 +50,45 @@ def handler(event, context):
         args        = event["arguments"]["input"]
         query       = args["query"]
         session_id  = args.get("session_id") or _generate_session_id()
+        stream      = args.get("stream")
+        stream      = STREAM_BY_DEFAULT if stream is None else bool(stream)
 
         logger.info("Query: %s", query)
         logger.info("SessionId: %s", session_id)
 
-       
-        agent_response = bedrock_agent_runtime_client.invoke_agent(
-            inputText      = query,
-            agentId        = AGENT_ID,
-            agentAliasId   = AGENT_ALIAS,
-            sessionId      = session_id,
-            enableTrace    = True,
-        )
+        stats = StreamStats(logger=logger)
+        rate_limiter.acquire(RATE_LIMIT_KEY, PRIORITY_INTERACTIVE)
+        try:
+            agent_response = bedrock_agent_runtime_client.invoke_agent(
+                inputText      = query,
+                agentId        = AGENT_ID,
+                agentAliasId   = AGENT_ALIAS,
+                sessionId      = session_id,
+                enableTrace    = True,
+            )
 
-        # Ensure the response contains the event stream
-        if "completion" not in agent_response:
-            raise Exception("Agent response is missing `completion` field.")
+            # Ensure the response contains the event stream
+            if "completion" not in agent_response:
+                raise Exception("Agent response is missing `completion` field.")
 
-        event_stream = agent_response["completion"]
+            event_stream = agent_response["completion"]
 
-        # Collect all chunks from the stream
-        chunks = []
-        for event in event_stream:
-            chunk = event.get("chunk")
-            if chunk:
-                decoded_bytes = chunk.get("bytes").decode()
-                print("bytes: ", decoded_bytes)
-                chunks.append(decoded_bytes)
-        completion = " ".join(chunks)
+            publisher = None
+            if stream:
+                if EVENT_BUS_NAME:
+                    publisher = _stream_publisher(session_id)
+                else:
+                    logger.warning("Streaming requested but EVENT_BUS_NAME is not set")
+
+            with tracer.provider.in_subsegment("## agent_stream") as subsegment:
+                completion = collect_completion(event_stream, publisher, stats)
+                annotate(subsegment, stats)
+        except Exception as exc:
+            # Throttling, also mid-stream, slows down the next invocations
+            rate_limiter.observe(RATE_LIMIT_KEY, exc)
+            raise
+        rate_limiter.observe(RATE_LIMIT_KEY)
+        emit_stream_metrics(metrics, stats)
         logger.info("Completion: %s", completion)
 
         # ── 4. Return to AppSync ------------------------------------------------------
@@ -71,8 +105,84 @@ def handler(event, context):
             "session_id": event.get("arguments", {}).get("input", {}).get("session_id"),
         }
 
+    finally:
+        for name, unit, value in rate_limiter.drain_stats().metrics():
+            metrics.add_metric(name=name, unit=unit, value=value)
+
 
 # ─── Helpers ──────────────────────────────────────────────────────────────────
+def collect_completion(
+    event_stream,
+    publisher: CoalescingEventPublisher | None = None,
+    stats: StreamStats | None = None,
+) -> str:
+    """
+    Decode the agent's ``completion`` stream into the final text.
+
+    Chunks are concatenated exactly as produced; when *publisher* is given
+    each chunk is also forwarded as it arrives, and the first one is sent
+    straight away so subscribers see output before the answer completes.
+    *stats* records chunk timings plus the token usage and tool (action
+    group / knowledge base) invocations reported in trace events.
+    """
+    # Incremental decoding keeps multi-byte characters split across chunks intact
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = []
+    # The stream blocks while the agent calls tools; the timer publishes
+    # what is buffered once its window expires
+    with FlushTimer(publisher) if publisher is not None else contextlib.nullcontext():
+        for event in event_stream:
+            if stats is not None and "trace" in event:
+                _record_trace(stats, event["trace"])
+            chunk = event.get("chunk")
+            if chunk:
+                decoded_bytes = decoder.decode(chunk.get("bytes"))
+                if not decoded_bytes:
+                    continue
+                if stats is not None:
+                    stats.chunk(decoded_bytes)
+                chunks.append(decoded_bytes)
+                if publisher is not None:
+                    publisher.add(decoded_bytes)
+                    if len(chunks) == 1:
+                        publisher.flush()
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        chunks.append(tail)
+        if publisher is not None:
+            publisher.add(tail)
+
+    if publisher is not None:
+        publisher.flush()
+        if stats is not None:
+            stats.publish_latencies.extend(publisher.publish_latencies)
+    return "".join(chunks)
+
+
+def _record_trace(stats: StreamStats, trace_event: dict) -> None:
+    """Pick model usage and tool invocations out of one agent trace event."""
+    for step in (trace_event.get("trace") or {}).values():
+        if not isinstance(step, dict):
+            continue
+        usage = step.get("modelInvocationOutput", {}).get("metadata", {}).get("usage")
+        if usage:
+            stats.usage(usage)
+        invocation = step.get("invocationInput")
+        if invocation and invocation.get("invocationType") != "FINISH":
+            stats.tool_use(invocation.get("traceId") or str(stats.tool_uses))
+
+
+def _stream_publisher(session_id: str) -> CoalescingEventPublisher:
+    return CoalescingEventPublisher(
+        events_client,
+        EVENT_BUS_NAME,
+        detail={"session_id": session_id},
+        flush_interval=STREAM_FRAME_INTERVAL,
+        max_frame_bytes=STREAM_FRAME_BYTES,
+    )
+
+
 def _generate_session_id() -> str:
  
     return str(uuid.uuid4())
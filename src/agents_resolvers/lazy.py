@@ -0,0 +1,82 @@
+"""
+lazy.py
+-------
+Build heavy per-container objects (boto3 clients, agents, savers) on first
+use instead of at import time.
+
+A :py:class:`Lazy` stands in for the object it builds: attribute access is
+forwarded to the target, which is created once – thread-safely – the first
+time it is needed.  An invocation that never touches a client therefore
+never pays for importing boto3 or loading the service model, and the
+module-level name can still be replaced wholesale in tests.
+
+Usage
+~~~~~
+from lazy import Lazy, lazy_client
+
+s3 = lazy_client("s3")                 # nothing is built yet
+saver = Lazy(lambda: KnowledgeBaseSaver(knowledge_base_id))
+
+s3.get_object(Bucket=bucket, Key=key)  # first use builds the client
+saver.built, saver.build_seconds       # True, time spent building
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+_UNSET: Any = object()
+
+
+class Lazy(Generic[T]):
+    """Proxy for the result of *factory*, called on first attribute access.
+
+    ``get``, ``built`` and ``build_seconds`` are the proxy's own; every
+    other attribute is looked up on the target.
+    """
+
+    __slots__ = ("_factory", "_target", "_lock", "build_seconds")
+
+    def __init__(self, factory: Callable[[], T]) -> None:
+        self._factory = factory
+        self._target: T = _UNSET
+        self._lock = threading.Lock()
+        self.build_seconds: float | None = None
+
+    def get(self) -> T:
+        """Return the target, building it if this is the first use."""
+        target = self._target
+        if target is _UNSET:
+            with self._lock:
+                target = self._target
+                if target is _UNSET:
+                    start = time.perf_counter()
+                    target = self._target = self._factory()
+                    self.build_seconds = time.perf_counter() - start
+        return target
+
+    @property
+    def built(self) -> bool:
+        return self._target is not _UNSET
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get(), name)
+
+    def __repr__(self) -> str:
+        state = repr(self._target) if self.built else "not built"
+        return f"<Lazy {state}>"
+
+
+def lazy_client(service_name: str, **kwargs: Any) -> Lazy[Any]:
+    """A boto3 client for *service_name*; boto3 itself is imported on first use."""
+
+    def build() -> Any:
+        import boto3
+
+        return boto3.client(service_name, **kwargs)
+
+    return Lazy(build)
@@ -0,0 +1,148 @@
+"""
+post_batch.py
+-------------
+Generate posts for many topics × platforms in one invocation.
+
+A batch input such as::
+
+    {"topics": ["Launch week", {"id": "t-42", "topic": "Pricing update"}],
+     "platforms": ["twitter", "linkedin"]}
+
+expands into one :py:class:`PostJob` per (topic, platform) pair.
+:py:func:`run_batch` runs the jobs concurrently – at most ``concurrency``
+agent streams at a time – and retries a job that was throttled before it
+produced any text, with jittered exponential backoff.  Strings get their
+position in ``topics`` as ID.
+
+Usage
+~~~~~
+from post_batch import parse_jobs, run_batch
+
+jobs = parse_jobs(event["input"])
+results = run_coroutine(run_batch(jobs, generate, concurrency=4))
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List
+
+from rate_limiter import is_throttling
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_JOBS = 50
+
+
+@dataclass(frozen=True)
+class PostJob:
+    """One post to generate: a topic, optionally for a specific platform."""
+
+    topic_id: str
+    topic: str
+    platform: str | None = None
+
+    @property
+    def prompt(self) -> str:
+        if self.platform is None:
+            return self.topic
+        return f"{self.topic}\n\nWrite the post for {self.platform}."
+
+    @property
+    def detail(self) -> Dict[str, str]:
+        """Fields added to every event emitted for this job."""
+        detail = {"topic_id": self.topic_id}
+        if self.platform is not None:
+            detail["platform"] = self.platform
+        return detail
+
+
+def is_batch(prompt_args: Dict[str, Any]) -> bool:
+    return "topics" in prompt_args
+
+
+def parse_jobs(prompt_args: Dict[str, Any], *, max_jobs: int = DEFAULT_MAX_JOBS) -> List[PostJob]:
+    """Expand ``topics`` × ``platforms`` into jobs; raises ``ValueError`` if invalid."""
+    topics = prompt_args.get("topics")
+    if not isinstance(topics, list) or not topics:
+        raise ValueError("'topics' must be a non-empty list")
+    platforms = prompt_args.get("platforms") or [None]
+
+    jobs = []
+    for index, item in enumerate(topics):
+        if isinstance(item, str):
+            topic_id, topic = str(index), item
+        elif isinstance(item, dict) and item.get("topic"):
+            topic_id, topic = str(item.get("id", index)), item["topic"]
+        else:
+            raise ValueError(f"Topic {index} must be a string or an object with 'topic'")
+        jobs.extend(PostJob(topic_id, topic, platform) for platform in platforms)
+
+    if len(jobs) > max_jobs:
+        raise ValueError(f"Batch of {len(jobs)} posts exceeds the limit of {max_jobs}")
+    return jobs
+
+
+class JobFailed(Exception):
+    """Raised by a job's generator once it has streamed text, so it is not retried."""
+
+
+async def run_batch(
+    jobs: List[PostJob],
+    generate: Callable[[PostJob], Awaitable[Any]],
+    *,
+    concurrency: int = 4,
+    max_attempts: int = 3,
+    base_delay: float = 1.0,
+    max_delay: float = 20.0,
+    sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+) -> List[Dict[str, Any]]:
+    """
+    Run ``generate(job)`` for every job, at most *concurrency* at a time.
+
+    Parameters
+    ----------
+    jobs : list of PostJob
+        Jobs to run; results come back in the same order.
+    generate : callable
+        Coroutine function streaming one job.  A throttling error is retried
+        up to *max_attempts* times in total; wrap an error in
+        :py:class:`JobFailed` to fail the job without retrying (e.g. once
+        part of its text has been published).
+    concurrency : int
+        Upper bound on jobs in flight.
+    base_delay, max_delay : float
+        Backoff before retry *n* is drawn uniformly from
+        ``[0, min(max_delay, base_delay * 2**n)]``.
+
+    Returns
+    -------
+    list of dict
+        Per job: ``topic_id``, ``platform``, ``status`` (``"success"`` /
+        ``"error"``), ``attempts`` and ``result`` or ``error``.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(job: PostJob) -> Dict[str, Any]:
+        outcome: Dict[str, Any] = {"topic_id": job.topic_id, "platform": job.platform}
+        attempt = 0
+        while True:
+            attempt += 1
+            async with semaphore:
+                try:
+                    result = await generate(job)
+                    return {**outcome, "status": "success", "attempts": attempt, "result": result}
+                except Exception as exc:
+                    error = exc.__cause__ if isinstance(exc, JobFailed) and exc.__cause__ else exc
+                    if isinstance(exc, JobFailed) or not is_throttling(exc) or attempt >= max_attempts:
+                        logger.warning("Post %s failed after %d attempt(s): %s", job.detail, attempt, error)
+                        return {**outcome, "status": "error", "attempts": attempt, "error": str(error)}
+            # Back off outside the semaphore so other jobs can use the slot
+            delay = random.uniform(0, min(max_delay, base_delay * 2**attempt))
+            logger.info("Post %s throttled, retrying in %.2fs", job.detail, delay)
+            await sleep(delay)
+
+    return await asyncio.gather(*(run(job) for job in jobs))
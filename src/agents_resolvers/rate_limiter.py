@@ -0,0 +1,428 @@
+"""
+rate_limiter.py
+---------------
+Admission control for Bedrock calls: a token bucket per model ID, priority
+classes and backoff driven by throttling responses.
+
+Every caller asks :py:meth:`RateLimiter.acquire` (or ``acquire_async``) for
+a token before calling the model and reports the outcome with
+:py:meth:`RateLimiter.observe`:
+
+* **Token buckets** – one per key (a model ID, or another Bedrock quota such
+  as a knowledge base's ingestion API), refilled at ``rate`` tokens per
+  second up to ``burst``.  ``BEDROCK_RATE_LIMITS`` overrides the rate per key.
+* **Priorities** – :py:data:`PRIORITY_INTERACTIVE` callers (``invoke_agent``,
+  single posts) are served before :py:data:`PRIORITY_BACKGROUND` ones
+  (batches, ingestion) waiting in the same process.  Background callers also
+  leave ``background_reserve`` of the burst untouched, which keeps headroom
+  for interactive calls in *other* processes sharing a distributed bucket.
+* **Adaptive backoff** – a throttled call halves the key's rate (down to
+  ``min_rate``) and pauses it for a jittered, exponentially growing delay;
+  each success restores a fraction of the configured rate.
+* **Queue-wait stats** – time spent waiting for tokens, drained per
+  invocation with :py:meth:`RateLimiter.drain_stats` and emitted as metrics.
+
+Buckets live in a pluggable :py:class:`BucketBackend`:
+
+* :py:class:`LocalBucketBackend` – per-process state (the default).
+* :py:class:`TableBucketBackend` – buckets in a DynamoDB table, shared by
+  every container; :py:class:`memory_table.InMemoryTable` is a local
+  stand-in for it.
+
+Usage
+~~~~~
+from rate_limiter import PRIORITY_INTERACTIVE, build_rate_limiter
+
+limiter = build_rate_limiter()
+limiter.acquire(MODEL_ID, PRIORITY_INTERACTIVE)
+try:
+    response = call_bedrock()
+except Exception as exc:
+    limiter.observe(MODEL_ID, exc)
+    raise
+limiter.observe(MODEL_ID)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Protocol, Tuple
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 10
+DEFAULT_MIN_RATE = 0.2
+DEFAULT_BACKGROUND_RESERVE = 0.2
+# Longest single sleep, so rate changes and new arrivals are picked up
+MAX_SLEEP = 1.0
+# How often a caller re-checks while a higher-priority caller is waiting
+PRIORITY_POLL_INTERVAL = 0.05
+
+# Bedrock, Bedrock Agent event streams and botocore spell throttling differently
+THROTTLING_CODES = {
+    "ThrottlingException",
+    "throttlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "serviceUnavailableException",
+}
+
+
+def is_throttling(exc: BaseException) -> bool:
+    """True for Bedrock throttling, whether raised by Strands or botocore."""
+    if type(exc).__name__ == "ModelThrottledException":
+        return True
+    code = getattr(exc, "response", {}).get("Error", {}).get("Code")
+    return code in THROTTLING_CODES
+
+
+class RateLimitTimeout(TimeoutError):
+    """No token became available within ``max_wait``."""
+
+
+class BucketBackend(Protocol):
+    """Minimal interface every token bucket store implements."""
+
+    def take(self, key: str, *, rate: float, capacity: float, reserve: float = 0.0) -> float:
+        """Take one token, leaving *reserve* behind; else return seconds until possible."""
+        ...
+
+
+class LocalBucketBackend:
+    """Token buckets held in this process."""
+
+    def __init__(self, *, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, *, rate: float, capacity: float, reserve: float = 0.0) -> float:
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= 1 + reserve:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+        return (1 + reserve - tokens) / rate
+
+
+class TableBucketBackend:
+    """Token buckets in a DynamoDB table, shared by every container.
+
+    Each take is a consistent read followed by a put conditioned on the
+    item's ``version``, retried when another container got there first.
+    Tokens and timestamps are stored as integers (milli-tokens and
+    milliseconds) because the DynamoDB resource API rejects floats.  The
+    table needs a string partition key (``pk`` by default) and may be shared
+    with the other stores thanks to the key prefix.
+    """
+
+    def __init__(
+        self,
+        table: Any,
+        *,
+        key_attribute: str = "pk",
+        ttl_attribute: str = "expires_at",
+        prefix: str = "RATELIMIT#",
+        max_retries: int = 5,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.table = table
+        self.key_attribute = key_attribute
+        self.ttl_attribute = ttl_attribute
+        self.prefix = prefix
+        self.max_retries = max_retries
+        self._clock = clock
+
+    def take(self, key: str, *, rate: float, capacity: float, reserve: float = 0.0) -> float:
+        pk = self.prefix + key
+        for _ in range(self.max_retries):
+            now_ms = int(self._clock() * 1000)
+            item = self.table.get_item(Key={self.key_attribute: pk}, ConsistentRead=True).get("Item")
+            if item:
+                elapsed = max(0, now_ms - int(item["updated_ms"])) / 1000
+                tokens = min(capacity, int(item["tokens_milli"]) / 1000 + elapsed * rate)
+                version = int(item["version"])
+            else:
+                tokens, version = capacity, 0
+            granted = tokens >= 1 + reserve
+            if granted:
+                tokens -= 1
+            try:
+                self.table.put_item(
+                    Item={
+                        self.key_attribute: pk,
+                        self.ttl_attribute: now_ms // 1000 + 24 * 60 * 60,
+                        "tokens_milli": int(tokens * 1000),
+                        "updated_ms": now_ms,
+                        "version": version + 1,
+                    },
+                    ConditionExpression="attribute_not_exists(#k) OR #v = :version",
+                    ExpressionAttributeNames={"#k": self.key_attribute, "#v": "version"},
+                    ExpressionAttributeValues={":version": version},
+                )
+            except Exception as exc:
+                code = getattr(exc, "response", {}).get("Error", {}).get("Code")
+                if code == "ConditionalCheckFailedException":
+                    continue
+                raise
+            return 0.0 if granted else (1 + reserve - tokens) / rate
+        # Heavy contention: back off for about one token's worth of time
+        return 1.0 / rate
+
+
+@dataclass
+class LimiterStats:
+    """Admissions since the last :py:meth:`RateLimiter.drain_stats`."""
+
+    acquired: int = 0
+    queue_wait: float = 0.0
+    max_queue_wait: float = 0.0
+    throttles: int = 0
+
+    def metrics(self) -> List[Tuple[str, str, float]]:
+        """``(name, unit, value)`` triples for a Powertools ``add_metric`` call."""
+        if not self.acquired and not self.throttles:
+            return []
+        return [
+            ("RateLimitAcquired", "Count", self.acquired),
+            ("RateLimitQueueWait", "Milliseconds", self.queue_wait * 1000),
+            ("RateLimitMaxQueueWait", "Milliseconds", self.max_queue_wait * 1000),
+            ("RateLimitThrottles", "Count", self.throttles),
+        ]
+
+
+class _KeyState:
+    __slots__ = ("rate", "blocked_until", "consecutive_throttles", "waiting")
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.blocked_until = 0.0
+        self.consecutive_throttles = 0
+        self.waiting = [0, 0]  # callers waiting, per priority
+
+
+class RateLimiter:
+    """
+    Admit calls per key at an adaptive rate, interactive callers first.
+
+    Parameters
+    ----------
+    backend : BucketBackend, optional
+        Where the buckets live; :py:class:`LocalBucketBackend` by default.
+    rate : float
+        Tokens per second per key; ``0`` disables the limiter entirely.
+    burst : float
+        Bucket capacity, i.e. calls that may start at once after a lull.
+    rates : dict, optional
+        Per-key rates overriding *rate*; ``0`` disables limiting for that
+        key.  Negative rates raise ``ValueError``.
+    min_rate : float
+        Floor for the adaptive rate after repeated throttling.
+    background_reserve : float
+        Share of *burst* background callers may not take.
+    backoff_base, backoff_max : float
+        Pause after the *n*-th consecutive throttle is drawn from
+        ``[d/2, d]`` with ``d = min(backoff_max, backoff_base * 2**(n-1))``.
+    recovery : float
+        Share of the configured rate restored by each successful call.
+    """
+
+    def __init__(
+        self,
+        backend: BucketBackend | None = None,
+        *,
+        rate: float = DEFAULT_RATE,
+        burst: float = DEFAULT_BURST,
+        rates: Dict[str, float] | None = None,
+        min_rate: float = DEFAULT_MIN_RATE,
+        background_reserve: float = DEFAULT_BACKGROUND_RESERVE,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        recovery: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.backend = backend or LocalBucketBackend(clock=clock)
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.rates = {key: float(value) for key, value in (rates or {}).items()}
+        negative = {key: value for key, value in self.rates.items() if value < 0}
+        if negative:
+            raise ValueError(f"Rate limits must be >= 0 (0 disables a key): {negative}")
+        self.min_rate = min_rate
+        self.reserve = min(background_reserve * self.burst, self.burst - 1)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.recovery = recovery
+        self._clock = clock
+        self._sleep = sleep
+        self._states: Dict[str, _KeyState] = {}
+        self._stats = LimiterStats()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def configured_rate(self, key: str) -> float:
+        return self.rates.get(key, self.rate)
+
+    def limits(self, key: str) -> bool:
+        """False when the limiter is off or *key*'s rate is ``0``."""
+        return self.enabled and self.configured_rate(key) > 0
+
+    def current_rate(self, key: str) -> float:
+        """The key's rate after adaptive backoff."""
+        with self._lock:
+            return self._state(key).rate
+
+    def acquire(self, key: str, priority: int = PRIORITY_BACKGROUND, *, max_wait: float | None = None) -> float:
+        """
+        Block until a call to *key* may start; returns the seconds waited.
+
+        Raises
+        ------
+        RateLimitTimeout
+            If that would take longer than *max_wait* seconds.
+        """
+        if not self.limits(key):
+            return 0.0
+        started = self._enter(key, priority)
+        try:
+            while True:
+                delay = self._try_take(key, priority, started, max_wait)
+                if delay <= 0:
+                    break
+                self._sleep(delay)
+        finally:
+            self._leave(key, priority)
+        return self._admitted(started)
+
+    async def acquire_async(
+        self, key: str, priority: int = PRIORITY_BACKGROUND, *, max_wait: float | None = None
+    ) -> float:
+        """:py:meth:`acquire` for coroutines: waits without blocking the event loop."""
+        if not self.limits(key):
+            return 0.0
+        started = self._enter(key, priority)
+        try:
+            while True:
+                # A DynamoDB backend does network I/O; keep it off the loop thread
+                delay = await asyncio.to_thread(self._try_take, key, priority, started, max_wait)
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+        finally:
+            self._leave(key, priority)
+        return self._admitted(started)
+
+    def observe(self, key: str, exc: BaseException | None = None) -> None:
+        """Report the outcome of a call admitted for *key*; throttling slows the key down."""
+        if not self.limits(key) or (exc is not None and not is_throttling(exc)):
+            return
+        with self._lock:
+            state = self._state(key)
+            configured = self.configured_rate(key)
+            if exc is None:
+                state.consecutive_throttles = 0
+                state.rate = min(configured, state.rate + configured * self.recovery)
+                return
+            state.consecutive_throttles += 1
+            state.rate = max(min(self.min_rate, configured), state.rate / 2)
+            pause = min(self.backoff_max, self.backoff_base * 2 ** (state.consecutive_throttles - 1))
+            state.blocked_until = max(state.blocked_until, self._clock() + random.uniform(pause / 2, pause))
+            self._stats.throttles += 1
+
+    def drain_stats(self) -> LimiterStats:
+        """Return and reset the stats gathered since the previous call."""
+        with self._lock:
+            stats, self._stats = self._stats, LimiterStats()
+        return stats
+
+    def _state(self, key: str) -> _KeyState:
+        # Callers hold ``_lock``
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _KeyState(self.configured_rate(key))
+        return state
+
+    def _enter(self, key: str, priority: int) -> float:
+        with self._lock:
+            self._state(key).waiting[priority] += 1
+        return self._clock()
+
+    def _leave(self, key: str, priority: int) -> None:
+        with self._lock:
+            self._state(key).waiting[priority] -= 1
+
+    def _try_take(self, key: str, priority: int, started: float, max_wait: float | None) -> float:
+        """Take a token (``0``) or return how long to sleep before trying again."""
+        now = self._clock()
+        with self._lock:
+            state = self._state(key)
+            rate = state.rate
+            if state.blocked_until > now:
+                delay = state.blocked_until - now
+            elif any(state.waiting[:priority]):
+                delay = min(PRIORITY_POLL_INTERVAL, 1.0 / rate)
+            else:
+                delay = 0.0
+        if delay <= 0:
+            reserve = self.reserve if priority > PRIORITY_INTERACTIVE else 0.0
+            delay = self.backend.take(key, rate=rate, capacity=self.burst, reserve=reserve)
+            if delay <= 0:
+                return 0.0
+        if max_wait is not None and now + delay - started > max_wait:
+            raise RateLimitTimeout(f"No Bedrock capacity for {key} within {max_wait:.1f}s")
+        return min(delay, MAX_SLEEP)
+
+    def _admitted(self, started: float) -> float:
+        waited = self._clock() - started
+        with self._lock:
+            self._stats.acquired += 1
+            self._stats.queue_wait += waited
+            self._stats.max_queue_wait = max(self._stats.max_queue_wait, waited)
+        return waited
+
+
+def build_rate_limiter() -> RateLimiter:
+    """
+    Build the per-container limiter from environment variables.
+
+    ``BEDROCK_RATE_LIMIT`` is the default rate per key in calls per second
+    (``0`` disables limiting), ``BEDROCK_RATE_LIMITS`` a JSON object of
+    per-key rates (``0`` disables limiting for that key) and
+    ``BEDROCK_RATE_BURST`` the bucket size.
+    ``BEDROCK_RATE_MIN`` bounds the adaptive backoff and
+    ``BEDROCK_RATE_BACKGROUND_RESERVE`` the share of each burst kept for
+    interactive calls.  ``BEDROCK_RATE_LIMIT_TABLE_NAME`` keeps the buckets
+    in DynamoDB, shared by every container, instead of in this process.
+    """
+    rate = float(os.environ.get("BEDROCK_RATE_LIMIT", DEFAULT_RATE))
+    settings: Dict[str, Any] = {
+        "rate": rate,
+        "burst": float(os.environ.get("BEDROCK_RATE_BURST", DEFAULT_BURST)),
+        "rates": json.loads(os.environ.get("BEDROCK_RATE_LIMITS") or "{}"),
+        "min_rate": float(os.environ.get("BEDROCK_RATE_MIN", DEFAULT_MIN_RATE)),
+        "background_reserve": float(os.environ.get("BEDROCK_RATE_BACKGROUND_RESERVE", DEFAULT_BACKGROUND_RESERVE)),
+    }
+
+    table_name = os.environ.get("BEDROCK_RATE_LIMIT_TABLE_NAME")
+    if not table_name or rate <= 0:
+        return RateLimiter(**settings)
+
+    import boto3
+
+    table = boto3.resource("dynamodb").Table(table_name)
+    return RateLimiter(TableBucketBackend(table), **settings)
@@ -0,0 +1,246 @@
+"""
+response_cache.py
+-----------------
+Cache generated posts so an identical request is answered without a model call.
+
+Entries are keyed by the prompt plus everything else that shapes the output
+(model ID, temperature, system prompt) and the user the response was
+generated for, so one user's post is never served to another.  A lookup
+tries two keys:
+
+1. *exact* – ``sha256`` of the prompt as sent;
+2. *normalized* – ``sha256`` of the prompt after NFKC, case folding and
+   whitespace collapsing, so ``"Launch  week!"`` and ``"launch week!"``
+   share an entry.  Disable with ``normalize=False``.
+
+Stores are pluggable, like the dedup stores of the ingestion pipeline:
+
+* :py:class:`InMemoryResponseStore` – per-container LRU with per-entry TTL.
+* :py:class:`TableResponseStore` – any DynamoDB ``Table``-like object;
+  :py:class:`memory_table.InMemoryTable` is a local stand-in with the same
+  interface.
+* :py:class:`TieredResponseStore` – checks the stores in order (LRU first,
+  table second) and writes through to all of them.
+
+Usage
+~~~~~
+from response_cache import ResponseCache, InMemoryResponseStore
+
+cache = ResponseCache(InMemoryResponseStore())
+text = cache.lookup(topic, user_id, MODEL_ID, TEMPERATURE, SYSTEM_PROMPT)
+if text is None:
+    text = generate(topic)
+    cache.remember(topic, text, user_id, MODEL_ID, TEMPERATURE, SYSTEM_PROMPT)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Protocol, Tuple
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+# DynamoDB items are capped at 400 KB; longer responses stay in memory only
+MAX_TABLE_TEXT_BYTES = 350 * 1024
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Canonical form used for the normalized key: NFKC, casefolded, collapsed whitespace."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", prompt).casefold()).strip()
+
+
+def cache_key(prompt: str, *context: Any, kind: str = "exact") -> str:
+    """Return the cache key for *prompt* generated under *context*."""
+    digest = hashlib.sha256()
+    digest.update(kind.encode("utf-8"))
+    for part in context:
+        digest.update(b"\0")
+        digest.update(str(part).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResponseStore(Protocol):
+    """Minimal interface every response cache backend implements."""
+
+    def get(self, key: str) -> str | None: ...
+
+    def put(self, key: str, text: str, ttl_seconds: int) -> None: ...
+
+
+class InMemoryResponseStore:
+    """Bounded LRU of responses with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1000, *, clock: Callable[[], float] = time.time) -> None:
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= self._clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: str, text: str, ttl_seconds: int) -> None:
+        with self._lock:
+            self._entries[key] = (text, self._clock() + ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TableResponseStore:
+    """Responses in a DynamoDB table with a TTL attribute.
+
+    The table needs a string partition key (``pk`` by default) and TTL
+    enabled on ``expires_at``.  Because DynamoDB deletes expired items
+    lazily, expiry is also checked on read.
+    """
+
+    def __init__(
+        self,
+        table: Any,
+        *,
+        key_attribute: str = "pk",
+        ttl_attribute: str = "expires_at",
+        prefix: str = "POSTCACHE#",
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.table = table
+        self.key_attribute = key_attribute
+        self.ttl_attribute = ttl_attribute
+        self.prefix = prefix
+        self._clock = clock
+
+    def get(self, key: str) -> str | None:
+        item = self.table.get_item(Key={self.key_attribute: self.prefix + key}).get("Item")
+        if not item or int(item.get(self.ttl_attribute, 0)) <= self._clock():
+            return None
+        return item.get("text")
+
+    def put(self, key: str, text: str, ttl_seconds: int) -> None:
+        if len(text.encode("utf-8")) > MAX_TABLE_TEXT_BYTES:
+            return
+        self.table.put_item(
+            Item={
+                self.key_attribute: self.prefix + key,
+                self.ttl_attribute: int(self._clock() + ttl_seconds),
+                "text": text,
+            }
+        )
+
+
+class TieredResponseStore:
+    """Check *stores* in order; write-through to all, back-filling faster tiers."""
+
+    def __init__(self, *stores: ResponseStore, ttl_seconds: int = DEFAULT_TTL_SECONDS) -> None:
+        self.stores = stores
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key: str) -> str | None:
+        for i, store in enumerate(self.stores):
+            text = store.get(key)
+            if text is not None:
+                for faster in self.stores[:i]:
+                    faster.put(key, text, self.ttl_seconds)
+                return text
+        return None
+
+    def put(self, key: str, text: str, ttl_seconds: int) -> None:
+        for store in self.stores:
+            store.put(key, text, ttl_seconds)
+
+
+class ResponseCache:
+    """Look up and remember generated responses by exact, then normalized, prompt.
+
+    A cache with ``ttl_seconds <= 0`` is disabled: it never hits and stores nothing.
+    """
+
+    def __init__(
+        self,
+        store: ResponseStore,
+        *,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        normalize: bool = True,
+    ) -> None:
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.normalize = normalize
+
+        # Container-lifetime counters, handy when debugging warm containers
+        self.exact_hits = 0
+        self.normalized_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def lookup(self, prompt: str, *context: Any) -> str | None:
+        """Return the cached response for *prompt* under *context*, if any."""
+        if not self.enabled:
+            return None
+        text = self.store.get(cache_key(prompt, *context))
+        counter = "exact_hits"
+        if text is None and self.normalize:
+            text = self.store.get(cache_key(normalize_prompt(prompt), *context, kind="normalized"))
+            counter = "normalized_hits"
+        with self._lock:
+            if text is None:
+                self.misses += 1
+            else:
+                setattr(self, counter, getattr(self, counter) + 1)
+        return text
+
+    def remember(self, prompt: str, text: str, *context: Any) -> None:
+        """Remember *text* as the response to *prompt* under *context*."""
+        if not self.enabled:
+            return
+        self.store.put(cache_key(prompt, *context), text, self.ttl_seconds)
+        if self.normalize:
+            key = cache_key(normalize_prompt(prompt), *context, kind="normalized")
+            self.store.put(key, text, self.ttl_seconds)
+
+
+def build_response_cache() -> ResponseCache:
+    """
+    Build the per-container response cache from environment variables.
+
+    ``RESPONSE_CACHE_TTL_SECONDS`` sets the entry lifetime; ``0`` disables the
+    cache.  ``RESPONSE_CACHE_TABLE_NAME`` adds a DynamoDB tier behind the
+    in-memory LRU (sized by ``RESPONSE_CACHE_SIZE``) and
+    ``RESPONSE_CACHE_NORMALIZE=false`` restricts lookups to exact prompts.
+    """
+    ttl_seconds = int(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    normalize = os.environ.get("RESPONSE_CACHE_NORMALIZE", "true").lower() != "false"
+    lru = InMemoryResponseStore(int(os.environ.get("RESPONSE_CACHE_SIZE", "1000")))
+
+    table_name = os.environ.get("RESPONSE_CACHE_TABLE_NAME")
+    if not table_name or ttl_seconds <= 0:
+        return ResponseCache(lru, ttl_seconds=ttl_seconds, normalize=normalize)
+
+    import boto3
+
+    table = boto3.resource("dynamodb").Table(table_name)
+    store = TieredResponseStore(lru, TableResponseStore(table), ttl_seconds=ttl_seconds)
+    return ResponseCache(store, ttl_seconds=ttl_seconds, normalize=normalize)
@@ -0,0 +1,175 @@
+"""
+stream_metrics.py
+-----------------
+Latency and volume of one streamed agent response.
+
+A :py:class:`StreamStats` is fed from the streaming loop – one call per
+text chunk, tool-use event and usage report – and turned into CloudWatch
+metrics with :py:func:`emit_stream_metrics` and X-Ray annotations with
+:py:func:`annotate`:
+
+* ``TimeToFirstToken`` – from the start of the request to the first chunk.
+* ``OutputTokens`` – as reported by the model, else the number of chunks.
+* ``TokensPerSecond`` – output tokens over the time spent generating them.
+* ``ToolUseEvents`` – distinct tool invocations.
+* ``InputTokens``, ``PromptCacheReadTokens``, ``PromptCacheWriteTokens`` –
+  as reported by the model; cached tokens are not part of ``InputTokens``.
+* ``PromptCacheHits`` – 1 if the prompt prefix was read from the cache.
+* ``EventPublishLatency`` – one value per EventBridge ``PutEvents`` call.
+
+Chunks are never logged one by one: every ``STREAM_LOG_EVERY``-th chunk is
+logged at DEBUG (0, the default, logs none) and a single summary is logged
+per stream.
+
+Usage
+~~~~~
+from stream_metrics import StreamStats, annotate, emit_stream_metrics
+
+stats = StreamStats(logger=logger)
+async for event in agent.stream_async(topic):
+    if "data" in event:
+        stats.chunk(event["data"])
+stats.publish_latencies.extend(publisher.publish_latencies)
+emit_stream_metrics(metrics, stats)
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List
+
+from aws_lambda_powertools.metrics import MetricUnit
+
+# Log every Nth streamed chunk at DEBUG; 0 disables per-chunk logging
+STREAM_LOG_EVERY = int(os.environ.get("STREAM_LOG_EVERY", "0"))
+
+
+_USAGE_FIELDS = (
+    ("inputTokens", "input_tokens"),
+    ("outputTokens", "output_tokens"),
+    ("cacheReadInputTokens", "cache_read_tokens"),
+    ("cacheWriteInputTokens", "cache_write_tokens"),
+)
+
+
+class StreamStats:
+    """Counters and timestamps for one streamed response."""
+
+    def __init__(
+        self,
+        *,
+        log_every: int | None = None,
+        logger: Any = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self.log_every = STREAM_LOG_EVERY if log_every is None else log_every
+        self.logger = logger or logging.getLogger(__name__)
+        self._clock = clock
+
+        self.started_at = clock()
+        self.first_chunk_at: float | None = None
+        self.last_chunk_at: float | None = None
+        self.chunks = 0
+        self.characters = 0
+        self.input_tokens: int | None = None
+        self.output_tokens: int | None = None
+        # Prompt-cache usage; None until a report includes it
+        self.cache_read_tokens: int | None = None
+        self.cache_write_tokens: int | None = None
+        # Seconds per EventBridge PutEvents call made for this stream
+        self.publish_latencies: List[float] = []
+        self._tool_uses: set = set()
+
+    # ─── Producer API ────────────────────────────────────────────────────────
+    def chunk(self, text: str) -> None:
+        """Record one streamed piece of text."""
+        now = self._clock()
+        if self.first_chunk_at is None:
+            self.first_chunk_at = now
+        self.last_chunk_at = now
+        self.chunks += 1
+        self.characters += len(text)
+        if self.log_every and self.chunks % self.log_every == 0:
+            self.logger.debug("Streamed %d chunks (%d chars) so far", self.chunks, self.characters)
+
+    def tool_use(self, tool_use_id: str) -> None:
+        """Record a tool-use event; repeated deltas of one invocation count once."""
+        self._tool_uses.add(tool_use_id)
+
+    def usage(self, usage: Dict[str, Any]) -> None:
+        """Add a model usage report (input, output and prompt-cache token counts)."""
+        for key, attribute in _USAGE_FIELDS:
+            if key in usage:
+                setattr(self, attribute, (getattr(self, attribute) or 0) + int(usage[key]))
+
+    # ─── Derived values ──────────────────────────────────────────────────────
+    @property
+    def tool_uses(self) -> int:
+        return len(self._tool_uses)
+
+    @property
+    def tokens(self) -> int:
+        """Output tokens, falling back to the chunk count if no usage was reported."""
+        return self.chunks if self.output_tokens is None else self.output_tokens
+
+    @property
+    def time_to_first_token(self) -> float | None:
+        if self.first_chunk_at is None:
+            return None
+        return self.first_chunk_at - self.started_at
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        if self.first_chunk_at is None or self.last_chunk_at == self.first_chunk_at:
+            return None
+        return self.tokens / (self.last_chunk_at - self.first_chunk_at)
+
+    def as_dict(self) -> Dict[str, Any]:
+        ttft = self.time_to_first_token
+        return {
+            "time_to_first_token_ms": None if ttft is None else round(ttft * 1000, 1),
+            "tokens": self.tokens,
+            "input_tokens": self.input_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "tokens_per_second": self.tokens_per_second,
+            "chunks": self.chunks,
+            "characters": self.characters,
+            "tool_uses": self.tool_uses,
+            "publish_calls": len(self.publish_latencies),
+            "duration_ms": round((self._clock() - self.started_at) * 1000, 1),
+        }
+
+
+def emit_stream_metrics(metrics: Any, stats: StreamStats) -> None:
+    """Add the stream's metrics to a Powertools ``Metrics`` instance."""
+    ttft = stats.time_to_first_token
+    if ttft is not None:
+        metrics.add_metric(name="TimeToFirstToken", unit=MetricUnit.Milliseconds, value=ttft * 1000)
+    metrics.add_metric(name="OutputTokens", unit=MetricUnit.Count, value=stats.tokens)
+    if stats.tokens_per_second is not None:
+        metrics.add_metric(
+            name="TokensPerSecond", unit=MetricUnit.CountPerSecond, value=stats.tokens_per_second
+        )
+    metrics.add_metric(name="ToolUseEvents", unit=MetricUnit.Count, value=stats.tool_uses)
+    if stats.input_tokens is not None:
+        metrics.add_metric(name="InputTokens", unit=MetricUnit.Count, value=stats.input_tokens)
+    if stats.cache_read_tokens is not None or stats.cache_write_tokens is not None:
+        read, written = stats.cache_read_tokens or 0, stats.cache_write_tokens or 0
+        metrics.add_metric(name="PromptCacheReadTokens", unit=MetricUnit.Count, value=read)
+        metrics.add_metric(name="PromptCacheWriteTokens", unit=MetricUnit.Count, value=written)
+        metrics.add_metric(name="PromptCacheHits", unit=MetricUnit.Count, value=int(read > 0))
+    for seconds in stats.publish_latencies:
+        metrics.add_metric(name="EventPublishLatency", unit=MetricUnit.Milliseconds, value=seconds * 1000)
+    stats.logger.info("Stream finished: %s", stats.as_dict())
+
+
+def annotate(subsegment: Any, stats: StreamStats) -> None:
+    """Attach the stream's numbers to an X-Ray subsegment."""
+    summary = stats.as_dict()
+    for key in ("time_to_first_token_ms", "tokens", "tool_uses"):
+        if summary[key] is not None:
+            subsegment.put_annotation(key, summary[key])
+    subsegment.put_metadata("stream", summary)
@@ -14,14 +14,45 @@ saver = KnowledgeBaseSaver(
 
 result = saver.store_text("any unstructured text here")
 print(result)
+
+# Large documents: split into chunks and store them concurrently
+results = saver.store_document(big_csv, document_id="doc-123", kind="csv")
+
+# Huge S3 objects: chunk and store while streaming, in constant memory
+results = saver.store_stream(iter_decoded_lines(obj["Body"]), kind="csv")
+
+# Already-extracted text: skip the agent and write the record directly
+result = saver.store_text("extracted text", direct=True)
+
+# Ingestion yields Bedrock capacity to interactive callers
+from rate_limiter import build_rate_limiter
+saver = KnowledgeBaseSaver(knowledge_base_id, rate_limiter=build_rate_limiter())
 """
 
 from __future__ import annotations
-from typing import Any, Dict
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List
+import os
+import threading
+import uuid
+
+from chunking import (
+    DEFAULT_MAX_TOKENS,
+    DEFAULT_OVERLAP_TOKENS,
+    Chunk,
+    iter_chunks,
+    split_document,
+)
+from dedup import ContentDeduplicator
+from kb_writer import DirectKnowledgeBaseWriter
+from rate_limiter import PRIORITY_BACKGROUND, THROTTLING_CODES, RateLimiter, is_throttling
+
+if TYPE_CHECKING:  # Strands is only imported once an agent-mode write needs it
+    from strands import Agent
 
-from strands import Agent
-from strands_tools import use_llm, memory
-from strands.models import BedrockModel
+WRITE_MODE_AGENT = "agent"
+WRITE_MODE_DIRECT = "direct"
 
 # One-time system prompt for every agent you spawn
 SYSTEM_PROMPT = """
@@ -34,6 +65,22 @@ You are a helpful “Knowledge-Saver” agent.
 """
 
 
+class ToolCallFailed(RuntimeError):
+    """A direct ``memory`` tool call returned ``status: error``.
+
+    Strands reports tool failures in the result instead of raising.  When
+    the error text names a throttling code, ``response`` carries it so
+    :py:func:`rate_limiter.is_throttling` recognises the failure.
+    """
+
+    def __init__(self, result: dict) -> None:
+        message = " ".join(block.get("text", "") for block in result.get("content") or ())
+        super().__init__(message or "memory tool call failed")
+        code = next((code for code in THROTTLING_CODES if code in message), None)
+        if code:
+            self.response = {"Error": {"Code": code}}
+
+
 class KnowledgeBaseSaver:
     """Create once, then call :py:meth:`store_text` from any module."""
 
@@ -45,26 +92,84 @@ class KnowledgeBaseSaver:
         model_id: str = "us.anthropic.claude-3-7-sonnet-20250219-v1:0",
         temperature: float = 0.3,
         bypass_tool_consent: bool | str = True,
+        max_workers: int = 4,
+        deduplicator: ContentDeduplicator | None = None,
+        write_mode: str | None = None,
+        agent: Agent | None = None,
+        kb_client: Any = None,
+        rate_limiter: RateLimiter | None = None,
     ) -> None:
         self.knowledge_base_id = knowledge_base_id
         self.bypass_tool_consent = str(bypass_tool_consent)
+        self.max_workers = max_workers
+        self.deduplicator = deduplicator
+        self.region = region
+        self.model_id = model_id
+        self.temperature = temperature
+        # Every write waits for a background-priority token: agent writes on
+        # the model's bucket, direct writes on the KB's ingestion bucket
+        self.rate_limiter = rate_limiter
 
-        # Initialise Bedrock model & Agent only once per container
-        self._bedrock_model = BedrockModel(
-            model_id=model_id,
-            region_name=region,
-            temperature=temperature,
-        )
+        # "agent" (default) routes writes through the Strands memory tool,
+        # "direct" ingests the record without building a model at all
+        self.write_mode = (write_mode or os.environ.get("KB_WRITE_MODE", WRITE_MODE_AGENT)).lower()
+        if self.write_mode not in (WRITE_MODE_AGENT, WRITE_MODE_DIRECT):
+            raise ValueError(f"Unknown KB write mode: {self.write_mode}")
 
-        self._agent = Agent(
-            model=self._bedrock_model,
-            system_prompt=SYSTEM_PROMPT,
-            tools=[use_llm, memory],
-            callback_handler=None,  # no streaming / UI callbacks in Lambda
-        )
+        # Pre-built agent / client (tests inject fakes); otherwise both are
+        # created on first use, once per container
+        self._agent = agent
+        self._kb_client = kb_client
+        self._writer: DirectKnowledgeBaseWriter | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def agent(self) -> Agent:
+        """The Strands agent, built on first agent-mode write."""
+        with self._lock:
+            if self._agent is None:
+                from bedrock_clients import bedrock_model
+                from strands import Agent
+                from strands_tools import memory, use_llm
 
-   
-    def store_text(self, text: str, *, metadata: Dict[str, Any] | None = None) -> dict:
+                # No prompt-cache checkpoints: writes are direct tool calls
+                # that never send the prompt or tool definitions to the model
+                self._bedrock_model = bedrock_model(
+                    model_id=self.model_id,
+                    region_name=self.region,
+                    temperature=self.temperature,
+                )
+
+                self._agent = Agent(
+                    model=self._bedrock_model,
+                    system_prompt=SYSTEM_PROMPT,
+                    tools=[use_llm, memory],
+                    callback_handler=None,  # no streaming / UI callbacks in Lambda
+                    # Direct tool calls run concurrently from store_document and must
+                    # not grow the shared conversation history
+                    record_direct_tool_call=False,
+                )
+            return self._agent
+
+    @property
+    def writer(self) -> DirectKnowledgeBaseWriter:
+        """The model-free KB writer, built on first direct-mode write."""
+        with self._lock:
+            if self._writer is None:
+                if self._kb_client is None:
+                    from bedrock_clients import bedrock_client
+
+                    self._kb_client = bedrock_client("bedrock-agent", region_name=self.region)
+                self._writer = DirectKnowledgeBaseWriter(self._kb_client, self.knowledge_base_id)
+            return self._writer
+
+    def store_text(
+        self,
+        text: str,
+        *,
+        metadata: Dict[str, Any] | None = None,
+        direct: bool | None = None,
+    ) -> dict:
         """
         Persist *text* into the configured Strands knowledge-base.
 
@@ -74,12 +179,39 @@ class KnowledgeBaseSaver:
             Raw text to store.
         metadata : dict, optional
             Extra key-value pairs to attach to the record (tags, source, etc.).
+        direct : bool, optional
+            Override the saver's ``write_mode`` for this call; ``True`` writes
+            the record without going through the agent.
 
         Returns
         -------
         dict
             The tool-returned payload (e.g. record ID, status).
+
+        Raises
+        ------
+        ToolCallFailed
+            The memory tool reported an error instead of storing the text.
         """
+        if direct is None:
+            direct = self.write_mode == WRITE_MODE_DIRECT
+        if self.rate_limiter is None:
+            return self._store(text, metadata, direct)
+
+        key = f"kb-ingest:{self.knowledge_base_id}" if direct else self.model_id
+        self.rate_limiter.acquire(key, PRIORITY_BACKGROUND)
+        try:
+            result = self._store(text, metadata, direct)
+        except Exception as exc:
+            self.rate_limiter.observe(key, exc)
+            raise
+        self.rate_limiter.observe(key)
+        return result
+
+    def _store(self, text: str, metadata: Dict[str, Any] | None, direct: bool) -> dict:
+        if direct:
+            return self.writer.store(text, metadata=metadata)
+
         payload: dict[str, Any] = {
             "action": "store",
             "content": text,
@@ -90,4 +222,136 @@ class KnowledgeBaseSaver:
         if metadata:
             payload["metadata"] = metadata
 
-        return self._agent.tool.memory(**payload)
+        result = self.agent.tool.memory(**payload)
+        if isinstance(result, dict) and result.get("status") == "error":
+            raise ToolCallFailed(result)
+        return result
+
+    def store_document(
+        self,
+        text: str,
+        *,
+        document_id: str | None = None,
+        metadata: Dict[str, Any] | None = None,
+        kind: str = "text",
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+        direct: bool | None = None,
+    ) -> List[dict]:
+        """
+        Split *text* into overlapping chunks and store them concurrently.
+
+        Parameters
+        ----------
+        text : str
+            Full document body.
+        document_id : str, optional
+            Identifier shared by every chunk; generated when omitted.
+        metadata : dict, optional
+            Extra key-value pairs attached to every chunk.
+        kind : str
+            ``"csv"`` to split on rows, anything else splits on sentences.
+        max_tokens, overlap_tokens : int
+            Chunk size and overlap, see :py:func:`chunking.split_document`.
+        direct : bool, optional
+            Per-call write mode override, see :py:meth:`store_text`.
+
+        Returns
+        -------
+        list of dict
+            One entry per chunk, in order: ``chunk_index``, ``document_id``,
+            ``status`` (``"success"`` / ``"skipped"`` / ``"error"``) and
+            ``result`` or ``error``.  Chunks the deduplicator has already
+            seen in this document for ``metadata["userId"]`` are
+            ``"skipped"``; errors caused by Bedrock throttling are flagged
+            ``throttled``.
+        """
+        chunks = split_document(
+            text, kind=kind, max_tokens=max_tokens, overlap_tokens=overlap_tokens
+        )
+        return self._store_chunks(
+            chunks,
+            document_id=document_id,
+            metadata=metadata,
+            chunk_count=len(chunks),
+            direct=direct,
+        )
+
+    def store_stream(
+        self,
+        lines: Iterable[str],
+        *,
+        document_id: str | None = None,
+        metadata: Dict[str, Any] | None = None,
+        kind: str = "text",
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+        direct: bool | None = None,
+    ) -> List[dict]:
+        """
+        Like :py:meth:`store_document`, but for a lazy stream of *lines*.
+
+        Chunks are produced and stored while the stream is being read, with
+        at most ``2 * max_workers`` chunks held in memory at any time, so a
+        large S3 object never has to be materialised.  The total number of
+        chunks is unknown up front, so ``chunk_count`` is not attached.
+        """
+        chunks = iter_chunks(
+            lines, kind=kind, max_tokens=max_tokens, overlap_tokens=overlap_tokens
+        )
+        return self._store_chunks(
+            chunks, document_id=document_id, metadata=metadata, direct=direct
+        )
+
+    def _store_chunks(
+        self,
+        chunks: Iterable[Chunk],
+        *,
+        document_id: str | None,
+        metadata: Dict[str, Any] | None,
+        chunk_count: int | None = None,
+        direct: bool | None = None,
+    ) -> List[dict]:
+        document_id = document_id or str(uuid.uuid4())
+        dedup = self.deduplicator
+        user_id = (metadata or {}).get("userId")
+
+        def store(chunk: Chunk) -> dict:
+            chunk_metadata = {
+                **(metadata or {}),
+                "document_id": document_id,
+                "chunk_index": chunk.index,
+            }
+            if chunk_count is not None:
+                chunk_metadata["chunk_count"] = chunk_count
+            outcome = {"chunk_index": chunk.index, "document_id": document_id}
+            if dedup is not None and dedup.is_duplicate(chunk.text, user_id, document_id):
+                outcome["status"] = "skipped"
+                return outcome
+            try:
+                outcome["result"] = self.store_text(
+                    chunk.text, metadata=chunk_metadata, direct=direct
+                )
+                outcome["status"] = "success"
+                if dedup is not None:
+                    dedup.remember(chunk.text, user_id, document_id)
+            except Exception as exc:  # one bad chunk must not sink the document
+                outcome["error"] = str(exc)
+                outcome["status"] = "error"
+                if is_throttling(exc):
+                    outcome["throttled"] = True
+            return outcome
+
+        if self.max_workers <= 1:
+            return [store(chunk) for chunk in chunks]
+
+        # Bounded submission: never hold more than 2 * max_workers chunks
+        results: List[dict] = []
+        in_flight: deque = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for chunk in chunks:
+                if len(in_flight) >= 2 * self.max_workers:
+                    results.append(in_flight.popleft().result())
+                in_flight.append(pool.submit(store, chunk))
+            results.extend(future.result() for future in in_flight)
+        return results
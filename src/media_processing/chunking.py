@@ -0,0 +1,270 @@
+"""
+chunking.py
+-----------
+Split large documents into token-bounded, overlapping chunks before they
+are written to the Knowledge Base.
+
+Prose is split at paragraph and sentence boundaries, CSV at row
+boundaries (repeating the header row in every chunk so each one is
+self-describing).  Consecutive chunks share up to ``overlap_tokens`` worth
+of trailing units so context is not lost at the seams.
+
+:py:func:`iter_chunks` does the same over a lazy stream of lines (see
+:py:func:`iter_decoded_lines` for S3 bodies) so arbitrarily large files are
+chunked in constant memory.
+
+Usage
+~~~~~
+from chunking import iter_chunks, iter_decoded_lines, split_document
+
+for chunk in split_document(body, kind="csv", max_tokens=512):
+    print(chunk.index, chunk.tokens, chunk.text[:40])
+
+for chunk in iter_chunks(iter_decoded_lines(obj["Body"]), kind="csv"):
+    ...
+"""
+
+from __future__ import annotations
+
+import codecs
+import itertools
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List
+
+DEFAULT_MAX_TOKENS = 512
+DEFAULT_OVERLAP_TOKENS = 64
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+# A "sentence" longer than this is cut early so a file without punctuation
+# cannot pull the whole document into memory
+_MAX_SENTENCE_CHARS = 16 * 1024
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return max(1, (len(text) + 3) // 4)
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A single piece of a document, ready to be stored."""
+
+    index: int
+    text: str
+    tokens: int
+
+
+def split_document(
+    text: str,
+    *,
+    kind: str = "text",
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> List[Chunk]:
+    """
+    Split *text* into chunks of at most *max_tokens*.
+
+    Parameters
+    ----------
+    text : str
+        Document body.
+    kind : str
+        ``"csv"`` splits on rows and repeats the header; anything else is
+        treated as prose.
+    max_tokens : int
+        Upper bound for a chunk, as measured by *count_tokens*.
+    overlap_tokens : int
+        How much trailing context each chunk repeats from the previous one.
+    count_tokens : callable
+        Token counter; defaults to :py:func:`estimate_tokens`.
+    """
+    return list(
+        iter_chunks(
+            text.splitlines(),
+            kind=kind,
+            max_tokens=max_tokens,
+            overlap_tokens=overlap_tokens,
+            count_tokens=count_tokens,
+        )
+    )
+
+
+def iter_chunks(
+    lines: Iterable[str],
+    *,
+    kind: str = "text",
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> Iterator[Chunk]:
+    """
+    Streaming form of :py:func:`split_document`.
+
+    Consumes *lines* lazily and yields chunks as soon as they are full, so
+    memory stays bounded by the chunk size rather than the document size.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    if not 0 <= overlap_tokens < max_tokens:
+        raise ValueError("overlap_tokens must be >= 0 and smaller than max_tokens")
+
+    if kind == "csv":
+        return _iter_rows(lines, max_tokens, overlap_tokens, count_tokens)
+    return _iter_pack(_sentences(lines), " ", "", max_tokens, overlap_tokens, count_tokens)
+
+
+def iter_decoded_lines(body: Any, *, chunk_size: int = 64 * 1024) -> Iterator[str]:
+    """
+    Yield text lines from a binary stream without reading it all at once.
+
+    *body* is a botocore ``StreamingBody`` (``iter_chunks``) or any file-like
+    object.  Decoding is incremental, so a multi-byte UTF-8 character split
+    across two network chunks is reassembled instead of being replaced.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    if hasattr(body, "iter_chunks"):
+        raw_chunks = body.iter_chunks(chunk_size)
+    else:
+        raw_chunks = iter(lambda: body.read(chunk_size), b"")
+
+    pending = ""
+    for raw in raw_chunks:
+        pending += decoder.decode(raw)
+        lines = pending.splitlines(keepends=True)
+        # The last piece may be an incomplete line; keep it for the next chunk
+        pending = lines.pop() if lines and not lines[-1].endswith(("\n", "\r")) else ""
+        for line in lines:
+            yield line.rstrip("\r\n")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield from pending.splitlines()
+
+
+def _sentences(lines: Iterable[str]) -> Iterator[str]:
+    """Split a line stream into sentences, emitting each as soon as it ends."""
+    buffer = ""
+    for line in lines:
+        if not line.strip():
+            # Blank line: paragraph break
+            yield from _split_paragraph(buffer)
+            buffer = ""
+            continue
+        buffer = f"{buffer}\n{line}" if buffer else line.lstrip()
+        if len(buffer) > _MAX_SENTENCE_CHARS or any(p in line for p in ".!?"):
+            pieces = _SENTENCE_RE.split(buffer)
+            buffer = pieces.pop()  # possibly unfinished; wait for more lines
+            yield from (piece for piece in pieces if piece)
+            if len(buffer) > _MAX_SENTENCE_CHARS:
+                # No sentence end in sight; _bounded hard-splits it downstream
+                yield buffer
+                buffer = ""
+    yield from _split_paragraph(buffer)
+
+
+def _split_paragraph(buffer: str) -> List[str]:
+    text = buffer.strip()
+    return [s for s in _SENTENCE_RE.split(text) if s] if text else []
+
+
+def _iter_rows(
+    lines: Iterable[str], max_tokens: int, overlap_tokens: int, count_tokens: Callable[[str], int]
+) -> Iterator[Chunk]:
+    rows = (row for row in lines if row.strip())
+    header = next(rows, None)
+    if header is None:
+        return
+    first = next(rows, None)
+    if first is None:
+        yield Chunk(0, header, count_tokens(header))
+        return
+    rows = itertools.chain([first], rows)
+
+    budget = max_tokens - count_tokens(header + "\n")
+    if budget <= overlap_tokens:
+        # Header alone is close to the budget; don't repeat it
+        yield from _iter_pack(
+            itertools.chain([header], rows), "\n", "", max_tokens, overlap_tokens, count_tokens
+        )
+        return
+    yield from _iter_pack(rows, "\n", header + "\n", budget, overlap_tokens, count_tokens)
+
+
+def _iter_pack(
+    units: Iterable[str],
+    separator: str,
+    prefix: str,
+    budget: int,
+    overlap_tokens: int,
+    count_tokens: Callable[[str], int],
+) -> Iterator[Chunk]:
+    """Greedily pack *units* into chunks, carrying an overlap between them."""
+
+    def cost(unit: str) -> int:
+        # Charging the separator to each unit keeps the joined text in budget
+        return count_tokens(unit + separator)
+
+    index = 0
+    current: List[str] = []
+    current_tokens = 0
+    fresh = 0  # units in ``current`` that are not overlap from the last chunk
+
+    for unit in _bounded(units, budget, count_tokens):
+        tokens = cost(unit)
+        if current and current_tokens + tokens > budget:
+            body = prefix + separator.join(current)
+            yield Chunk(index, body, count_tokens(body))
+            index += 1
+            current, current_tokens = _overlap(current, overlap_tokens, cost)
+            fresh = 0
+            # Overlap must never push a unit over the limit
+            while current and current_tokens + tokens > budget:
+                current_tokens -= cost(current.pop(0))
+        current.append(unit)
+        current_tokens += tokens
+        fresh += 1
+
+    if current and fresh:
+        body = prefix + separator.join(current)
+        yield Chunk(index, body, count_tokens(body))
+
+
+def _overlap(units: List[str], overlap_tokens: int, cost: Callable[[str], int]):
+    kept: List[str] = []
+    total = 0
+    for unit in reversed(units):
+        tokens = cost(unit)
+        if total + tokens > overlap_tokens:
+            break
+        kept.insert(0, unit)
+        total += tokens
+    return kept, total
+
+
+def _bounded(units: Iterable[str], budget: int, count_tokens: Callable[[str], int]) -> Iterator[str]:
+    """Hard-split any single unit (an enormous sentence or row) over *budget*."""
+    for unit in units:
+        if count_tokens(unit) <= budget:
+            yield unit
+            continue
+        piece: List[str] = []
+        piece_tokens = 0
+        for word in unit.split(" "):
+            while count_tokens(word) > budget:
+                # A single "word" longer than the budget (e.g. base64 blobs)
+                if piece:
+                    yield " ".join(piece)
+                    piece, piece_tokens = [], 0
+                cut = max(1, len(word) * budget // count_tokens(word))
+                yield word[:cut]
+                word = word[cut:]
+            tokens = count_tokens(word + " ")
+            if piece and piece_tokens + tokens > budget:
+                yield " ".join(piece)
+                piece, piece_tokens = [], 0
+            piece.append(word)
+            piece_tokens += tokens
+        if piece:
+            yield " ".join(piece)
@@ -0,0 +1,201 @@
+"""
+dedup.py
+--------
+Content-addressed deduplication in front of Knowledge Base writes.
+
+Every chunk is keyed by ``sha256(user_id + document_id + normalised text)``;
+a chunk whose key was stored within the TTL is skipped instead of being
+re-ingested.  That makes redeliveries and retries of the same document
+cheap.  The document is part of the key so text shared with another
+document (boilerplate, headers, repeated CSV rows) is still written for
+each of them, leaving no holes in their ``chunk_index`` sequences.
+
+Stores are pluggable:
+
+* :py:class:`InMemoryLRUStore` – per-container, survives warm invocations.
+* :py:class:`TableDedupStore` – any DynamoDB ``Table``-like object
+  (``get_item`` / ``put_item``); :py:class:`memory_table.InMemoryTable`
+  is a local stand-in with the same interface.
+* :py:class:`TieredDedupStore` – checks the stores in order (LRU first,
+  table second) and writes through to all of them.
+
+Usage
+~~~~~
+from dedup import ContentDeduplicator, InMemoryLRUStore
+
+dedup = ContentDeduplicator(InMemoryLRUStore())
+if not dedup.is_duplicate(text, user_id, document_id):
+    saver.store_text(text)
+    dedup.remember(text, user_id, document_id)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Callable, Protocol
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for hashing: NFC, collapsed whitespace, stripped."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def content_key(text: str, user_id: str | None, document_id: str | None) -> str:
+    """Return the dedup key for *text* in *document_id* owned by *user_id*."""
+    digest = hashlib.sha256()
+    for part in (user_id, document_id):
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class DedupStore(Protocol):
+    """Minimal interface every dedup backend implements."""
+
+    def contains(self, key: str) -> bool: ...
+
+    def add(self, key: str, ttl_seconds: int) -> None: ...
+
+
+class InMemoryLRUStore:
+    """Bounded LRU of keys with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 10_000, *, clock: Callable[[], float] = time.time) -> None:
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= self._clock():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(self, key: str, ttl_seconds: int) -> None:
+        with self._lock:
+            self._entries[key] = self._clock() + ttl_seconds
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TableDedupStore:
+    """Dedup keys in a DynamoDB table with a TTL attribute.
+
+    The table needs a string partition key (``pk`` by default) and TTL
+    enabled on ``expires_at``.  Because DynamoDB deletes expired items
+    lazily, expiry is also checked on read.
+    """
+
+    def __init__(
+        self,
+        table: Any,
+        *,
+        key_attribute: str = "pk",
+        ttl_attribute: str = "expires_at",
+        prefix: str = "KBDEDUP#",
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.table = table
+        self.key_attribute = key_attribute
+        self.ttl_attribute = ttl_attribute
+        self.prefix = prefix
+        self._clock = clock
+
+    def contains(self, key: str) -> bool:
+        item = self.table.get_item(Key={self.key_attribute: self.prefix + key}).get("Item")
+        return bool(item) and int(item.get(self.ttl_attribute, 0)) > self._clock()
+
+    def add(self, key: str, ttl_seconds: int) -> None:
+        self.table.put_item(
+            Item={
+                self.key_attribute: self.prefix + key,
+                self.ttl_attribute: int(self._clock() + ttl_seconds),
+            }
+        )
+
+
+class TieredDedupStore:
+    """Check *stores* in order; write-through to all, back-filling faster tiers."""
+
+    def __init__(self, *stores: DedupStore, ttl_seconds: int = DEFAULT_TTL_SECONDS) -> None:
+        self.stores = stores
+        self.ttl_seconds = ttl_seconds
+
+    def contains(self, key: str) -> bool:
+        for i, store in enumerate(self.stores):
+            if store.contains(key):
+                for faster in self.stores[:i]:
+                    faster.add(key, self.ttl_seconds)
+                return True
+        return False
+
+    def add(self, key: str, ttl_seconds: int) -> None:
+        for store in self.stores:
+            store.add(key, ttl_seconds)
+
+
+class ContentDeduplicator:
+    """Decide whether a piece of text was already ingested into a user's document."""
+
+    def __init__(self, store: DedupStore, *, ttl_seconds: int = DEFAULT_TTL_SECONDS) -> None:
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+
+        # Container-lifetime counters, handy when debugging warm containers
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def is_duplicate(self, text: str, user_id: str | None, document_id: str | None) -> bool:
+        duplicate = self.store.contains(content_key(text, user_id, document_id))
+        with self._lock:
+            if duplicate:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return duplicate
+
+    def remember(self, text: str, user_id: str | None, document_id: str | None) -> None:
+        self.store.add(content_key(text, user_id, document_id), self.ttl_seconds)
+
+
+def build_deduplicator() -> ContentDeduplicator:
+    """
+    Build the per-container deduplicator from environment variables.
+
+    ``DEDUP_TABLE_NAME`` adds a DynamoDB tier behind the in-memory LRU;
+    ``DEDUP_TTL_SECONDS`` and ``DEDUP_CACHE_SIZE`` tune expiry and LRU size.
+    """
+    ttl_seconds = int(os.environ.get("DEDUP_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    lru = InMemoryLRUStore(int(os.environ.get("DEDUP_CACHE_SIZE", "10000")))
+
+    table_name = os.environ.get("DEDUP_TABLE_NAME")
+    if not table_name:
+        return ContentDeduplicator(lru, ttl_seconds=ttl_seconds)
+
+    import boto3
+
+    table = boto3.resource("dynamodb").Table(table_name)
+    store = TieredDedupStore(lru, TableDedupStore(table), ttl_seconds=ttl_seconds)
+    return ContentDeduplicator(store, ttl_seconds=ttl_seconds)
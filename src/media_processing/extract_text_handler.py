@@ -1,14 +1,22 @@
 import json
 import logging
 import os
-import boto3
 from agent_util import KnowledgeBaseSaver
+from dedup import build_deduplicator
+from lazy import Lazy, lazy_client
+from rate_limiter import build_rate_limiter
+from transcribe_output import RangedBody, extract_transcript, iter_segments
 
 from pathlib import Path
 from urllib.parse import urlparse, unquote_plus
 from aws_lambda_powertools import Logger, Tracer, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
 from aws_lambda_powertools.utilities.typing import LambdaContext
-s3 = boto3.client("s3")
+s3 = lazy_client("s3")
+# > 0 ingests time-aligned segments of roughly this many seconds built from
+# the transcript's ``items``; 0 ingests the plain transcript text
+TRANSCRIPT_SEGMENT_SECONDS = float(os.environ.get("TRANSCRIPT_SEGMENT_SECONDS", "0"))
+TRANSCRIPT_RANGE_BYTES = int(os.environ.get("TRANSCRIPT_RANGE_BYTES", str(256 * 1024)))
 # Initialize powertools
 logger = Logger()
 tracer = Tracer()
@@ -18,11 +26,25 @@ from urllib.parse import urlparse
 
 
 
-saver = KnowledgeBaseSaver(
-    knowledge_base_id=os.environ["STRANDS_KNOWLEDGE_BASE_ID"],
-    bypass_tool_consent=os.environ.get("BYPASS_TOOL_CONSENT", "True"),
+KNOWLEDGE_BASE_ID = os.environ["STRANDS_KNOWLEDGE_BASE_ID"]
+# KB writes are background work: they wait for Bedrock capacity behind
+# interactive callers and back off when throttled
+rate_limiter = Lazy(build_rate_limiter)
+# Built on first use, so the saver's dependencies stay out of the init phase
+saver = Lazy(
+    lambda: KnowledgeBaseSaver(
+        knowledge_base_id=KNOWLEDGE_BASE_ID,
+        bypass_tool_consent=os.environ.get("BYPASS_TOOL_CONSENT", "True"),
+        deduplicator=build_deduplicator(),
+        rate_limiter=rate_limiter,
+    )
 )
 
+
+class ChunksNotStored(RuntimeError):
+    """Some chunks failed; the state machine retries on this error name."""
+
+
 def bucket_and_key_from_s3_uri(uri: str) -> tuple[str, str]:
     """
     Return (bucket, key) from any valid S3 HTTPS URL.
@@ -46,6 +68,41 @@ def bucket_and_key_from_s3_uri(uri: str) -> tuple[str, str]:
     return bucket, key
 
 
+def store_extracted_text(event: dict) -> tuple[str, list]:
+    """Store the ``{text, bucket, key}`` payload the extract-text workflow sends after Textract."""
+    key = event["key"]
+    logger.append_keys(bucket=event.get("bucket"), key=key)
+    logger.info("Received %d extracted characters", len(event["text"]))
+    metadata = {"source": "textract-lambda", "s3_key": key, "userId": "UserID"}
+    return key, saver.store_document(event["text"], document_id=key, metadata=metadata)
+
+
+def store_transcript(uri: str) -> tuple[str, list]:
+    """Stream the Transcribe output at *uri* from S3 and store its transcript."""
+    bucket, key = bucket_and_key_from_s3_uri(uri)
+    logger.append_keys(bucket=bucket, key=key)
+
+    body = RangedBody(s3, bucket, key, range_size=TRANSCRIPT_RANGE_BYTES)
+    metadata = {"source": "textract-lambda", "s3_key": key, "userId": "UserID"}
+
+    if TRANSCRIPT_SEGMENT_SECONDS > 0:
+        # One paragraph per segment, prefixed with its time range
+        lines = (
+            line
+            for segment in iter_segments(body, max_seconds=TRANSCRIPT_SEGMENT_SECONDS)
+            for line in (segment.format(), "")
+        )
+        results = saver.store_stream(lines, document_id=key, metadata=metadata)
+    else:
+        # Stops reading once the transcript is parsed; ``items`` is never fetched
+        transcript = extract_transcript(body)
+        logger.info("Loaded %d transcript characters", len(transcript))
+        results = saver.store_document(transcript, document_id=key, metadata=metadata)
+
+    logger.info("Read %d bytes in %d range requests", body.bytes_read, body.requests)
+    return key, results
+
+
 @logger.inject_lambda_context(log_event=True)
 @tracer.capture_lambda_handler
 @metrics.log_metrics(capture_cold_start_metric=True)
@@ -57,26 +114,32 @@ def lambda_handler(event, context: LambdaContext):
         # Log the entire event for debugging
         logger.debug(f"Event received: {json.dumps(event)}")
 
-        uri = event["transcriptionFileUri"]
-        bucket, key = bucket_and_key_from_s3_uri(uri)
-        logger.append_keys(bucket=bucket, key=key)
-
-        obj  = s3.get_object(Bucket=bucket, Key=key)
-        data = json.loads(obj["Body"].read())
-
-        transcript = data['results']['transcripts'][0]['transcript']
-
-        logger.info(f"loaded data {transcript}")
+        if "text" in event:
+            key, results = store_extracted_text(event)
+        else:
+            key, results = store_transcript(event["transcriptionFileUri"])
 
-        result = saver.store_text(
-            transcript,
-            metadata={"source": "textract-lambda", "s3_key": key,"userId":"UserID"},
+        failed = [r["chunk_index"] for r in results if r["status"] == "error"]
+        skipped = sum(1 for r in results if r["status"] == "skipped")
+        stored = len(results) - len(failed) - skipped
+        metrics.add_metric(name="KBChunksStored", unit=MetricUnit.Count, value=stored)
+        metrics.add_metric(name="KBChunksSkipped", unit=MetricUnit.Count, value=skipped)
+        metrics.add_metric(
+            name="KBChunksThrottled", unit=MetricUnit.Count, value=sum(1 for r in results if r.get("throttled"))
         )
-        logger.info("Stored transcript in KB: %s", result)
+        logger.info("Stored %d/%d chunks in KB (%d unchanged)", stored, len(results), skipped)
+        if failed:
+            # Stored chunks are deduplicated on the retry, so only these are written again
+            raise ChunksNotStored(f"Failed to store chunks {failed} of {key}")
    
         
     except Exception as e:
         logger.exception(f"Error processing extracted text: {e}")
-        logger.exception("Error processing extracted text")
+        # Fail the task so the state machine's retry (or its failure) takes over
+        raise
+    finally:
+        if rate_limiter.built:
+            for name, unit, value in rate_limiter.drain_stats().metrics():
+                metrics.add_metric(name=name, unit=unit, value=value)
        
     
@@ -0,0 +1,231 @@
+"""
+idempotency.py
+--------------
+Drop duplicate deliveries across the S3 → SQS → Step Functions pipeline.
+
+S3 notifications and SQS are at-least-once, so the same upload can reach
+``upload_processor`` and ``queue_processor`` more than once.  Each upload
+gets a key derived from ``bucket + original key + ETag``; it names the
+processed copy, is carried in the SQS message and seeds the Step Functions
+execution name, so a replay maps onto the same objects and executions.
+
+Before doing any work a handler *claims* the key in an
+:py:class:`IdempotencyStore`.  A claim succeeds only if the key is unknown
+(or its previous claim expired); the holder then either ``complete``-s it
+(kept for ``ttl_seconds``) or ``release``-s it on failure so a retry can
+proceed.  A claim that is never resolved (e.g. a timed-out Lambda) lapses
+after ``lock_seconds``.
+
+``claim`` tells the three cases apart: :py:data:`CLAIMED` (go ahead),
+:py:data:`STATUS_COMPLETED` (a duplicate, drop it) and
+:py:data:`STATUS_IN_PROGRESS` (another delivery holds the key, which may
+still fail or may have crashed).  An in-progress delivery must be retried
+later, not dropped, or the work is lost if its holder never finishes.
+
+* :py:class:`InMemoryIdempotencyStore` – per-container local stand-in.
+* :py:class:`TableIdempotencyStore` – DynamoDB table with conditional puts.
+
+Usage
+~~~~~
+from idempotency import CLAIMED, STATUS_IN_PROGRESS, build_idempotency_store, idempotency_key
+
+store = build_idempotency_store("upload")
+key = idempotency_key(bucket, original_key, etag)
+state = store.claim(key)
+if state == CLAIMED:
+    try:
+        do_work()
+    except Exception:
+        store.release(key)
+        raise
+    store.complete(key)
+elif state == STATUS_IN_PROGRESS:
+    retry_later()
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Protocol, Tuple
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_LOCK_SECONDS = 15 * 60
+
+# claim() results: the key was claimed, or the status of the existing claim
+CLAIMED = "CLAIMED"
+STATUS_IN_PROGRESS = "IN_PROGRESS"
+STATUS_COMPLETED = "COMPLETED"
+
+
+class ClaimInProgress(RuntimeError):
+    """Raised so a delivery is retried while another delivery holds its key."""
+
+
+def idempotency_key(bucket: str, key: str, etag: str | None) -> str:
+    """Stable key for one version of an uploaded object."""
+    digest = hashlib.sha256()
+    for part in (bucket, key, (etag or "").strip('"')):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:32]
+
+
+def execution_name(keys: Iterable[str]) -> str:
+    """
+    Deterministic Step Functions execution name for a set of files.
+
+    A single file uses its idempotency key as-is; a batch uses a hash of its
+    sorted keys.  Either way the name fits SFN's 80-character limit.
+    """
+    keys = sorted(keys)
+    if len(keys) == 1:
+        return keys[0]
+    return "batch-" + hashlib.sha256("\0".join(keys).encode("utf-8")).hexdigest()[:32]
+
+
+class IdempotencyStore(Protocol):
+    """Minimal interface every idempotency backend implements."""
+
+    def claim(self, key: str) -> str: ...
+
+    def complete(self, key: str) -> None: ...
+
+    def release(self, key: str) -> None: ...
+
+
+class InMemoryIdempotencyStore:
+    """Claims held in a dict, for tests and as a per-container first line."""
+
+    def __init__(
+        self,
+        *,
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        lock_seconds: int = DEFAULT_LOCK_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self._clock = clock
+        self._entries: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key: str) -> str:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                return entry[0]
+            self._entries[key] = (STATUS_IN_PROGRESS, now + self.lock_seconds)
+            return CLAIMED
+
+    def complete(self, key: str) -> None:
+        with self._lock:
+            self._entries[key] = (STATUS_COMPLETED, self._clock() + self.ttl_seconds)
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def status(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] if entry and entry[1] > self._clock() else None
+
+
+class TableIdempotencyStore:
+    """Claims in a DynamoDB table, made atomic with a conditional put.
+
+    The table needs a string partition key (``pk`` by default) and TTL
+    enabled on ``expires_at``; it can be shared with
+    :py:class:`dedup.TableDedupStore` thanks to the key prefix.
+    """
+
+    def __init__(
+        self,
+        table: Any,
+        *,
+        key_attribute: str = "pk",
+        ttl_attribute: str = "expires_at",
+        prefix: str = "IDEMPOTENCY#",
+        ttl_seconds: int = DEFAULT_TTL_SECONDS,
+        lock_seconds: int = DEFAULT_LOCK_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.table = table
+        self.key_attribute = key_attribute
+        self.ttl_attribute = ttl_attribute
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self._clock = clock
+
+    def _item(self, key: str, status: str, ttl: int) -> dict:
+        return {
+            self.key_attribute: self.prefix + key,
+            self.ttl_attribute: int(self._clock() + ttl),
+            "status": status,
+        }
+
+    def claim(self, key: str) -> str:
+        try:
+            self.table.put_item(
+                Item=self._item(key, STATUS_IN_PROGRESS, self.lock_seconds),
+                # DynamoDB deletes expired items lazily, so expiry is checked here too
+                ConditionExpression="attribute_not_exists(#k) OR #t < :now",
+                ExpressionAttributeNames={"#k": self.key_attribute, "#t": self.ttl_attribute},
+                ExpressionAttributeValues={":now": int(self._clock())},
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+            return CLAIMED
+        except Exception as exc:
+            response = getattr(exc, "response", {})
+            if response.get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+                return self._held_status(key, response.get("Item"))
+            raise
+
+    def _held_status(self, key: str, item: dict | None) -> str:
+        if item is None:
+            item = self.table.get_item(
+                Key={self.key_attribute: self.prefix + key}, ConsistentRead=True
+            ).get("Item")
+        status = (item or {}).get("status")
+        if isinstance(status, dict):
+            # ALL_OLD items come back in the low-level {"S": ...} form
+            status = status.get("S")
+        # A claim released since the failed put is retried like one in progress
+        return STATUS_COMPLETED if status == STATUS_COMPLETED else STATUS_IN_PROGRESS
+
+    def complete(self, key: str) -> None:
+        self.table.put_item(Item=self._item(key, STATUS_COMPLETED, self.ttl_seconds))
+
+    def release(self, key: str) -> None:
+        self.table.delete_item(Key={self.key_attribute: self.prefix + key})
+
+
+def build_idempotency_store(scope: str) -> IdempotencyStore:
+    """
+    Build the per-container store for one pipeline stage.
+
+    *scope* (e.g. ``"upload"``) namespaces the keys, so each stage claims
+    the same upload independently.  ``IDEMPOTENCY_TABLE_NAME`` selects the
+    DynamoDB store (shared by every container); without it claims only live
+    in this container.
+    ``IDEMPOTENCY_TTL_SECONDS`` and ``IDEMPOTENCY_LOCK_SECONDS`` tune how
+    long completed and in-progress claims are kept.
+    """
+    ttl_seconds = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    lock_seconds = int(os.environ.get("IDEMPOTENCY_LOCK_SECONDS", DEFAULT_LOCK_SECONDS))
+
+    table_name = os.environ.get("IDEMPOTENCY_TABLE_NAME")
+    if not table_name:
+        return InMemoryIdempotencyStore(ttl_seconds=ttl_seconds, lock_seconds=lock_seconds)
+
+    import boto3
+
+    table = boto3.resource("dynamodb").Table(table_name)
+    return TableIdempotencyStore(
+        table, prefix=f"IDEMPOTENCY#{scope}#", ttl_seconds=ttl_seconds, lock_seconds=lock_seconds
+    )
@@ -0,0 +1,150 @@
+"""
+kb_writer.py
+------------
+Deterministic, model-free writes into a Bedrock Knowledge Base.
+
+The agent path (``Agent.tool.memory``) needs a Strands agent with a Bedrock
+model behind it even though the text is already extracted.  This writer
+builds the custom-data-source document itself and calls
+``IngestKnowledgeBaseDocuments`` directly, so no model is constructed or
+invoked.
+
+Usage
+~~~~~
+from kb_writer import DirectKnowledgeBaseWriter
+
+writer = DirectKnowledgeBaseWriter(boto3.client("bedrock-agent"), knowledge_base_id)
+writer.store("already extracted text", metadata={"userId": "u-1"})
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List
+
+
+def _attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        typed = {"type": "BOOLEAN", "booleanValue": value}
+    elif isinstance(value, (int, float)):
+        typed = {"type": "NUMBER", "numberValue": value}
+    elif isinstance(value, (list, tuple)):
+        typed = {"type": "STRING_LIST", "stringListValue": [str(v) for v in value]}
+    else:
+        typed = {"type": "STRING", "stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def record_id(text: str, metadata: Dict[str, Any] | None = None) -> str:
+    """
+    Stable identifier for a record.
+
+    Chunks of a known document use ``<document_id>-<chunk_index>`` so a
+    re-ingest overwrites the previous version; anything else is addressed
+    by the hash of its content and metadata.
+    """
+    metadata = metadata or {}
+    if "document_id" in metadata and "chunk_index" in metadata:
+        return f"{metadata['document_id']}-{metadata['chunk_index']}"
+    digest = hashlib.sha256(text.encode("utf-8"))
+    digest.update(json.dumps(metadata, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_document(text: str, metadata: Dict[str, Any] | None = None) -> dict:
+    """Build the ``documents[]`` entry for a custom data source."""
+    document: dict = {
+        "content": {
+            "dataSourceType": "CUSTOM",
+            "custom": {
+                "customDocumentIdentifier": {"id": record_id(text, metadata)},
+                "sourceType": "IN_LINE",
+                "inlineContent": {
+                    "type": "TEXT",
+                    "textContent": {"data": text},
+                },
+            },
+        }
+    }
+    if metadata:
+        document["metadata"] = {
+            "type": "IN_LINE_ATTRIBUTE",
+            "inlineAttributes": [_attribute(k, v) for k, v in metadata.items()],
+        }
+    return document
+
+
+class DirectKnowledgeBaseWriter:
+    """Write records straight to the KB's custom data source."""
+
+    def __init__(
+        self,
+        client: Any,
+        knowledge_base_id: str,
+        *,
+        data_source_id: str | None = None,
+    ) -> None:
+        self.client = client
+        self.knowledge_base_id = knowledge_base_id
+        self._data_source_id = data_source_id
+        self._lock = threading.Lock()
+
+    @property
+    def data_source_id(self) -> str:
+        """The KB's custom data source, looked up once per container."""
+        with self._lock:
+            if self._data_source_id is None:
+                self._data_source_id = self._find_custom_data_source()
+            return self._data_source_id
+
+    def _find_custom_data_source(self) -> str:
+        # IngestKnowledgeBaseDocuments only accepts CUSTOM data sources, and
+        # the summaries ListDataSources returns do not say which type each is
+        kwargs: Dict[str, Any] = {"knowledgeBaseId": self.knowledge_base_id, "maxResults": 10}
+        types: List[str] = []
+        while True:
+            response = self.client.list_data_sources(**kwargs)
+            summaries: List[dict] = response.get("dataSourceSummaries", [])
+            for summary in summaries:
+                detail = self.client.get_data_source(
+                    knowledgeBaseId=self.knowledge_base_id,
+                    dataSourceId=summary["dataSourceId"],
+                )
+                source_type = detail["dataSource"]["dataSourceConfiguration"]["type"]
+                if source_type == "CUSTOM":
+                    return summary["dataSourceId"]
+                types.append(source_type)
+            if not response.get("nextToken"):
+                break
+            kwargs["nextToken"] = response["nextToken"]
+        raise ValueError(
+            f"Knowledge base {self.knowledge_base_id} has no CUSTOM data source "
+            f"to ingest documents into (found: {', '.join(types) or 'none'})"
+        )
+
+    def store(self, text: str, *, metadata: Dict[str, Any] | None = None) -> dict:
+        """
+        Ingest *text* as a single document.
+
+        Returns
+        -------
+        dict
+            ``status``, the ``document_id`` used and the raw ``documentDetails``.
+        """
+        document = build_document(text, metadata)
+        response = self.client.ingest_knowledge_base_documents(
+            knowledgeBaseId=self.knowledge_base_id,
+            dataSourceId=self.data_source_id,
+            documents=[document],
+        )
+        details = response.get("documentDetails", [])
+        failed = [d for d in details if d.get("status") == "FAILED"]
+        if failed:
+            raise RuntimeError(failed[0].get("statusReason", "Document ingestion failed"))
+        return {
+            "status": "success",
+            "document_id": document["content"]["custom"]["customDocumentIdentifier"]["id"],
+            "documentDetails": details,
+        }
@@ -0,0 +1,229 @@
+"""
+local_extract.py
+----------------
+Extract text from born-digital documents inside the Lambda, without Textract.
+
+``.txt`` files are decoded and ``.docx`` files are read from their
+``word/document.xml``.  A PDF is extracted with ``pypdf`` only if it has a
+text layer: the first pages are sampled, and the document is handed back
+(``None``) when they, or too many pages overall, carry no text – a scanned
+PDF still needs the extract-text workflow and its OCR.
+
+Large PDFs are split into page ranges extracted in parallel child
+processes.  ``concurrent.futures.ProcessPoolExecutor`` needs ``/dev/shm``,
+which Lambda does not provide, so the workers are plain
+``multiprocessing.Process`` objects that return their text through a
+``Pipe``.  The PDF is written once to a temporary file (``/tmp`` in
+Lambda) and each worker opens it and reads only the objects of its page
+range, so the document is not copied into every worker.  They are started from a ``forkserver`` with ``pypdf`` preloaded
+(``LOCAL_EXTRACT_START_METHOD``) because the handler calls this from worker
+threads, and forking a multi-threaded process can deadlock the child.
+
+Usage
+~~~~~
+from local_extract import can_extract_locally, extract_text
+
+if can_extract_locally(extension):
+    extraction = extract_text(body_bytes, extension)
+    if extraction is None:
+        ...  # scanned: start the extract-text workflow
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from typing import List, Tuple
+from xml.etree import ElementTree
+
+logger = logging.getLogger(__name__)
+
+LOCAL_EXTENSIONS = (".pdf", ".txt", ".docx")
+
+# A page with fewer non-whitespace characters is treated as an image
+MIN_CHARS_PER_PAGE = 20
+# Share of pages that must have text for the whole PDF to be extracted locally
+MIN_TEXT_PAGE_RATIO = 0.8
+# Pages checked before committing to a full extraction
+SAMPLE_PAGES = 3
+# Smaller PDFs are not worth forking for
+PARALLEL_MIN_PAGES = 16
+# "forkserver" (default), "fork" or "spawn"
+START_METHOD = os.environ.get("LOCAL_EXTRACT_START_METHOD", "forkserver")
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+@dataclass
+class Extraction:
+    """Text of one document and how it was obtained."""
+
+    text: str
+    method: str
+    pages: int = 1
+
+
+def can_extract_locally(extension: str) -> bool:
+    return extension.lower() in LOCAL_EXTENSIONS
+
+
+def extract_text(
+    data: bytes,
+    extension: str,
+    *,
+    workers: int | None = None,
+    min_chars_per_page: int = MIN_CHARS_PER_PAGE,
+    min_text_page_ratio: float = MIN_TEXT_PAGE_RATIO,
+) -> Extraction | None:
+    """
+    Return the text of *data*, or ``None`` if the document needs OCR.
+
+    Parameters
+    ----------
+    data : bytes
+        The whole object body.
+    extension : str
+        One of :py:data:`LOCAL_EXTENSIONS` (case-insensitive).
+    workers : int, optional
+        Processes used for large PDFs; defaults to the CPU count, ``1``
+        extracts in this process.
+
+    Raises
+    ------
+    ValueError
+        If *extension* cannot be extracted locally.  Corrupt files raise
+        whatever their parser raises.
+    """
+    extension = extension.lower()
+    if extension == ".txt":
+        return Extraction(read_txt(data), "txt")
+    if extension == ".docx":
+        return Extraction(read_docx(data), "docx")
+    if extension == ".pdf":
+        return _extract_pdf(data, workers, min_chars_per_page, min_text_page_ratio)
+    raise ValueError(f"Cannot extract {extension} files locally")
+
+
+def read_txt(data: bytes) -> str:
+    """Decode a text file: UTF-8 (with or without BOM), else Windows-1252."""
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return data.decode("cp1252", errors="replace")
+
+
+def read_docx(data: bytes) -> str:
+    """Paragraph text of a ``.docx``, one paragraph per line."""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+
+    paragraphs = []
+    for paragraph in root.iter(f"{_W}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_W}t":
+                parts.append(node.text or "")
+            elif node.tag == f"{_W}tab":
+                parts.append("\t")
+            elif node.tag in (f"{_W}br", f"{_W}cr"):
+                parts.append("\n")
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs).strip()
+
+
+def has_text(page_text: str, min_chars: int = MIN_CHARS_PER_PAGE) -> bool:
+    return len("".join(page_text.split())) >= min_chars
+
+
+def _extract_pdf(
+    data: bytes, workers: int | None, min_chars: int, min_ratio: float
+) -> Extraction | None:
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+    if page_count == 0:
+        return None
+
+    # Cheap rejection of scanned documents before extracting every page
+    sample = [reader.pages[i].extract_text() or "" for i in range(min(SAMPLE_PAGES, page_count))]
+    if not any(has_text(text, min_chars) for text in sample):
+        return None
+
+    workers = workers or os.cpu_count() or 1
+    rest = range(len(sample), page_count)
+    if workers > 1 and page_count >= PARALLEL_MIN_PAGES:
+        texts = sample + extract_pages_parallel(data, rest.start, rest.stop, workers)
+    else:
+        texts = sample + [reader.pages[i].extract_text() or "" for i in rest]
+
+    with_text = sum(has_text(text, min_chars) for text in texts)
+    if with_text / page_count < min_ratio:
+        logger.info("Only %d of %d PDF pages have text – needs OCR", with_text, page_count)
+        return None
+    return Extraction("\n\n".join(texts).strip(), "pdf", page_count)
+
+
+def extract_pages_parallel(data: bytes, start: int, stop: int, workers: int) -> List[str]:
+    """Text of pages ``[start, stop)``, split into contiguous ranges across *workers* processes."""
+    count = stop - start
+    if count <= 0:
+        return []
+    workers = min(workers, count)
+    step = -(-count // workers)
+    ranges = [(s, min(s + step, stop)) for s in range(start, stop, step)]
+
+    # Workers read the PDF from disk; sending the bytes through every Pipe
+    # would hold one extra copy of the document per worker
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as pdf:
+        pdf.write(data)
+        pdf.flush()
+        return _run_page_workers(pdf.name, ranges)
+
+
+def _run_page_workers(path: str, ranges: List[Tuple[int, int]]) -> List[str]:
+    context = multiprocessing.get_context(START_METHOD)
+    if START_METHOD == "forkserver":
+        # Only takes effect when the server starts, i.e. on first use per container
+        context.set_forkserver_preload(["pypdf", __name__])
+    jobs: List[Tuple[multiprocessing.Process, object]] = []
+    texts: List[str] = []
+    try:
+        for first, last in ranges:
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_page_worker, args=(sender, path, first, last), daemon=True)
+            process.start()
+            sender.close()
+            jobs.append((process, receiver))
+
+        for process, receiver in jobs:
+            ok, payload = receiver.recv()
+            if not ok:
+                raise RuntimeError(f"PDF page extraction failed: {payload}")
+            texts.extend(payload)
+    finally:
+        for process, receiver in jobs:
+            receiver.close()
+            process.join(timeout=1)
+            if process.is_alive():
+                process.kill()
+    return texts
+
+
+def _page_worker(sender, path: str, first: int, last: int) -> None:
+    try:
+        from pypdf import PdfReader
+
+        # An open file, not the path: given a path, pypdf reads the whole file into memory
+        with open(path, "rb") as pdf:
+            reader = PdfReader(pdf)
+            sender.send((True, [reader.pages[i].extract_text() or "" for i in range(first, last)]))
+    except Exception as exc:  # reported to the parent instead of a silent exit
+        sender.send((False, repr(exc)))
+    finally:
+        sender.close()
@@ -0,0 +1,65 @@
+"""
+memory_table.py
+---------------
+Local stand-in for a boto3 DynamoDB ``Table``.
+
+The table-backed stores (:py:class:`dedup.TableDedupStore`,
+:py:class:`response_cache.TableResponseStore`,
+:py:class:`rate_limiter.TableBucketBackend`) accept any object with the
+``Table`` methods they call.  :py:class:`InMemoryTable` implements those
+methods on a dict, for tests, benchmarks and local runs without DynamoDB.
+
+Conditional puts understand only the condition ``TableBucketBackend``
+writes: the put succeeds if the item is new or its ``version`` equals
+``:version``.  A failed condition raises :py:class:`ConditionalCheckFailed`,
+which carries the same error code as botocore's ``ClientError``.
+
+Usage
+~~~~~
+from memory_table import InMemoryTable
+
+store = TableDedupStore(InMemoryTable())
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict
+
+
+class ConditionalCheckFailed(Exception):
+    """What :py:class:`InMemoryTable` raises instead of botocore's ``ClientError``."""
+
+    response = {"Error": {"Code": "ConditionalCheckFailedException"}}
+
+
+class InMemoryTable:
+    """Items in a dict, keyed by ``key_attribute``; safe to share between threads."""
+
+    def __init__(self, key_attribute: str = "pk") -> None:
+        self.key_attribute = key_attribute
+        self.items: Dict[Any, dict] = {}
+        # Conditional puts rejected so far
+        self.conflicts = 0
+        self._lock = threading.Lock()
+
+    def get_item(self, Key: dict, **_: Any) -> dict:
+        with self._lock:
+            item = self.items.get(Key[self.key_attribute])
+        return {"Item": dict(item)} if item else {}
+
+    def put_item(self, Item: dict, ConditionExpression: str | None = None, **kwargs: Any) -> dict:
+        with self._lock:
+            current = self.items.get(Item[self.key_attribute])
+            if ConditionExpression and current is not None:
+                expected = kwargs.get("ExpressionAttributeValues", {}).get(":version")
+                if current.get("version") != expected:
+                    self.conflicts += 1
+                    raise ConditionalCheckFailed()
+            self.items[Item[self.key_attribute]] = dict(Item)
+        return {}
+
+    def delete_item(self, Key: dict, **_: Any) -> dict:
+        with self._lock:
+            self.items.pop(Key[self.key_attribute], None)
+        return {}
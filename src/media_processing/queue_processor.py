@@ -1,9 +1,19 @@
-import json
 import os
-import boto3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from agent_util import KnowledgeBaseSaver
+from chunking import iter_decoded_lines
+from dedup import build_deduplicator
+from idempotency import CLAIMED, STATUS_COMPLETED, STATUS_IN_PROGRESS, build_idempotency_store, execution_name
+from lazy import Lazy, lazy_client
+from local_extract import can_extract_locally, extract_text
+from rate_limiter import build_rate_limiter
+from routing import ROUTE_EXTRACT_TEXT, ROUTE_KB, ROUTE_TRANSCRIBE, RoutingTable
+from upload_message import UploadMessage, dumps
 from aws_lambda_powertools import Logger, Tracer, Metrics
+from aws_lambda_powertools.metrics import MetricUnit
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
 # Initialize powertools
@@ -11,134 +21,343 @@ logger = Logger()
 tracer = Tracer()
 metrics = Metrics()
 
-# Initialize AWS clients
-s3_client = boto3.client('s3')
-sfn_client = boto3.client('stepfunctions')
+# AWS clients and the KB saver are built on first use: a batch that only
+# starts workflows never builds the saver, and none of them slow the init
+s3_client = lazy_client('s3')
+sfn_client = lazy_client('stepfunctions')
 
-saver = KnowledgeBaseSaver(
-    knowledge_base_id=os.environ["STRANDS_KNOWLEDGE_BASE_ID"],
-    bypass_tool_consent=os.environ.get("BYPASS_TOOL_CONSENT", "True"),
+KNOWLEDGE_BASE_ID = os.environ["STRANDS_KNOWLEDGE_BASE_ID"]
+# KB writes are background work: they wait for Bedrock capacity behind
+# interactive callers and back off when throttled
+rate_limiter = Lazy(build_rate_limiter)
+saver = Lazy(
+    lambda: KnowledgeBaseSaver(
+        knowledge_base_id=KNOWLEDGE_BASE_ID,
+        bypass_tool_consent=os.environ.get("BYPASS_TOOL_CONSENT", "True"),
+        deduplicator=build_deduplicator(),
+        rate_limiter=rate_limiter,
+    )
 )
 
+# Records of one SQS batch are processed concurrently, bounded by this limit
+MAX_CONCURRENT_RECORDS = int(os.environ.get("MAX_CONCURRENT_RECORDS", "5"))
+
+# Extension / MIME type → route, overridable with the ROUTING_TABLE env var
+routes = RoutingTable.from_env()
+
+# Routes served by a state machine, and the env var holding its ARN
+STATE_MACHINE_ENV = {
+    ROUTE_EXTRACT_TEXT: "EXTRACT_TEXT_STATE_MACHINE_ARN",
+    ROUTE_TRANSCRIBE: "TRANSCRIBE_MEDIA_STATE_MACHINE_ARN",
+}
+
+# Files bound for the same state machine share one execution (a Map over
+# ``files``); larger groups are split into several executions
+MAX_FILES_PER_EXECUTION = int(os.environ.get("MAX_FILES_PER_EXECUTION", "40"))
+
+# Born-digital .pdf/.txt/.docx files up to this size are extracted in this
+# Lambda instead of by the extract-text workflow; 0 disables the fast path
+LOCAL_EXTRACT_MAX_BYTES = int(os.environ.get("LOCAL_EXTRACT_MAX_BYTES", str(20 * 1024 * 1024)))
+# Processes per large PDF; defaults to the vCPUs the Lambda's memory size buys
+LOCAL_EXTRACT_WORKERS = int(os.environ.get("LOCAL_EXTRACT_WORKERS", "0")) or None
+
+# Claims each message's idempotency key so SQS redeliveries are dropped
+idempotency = Lazy(lambda: build_idempotency_store("queue"))
+
+# Powertools Metrics is not thread-safe; worker threads go through this lock
+_metrics_lock = threading.Lock()
+
+
+def _add_metric(name: str, unit: MetricUnit, value: float) -> None:
+    with _metrics_lock:
+        metrics.add_metric(name=name, unit=unit, value=value)
+
+
 @logger.inject_lambda_context(log_event=True)
 @tracer.capture_lambda_handler
 @metrics.log_metrics(capture_cold_start_metric=True)
 def lambda_handler(event, context: LambdaContext):
     """
     Lambda function to process SQS messages containing S3 file upload events.
-    This function will invoke the appropriate Step Functions workflow based on the file extension.
+
+    Each message is routed through :py:data:`routes`.  ``.md``/``.csv`` files
+    are written to the Knowledge Base directly; files bound for a state
+    machine are grouped so the whole batch starts one execution per state
+    machine, with input ``{"files": [...]}``.  Born-digital ``.pdf``/``.txt``/
+    ``.docx`` files are extracted here and written to the Knowledge Base;
+    only scanned files (and any the fast path cannot read) are left to the
+    extract-text state machine.  Work items run concurrently
+    (up to ``MAX_CONCURRENT_RECORDS``) and only the records of a failed work
+    item are reported back for redelivery.
+
+    Each body is parsed once into an :py:class:`UploadMessage` (current or
+    legacy format).  Messages carrying an ``idempotency_key`` that is already
+    completed are dropped as duplicates; ones whose key another delivery
+    still holds are reported as failures so SQS retries them.  Executions
+    are named after their files' keys.
     
     Args:
         event: The SQS event containing S3 file upload information
         context: Lambda context
         
     Returns:
-        A response object with the status and message
+        A partial batch response: ``{"batchItemFailures": [{"itemIdentifier": ...}]}``
     """
     logger.info("Processing SQS messages")
-    
+    records = event['Records']
+    received = time.perf_counter()
+
     # Get the state machine ARNs from environment variables
-    extract_text_state_machine_arn = os.environ.get('EXTRACT_TEXT_STATE_MACHINE_ARN')
-    transcribe_media_state_machine_arn = os.environ.get('TRANSCRIBE_MEDIA_STATE_MACHINE_ARN')
+    state_machines = {route: os.environ.get(name) for route, name in STATE_MACHINE_ENV.items()}
+    for route, name in STATE_MACHINE_ENV.items():
+        if not state_machines[route]:
+            logger.error(f"{name} environment variable is not set")
+            return _batch_response(records)
 
-    
-    if not extract_text_state_machine_arn:
-        logger.error("EXTRACT_TEXT_STATE_MACHINE_ARN environment variable is not set")
-        return 
-        
-    if not transcribe_media_state_machine_arn:
-        logger.error("TRANSCRIBE_MEDIA_STATE_MACHINE_ARN environment variable is not set")
-        return 
-    
-    # Process each record in the SQS event
-    for record in event['Records']:
+    failed = []
+    work = []  # (records covered, idempotency keys, callable)
+    groups = {}  # state machine ARN → [(record, idempotency key, workflow input)]
+    local = []  # (record, idempotency key, message) tried with local extraction first
+    duplicates = 0
+    in_progress = 0
+    for record in records:
         try:
-            # Parse the SQS message body
-            message_body = json.loads(record['body'])
-            logger.debug(f"Processing message: {json.dumps(message_body)}")
-            
-            # Extract file information from the message
-            bucket_name = message_body.get('bucket')
-            object_key = message_body.get('key')
-            extension = message_body.get('extension', '').lower()
-            
-            if not bucket_name or not object_key:
-                logger.warning("Missing bucket or key in message")
-                continue
-            
-            if extension in ['.md', '.csv']:
-                try:
-                    obj = s3_client.get_object(Bucket=bucket_name, Key=object_key)
-                    body = obj['Body'].read().decode("utf-8", errors="replace")
-
-                     # Log the entire file or trim if huge
-                    logger.info(
-                        f"🔹 {object_key} content (first 4 KB shown):\n"
-                        f"{body[:4096]}"
-                    )
-
-                    result = saver.store_text(
-                        body,
-                        metadata={"source": "textract-lambda", "s3_key": object_key,"userId":"UserID"},
-                    )
-                    logger.info("Stored transcript in KB: %s", result)
-            
-
-                   
-                except Exception as e:
-                    logger.exception(
-                        f"Failed to read {object_key} from s3://{bucket_name}: {e}"
-                    )
-                # Skip Step Functions for .md / .csv
-                continue
+            message = UploadMessage.decode(record['body'])
+        except ValueError:
+            logger.exception(f"Malformed SQS message {record.get('messageId')}")
+            failed.append(record)
+            continue
+        route = route_message(message)
+        if route is None:
+            continue
+        key = message.idempotency_key
+        state = idempotency.claim(key) if key else CLAIMED
+        if state == STATUS_COMPLETED:
+            logger.info(f"Duplicate delivery of {message.key} ({key}) – dropping")
+            duplicates += 1
+            continue
+        if state == STATUS_IN_PROGRESS:
+            # The holder may still fail or may have crashed: have SQS retry it
+            logger.info(f"{message.key} ({key}) is already in progress – retrying later")
+            in_progress += 1
+            failed.append(record)
+            continue
+        keys = [key] if key else []
+        if route == ROUTE_KB:
+            work.append(([record], keys, lambda message=message: store_in_kb(message)))
+        elif route == ROUTE_EXTRACT_TEXT and LOCAL_EXTRACT_MAX_BYTES and can_extract_locally(message.extension):
+            local.append((record, key, message))
+        else:
+            groups.setdefault(state_machines[route], []).append((record, key, workflow_input(message)))
 
-            if extension in ['.pdf', '.png','.md','.csv', '.jpg', '.jpeg', '.tiff', '.tif', '.doc', '.docx', '.txt']:
-
-             
-                # Invoke the extract text workflow for document files
-                logger.info(f"Invoking extract text workflow for {object_key}")
-
-                filename = os.path.basename(object_key)
-                
-                # Prepare input for the Step Functions workflow
-                workflow_input = {
-                    'bucket_name': bucket_name,
-                    'object_key': object_key,
-                    'filename': filename,
-                    'file_extension': extension
-                }
-                
-                # Start the Step Functions execution
-                response = sfn_client.start_execution(
-                    stateMachineArn=extract_text_state_machine_arn,
-                    input=json.dumps(workflow_input)
-                )
-                
-                logger.info(f"Started extract text workflow execution: {response['executionArn']}")
-                
-            elif extension in ['.mp4', '.mov', '.avi','.mkv']:
-                # Invoke the transcribe media workflow for video files
-                logger.info(f"Invoking transcribe media workflow for {object_key}")
-
-                filename = os.path.basename(object_key)
-                
-                # Prepare input for the Step Functions workflow
-                workflow_input = {
-                    'bucket_name': bucket_name,
-                    'filename': filename,
-                    'object_key': object_key,
-                    'file_extension': extension
-                }
-                
-                # Start the Step Functions execution
-                response = sfn_client.start_execution(
-                    stateMachineArn=transcribe_media_state_machine_arn,
-                    input=json.dumps(workflow_input)
+    if local:
+        # Runs before the workflows are grouped, so fallbacks share their executions
+        workers = max(1, min(MAX_CONCURRENT_RECORDS, len(local)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(lambda item: _try_local_extraction(item[2]), local))
+        for (record, key, message), outcome in zip(local, outcomes):
+            if outcome is None:
+                groups.setdefault(state_machines[ROUTE_EXTRACT_TEXT], []).append(
+                    (record, key, workflow_input(message))
                 )
-                
-                logger.info(f"Started transcribe media workflow execution: {response['executionArn']}")
+                continue
+            if outcome:
+                if key:
+                    idempotency.complete(key)
             else:
-                logger.warning(f"Unsupported file type: {extension} for {object_key}")
-                
+                if key:
+                    idempotency.release(key)
+                failed.append(record)
+            _add_metric("RecordProcessingLatency", MetricUnit.Milliseconds, (time.perf_counter() - received) * 1000)
+
+    for arn, items in groups.items():
+        for start in range(0, len(items), MAX_FILES_PER_EXECUTION):
+            batch = items[start : start + MAX_FILES_PER_EXECUTION]
+            keys = [key for _, key, _ in batch if key]
+            files = [file for _, _, file in batch]
+            # Only name the execution when every file has a key; a partial
+            # name could collide with a different set of files
+            name = execution_name(keys) if len(keys) == len(batch) else None
+            work.append(
+                (
+                    [r for r, _, _ in batch],
+                    keys,
+                    lambda arn=arn, files=files, name=name: start_workflow(arn, files, name=name),
+                )
+            )
+
+    def run(item):
+        covered, keys, action = item
+        try:
+            action()
+            for key in keys:
+                idempotency.complete(key)
+            return []
         except Exception as e:
-            logger.exception(f"Error processing SQS message: {str(e)}")
+            for key in keys:
+                idempotency.release(key)
+            ids = [r.get('messageId') for r in covered]
+            logger.exception(f"Error processing SQS messages {ids}: {str(e)}")
+            return covered
+        finally:
+            # Time from the batch arriving until these records were handed off
+            elapsed = (time.perf_counter() - received) * 1000
+            for _ in covered:
+                _add_metric("RecordProcessingLatency", MetricUnit.Milliseconds, elapsed)
+
+    if work:
+        workers = max(1, min(MAX_CONCURRENT_RECORDS, len(work)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for records_failed in pool.map(run, work):
+                failed.extend(records_failed)
+
+    _add_metric("RecordsFailed", MetricUnit.Count, len(failed))
+    _add_metric("DuplicateRecordsDropped", MetricUnit.Count, duplicates)
+    _add_metric("InProgressRecordsRetried", MetricUnit.Count, in_progress)
+    if rate_limiter.built:
+        for name, unit, value in rate_limiter.drain_stats().metrics():
+            _add_metric(name, unit, value)
+    return _batch_response(failed)
+
+
+def _batch_response(failed_records) -> dict:
+    return {"batchItemFailures": [{"itemIdentifier": r["messageId"]} for r in failed_records]}
+
+
+def route_message(message: UploadMessage) -> str | None:
+    """
+    Return the route for an upload message, or ``None`` if it should be dropped.
+
+    Malformed and unsupported messages are logged and dropped rather than
+    redelivered, since a retry can never succeed.
+    """
+    # Formatted only when debug logging is on
+    logger.debug("Processing message: %s", message)
+    if not message.bucket or not message.key:
+        logger.warning("Missing bucket or key in message")
+        return None
+    route = routes.route(message.extension, content_type=message.content_type)
+    if route is None:
+        logger.warning(f"Unsupported file type: {message.extension} for {message.key}")
+    return route
+
+
+def workflow_input(message: UploadMessage) -> dict:
+    """One entry of a state machine's ``files`` array."""
+    object_key = message.key
+    return {
+        'bucket_name': message.bucket,
+        'object_key': object_key,
+        'filename': os.path.basename(object_key),
+        'file_extension': message.extension.lower(),
+    }
+
+
+def start_workflow(state_machine_arn: str, files: list, *, name: str | None = None) -> None:
+    """
+    Start one execution that processes every entry of *files* in a Map state.
+
+    With a deterministic *name*, replaying the same files is a no-op:
+    Step Functions returns the existing execution for identical input and
+    raises ``ExecutionAlreadyExists`` otherwise, which is treated as done.
+    """
+    kwargs = {'name': name} if name else {}
+    try:
+        response = sfn_client.start_execution(
+            stateMachineArn=state_machine_arn,
+            input=dumps({'files': files}),
+            **kwargs,
+        )
+    except Exception as e:
+        code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+        if code != 'ExecutionAlreadyExists':
+            raise
+        logger.info(f"Execution {name} already exists – not starting it again")
+        return
+    _add_metric("WorkflowExecutionsStarted", MetricUnit.Count, 1)
+    logger.info(f"Started {state_machine_arn} for {len(files)} file(s): {response['executionArn']}")
+
+
+def _try_local_extraction(message: UploadMessage) -> bool | None:
+    """``True`` if stored, ``False`` if storing failed, ``None`` to use the workflow."""
+    try:
+        return extract_and_store(message)
+    except Exception:
+        logger.exception(f"Failed to store locally extracted text of {message.key}")
+        return False
+
+
+def extract_and_store(message: UploadMessage) -> bool | None:
+    """
+    Extract a born-digital document here and write it to the Knowledge Base.
+
+    Returns ``None`` – nothing stored – when the file must go through the
+    extract-text workflow instead: it is too large, scanned, or unreadable.
+    Raises if the extracted text could not be stored.
+    """
+    bucket_name, object_key = message.bucket, message.key
+    extension = message.extension.lower()
+    started = time.perf_counter()
+    try:
+        head = s3_client.head_object(Bucket=bucket_name, Key=object_key)
+        if head['ContentLength'] > LOCAL_EXTRACT_MAX_BYTES:
+            logger.info(f"{object_key} is {head['ContentLength']} bytes – using the workflow")
+            return None
+        data = s3_client.get_object(Bucket=bucket_name, Key=object_key)['Body'].read()
+        extraction = extract_text(data, extension, workers=LOCAL_EXTRACT_WORKERS)
+    except Exception:
+        logger.exception(f"Local extraction of {object_key} failed – using the workflow")
+        extraction = None
+    if extraction is None:
+        _add_metric("LocalExtractionFallbacks", MetricUnit.Count, 1)
+        return None
+
+    extracted = time.perf_counter()
+    _add_metric("LocalExtractionLatency", MetricUnit.Milliseconds, (extracted - started) * 1000)
+    _add_metric("LocalExtractionPages", MetricUnit.Count, extraction.pages)
+    logger.info(
+        f"Extracted {len(extraction.text)} characters from {extraction.pages} page(s) of "
+        f"{object_key} ({extraction.method}) in {(extracted - started) * 1000:.0f} ms"
+    )
+    if not extraction.text:
+        return True
+
+    results = saver.store_document(
+        extraction.text,
+        document_id=message.document_id or object_key,
+        metadata={"source": "local-extract", "s3_key": object_key, "userId": "UserID"},
+    )
+    failed = [r["chunk_index"] for r in results if r["status"] == "error"]
+    skipped = sum(1 for r in results if r["status"] == "skipped")
+    _add_metric("KBChunksStored", MetricUnit.Count, len(results) - len(failed) - skipped)
+    _add_metric("KBChunksSkipped", MetricUnit.Count, skipped)
+    _add_metric("KBChunksThrottled", MetricUnit.Count, sum(1 for r in results if r.get("throttled")))
+    if failed:
+        raise RuntimeError(f"Failed to store chunks {failed} of {object_key}")
+    return True
+
+
+def store_in_kb(message: UploadMessage) -> None:
+    """Stream a ``.md``/``.csv`` object into the Knowledge Base; raises on failure."""
+    bucket_name, object_key = message.bucket, message.key
+    extension = message.extension.lower()
+    obj = s3_client.get_object(Bucket=bucket_name, Key=object_key)
+    logger.info(f"🔹 Streaming {object_key} ({obj.get('ContentLength', 'unknown')} bytes) into KB")
+
+    # Read, chunk and store incrementally so memory stays flat for huge files
+    results = saver.store_stream(
+        iter_decoded_lines(obj['Body']),
+        document_id=message.document_id,
+        kind="csv" if extension == '.csv' or message.content_type == 'text/csv' else "text",
+        metadata={"source": "textract-lambda", "s3_key": object_key,"userId":"UserID"},
+    )
+    failed = [r["chunk_index"] for r in results if r["status"] == "error"]
+    skipped = sum(1 for r in results if r["status"] == "skipped")
+    stored = len(results) - len(failed) - skipped
+    _add_metric("KBChunksStored", MetricUnit.Count, stored)
+    _add_metric("KBChunksSkipped", MetricUnit.Count, skipped)
+    _add_metric("KBChunksThrottled", MetricUnit.Count, sum(1 for r in results if r.get("throttled")))
+    logger.info(f"Stored {stored}/{len(results)} chunks of {object_key} in KB ({skipped} unchanged)")
+    if failed:
+        # Stored chunks are deduplicated on redelivery, so only these are retried
+        raise RuntimeError(f"Failed to store chunks {failed} of {object_key}")
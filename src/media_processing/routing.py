@@ -0,0 +1,112 @@
+"""
+routing.py
+----------
+Declarative routing of uploaded files to their processing path.
+
+Every file goes to exactly one route:
+
+* ``kb`` – read from S3 and written straight to the Knowledge Base.
+* ``extract_text`` – the Textract extract-text state machine.
+* ``transcribe`` – the Transcribe media state machine.
+
+Lookups are a dict hit on the (lower-cased) extension, falling back to the
+object's MIME type (exact, then ``type/*``).  The built-in table can be
+extended or overridden with ``ROUTING_TABLE``, a JSON object such as::
+
+    {"extensions": {".rtf": "extract_text", ".txt": null},
+     "mime_types": {"audio/*": "transcribe"}}
+
+where ``null`` removes a built-in entry.
+
+Usage
+~~~~~
+from routing import RoutingTable
+
+routes = RoutingTable.from_env()
+routes.route(".pdf")                      # "extract_text"
+routes.route("", content_type="video/webm")  # "transcribe"
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Dict, Mapping
+
+ROUTE_KB = "kb"
+ROUTE_EXTRACT_TEXT = "extract_text"
+ROUTE_TRANSCRIBE = "transcribe"
+ROUTES = (ROUTE_KB, ROUTE_EXTRACT_TEXT, ROUTE_TRANSCRIBE)
+
+DEFAULT_EXTENSION_ROUTES: Dict[str, str] = {
+    ".md": ROUTE_KB,
+    ".csv": ROUTE_KB,
+    **{
+        ext: ROUTE_EXTRACT_TEXT
+        for ext in (".pdf", ".png", ".jpg", ".jpeg", ".tiff", ".tif", ".doc", ".docx", ".txt")
+    },
+    **{ext: ROUTE_TRANSCRIBE for ext in (".mp4", ".mov", ".avi", ".mkv")},
+}
+
+DEFAULT_MIME_ROUTES: Dict[str, str] = {
+    "text/markdown": ROUTE_KB,
+    "text/csv": ROUTE_KB,
+    "application/pdf": ROUTE_EXTRACT_TEXT,
+    "image/*": ROUTE_EXTRACT_TEXT,
+    "video/*": ROUTE_TRANSCRIBE,
+}
+
+
+class RoutingTable:
+    """Map an extension or MIME type to one of :py:data:`ROUTES`."""
+
+    def __init__(
+        self,
+        extensions: Mapping[str, str] | None = None,
+        mime_types: Mapping[str, str] | None = None,
+    ) -> None:
+        self.extensions = {
+            _extension(k): v for k, v in (DEFAULT_EXTENSION_ROUTES if extensions is None else extensions).items()
+        }
+        self.mime_types = {
+            k.lower(): v for k, v in (DEFAULT_MIME_ROUTES if mime_types is None else mime_types).items()
+        }
+        unknown = {v for v in (*self.extensions.values(), *self.mime_types.values()) if v not in ROUTES}
+        if unknown:
+            raise ValueError(f"Unknown route(s) {sorted(unknown)}; expected one of {ROUTES}")
+
+    @classmethod
+    def from_json(cls, config: str) -> "RoutingTable":
+        """Built-in routes with the overrides from a ``ROUTING_TABLE`` JSON document."""
+        overrides = json.loads(config)
+        extensions = dict(DEFAULT_EXTENSION_ROUTES)
+        mime_types = dict(DEFAULT_MIME_ROUTES)
+        for table, key in ((extensions, "extensions"), (mime_types, "mime_types")):
+            for name, route in (overrides.get(key) or {}).items():
+                name = _extension(name) if key == "extensions" else name.lower()
+                if route is None:
+                    table.pop(name, None)
+                else:
+                    table[name] = route
+        return cls(extensions, mime_types)
+
+    @classmethod
+    def from_env(cls) -> "RoutingTable":
+        config = os.environ.get("ROUTING_TABLE")
+        return cls.from_json(config) if config else cls()
+
+    def route(self, extension: str | None, *, content_type: str | None = None) -> str | None:
+        """Return the route for a file, or ``None`` if it is not supported."""
+        if extension:
+            route = self.extensions.get(_extension(extension))
+            if route is not None:
+                return route
+        if content_type:
+            mime = content_type.split(";", 1)[0].strip().lower()
+            return self.mime_types.get(mime) or self.mime_types.get(mime.split("/", 1)[0] + "/*")
+        return None
+
+
+def _extension(extension: str) -> str:
+    extension = extension.lower()
+    return extension if extension.startswith(".") else f".{extension}"
@@ -0,0 +1,91 @@
+"""
+sqs_batch.py
+------------
+Send many SQS messages with ``SendMessageBatch`` (10 per call) and retry
+only the entries SQS reports as failed.
+
+Usage
+~~~~~
+from sqs_batch import send_message_batches
+
+failures = send_message_batches(sqs, QUEUE, {"0": body0, "1": body1, ...})
+for message_id, error in failures.items():
+    logger.error("Could not enqueue %s: %s", message_id, error)
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, List
+
+MAX_BATCH_ENTRIES = 10
+
+
+def send_message_batches(
+    sqs: Any,
+    queue_url: str,
+    messages: Dict[str, str],
+    *,
+    max_retries: int = 3,
+    retry_backoff: float = 0.1,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Dict[str, str]:
+    """
+    Enqueue *messages* (``{entry_id: body}``) in batches of ten.
+
+    Entry ids must be unique and match SQS's batch id rules (alphanumerics,
+    ``-`` and ``_``, up to 80 characters).  Entries rejected with a
+    retryable error (``SenderFault`` false) are resent with exponential
+    backoff; a failing API call marks its whole batch as failed.
+
+    Returns
+    -------
+    dict
+        ``{entry_id: error message}`` for every entry that was not sent.
+    """
+    failures: Dict[str, str] = {}
+    ids = list(messages)
+    for start in range(0, len(ids), MAX_BATCH_ENTRIES):
+        batch = ids[start : start + MAX_BATCH_ENTRIES]
+        failures.update(
+            _send_batch(sqs, queue_url, messages, batch, max_retries, retry_backoff, sleep)
+        )
+    return failures
+
+
+def _send_batch(
+    sqs: Any,
+    queue_url: str,
+    messages: Dict[str, str],
+    batch: List[str],
+    max_retries: int,
+    retry_backoff: float,
+    sleep: Callable[[float], None],
+) -> Dict[str, str]:
+    failures: Dict[str, str] = {}
+    attempt = 0
+    while batch:
+        entries = [{"Id": entry_id, "MessageBody": messages[entry_id]} for entry_id in batch]
+        try:
+            response = sqs.send_message_batch(QueueUrl=queue_url, Entries=entries)
+        except Exception as exc:  # whole call failed (throttling, network, ...)
+            if attempt >= max_retries:
+                return {**failures, **{entry_id: str(exc) for entry_id in batch}}
+            sleep(retry_backoff * (2**attempt))
+            attempt += 1
+            continue
+
+        retry: List[str] = []
+        for failed in response.get("Failed", []):
+            entry_id = failed["Id"]
+            error = f"{failed.get('Code')}: {failed.get('Message', '')}".strip()
+            if failed.get("SenderFault") or attempt >= max_retries:
+                failures[entry_id] = error
+            else:
+                retry.append(entry_id)
+
+        if retry:
+            sleep(retry_backoff * (2**attempt))
+            attempt += 1
+        batch = retry
+    return failures
@@ -0,0 +1,293 @@
+"""
+transcribe_output.py
+--------------------
+Read Amazon Transcribe result files without loading them whole.
+
+A Transcribe result is a single JSON document whose
+``results.transcripts[0].transcript`` is small, while the ``items`` array
+next to it (one object per word, with timings and confidences) is several
+times larger.  This module tokenises the document incrementally and only
+materialises the values that were asked for:
+
+* :py:func:`extract_transcript` returns the transcript text and stops as
+  soon as it has been read, so the rest of the file is never fetched.
+* :py:func:`iter_segments` streams ``items`` into compact, time-aligned
+  :py:class:`Segment` records for chunked ingestion.
+
+:py:class:`RangedBody` reads an S3 object with successive ``Range`` GETs,
+so stopping early really does stop the download.
+
+Usage
+~~~~~
+from transcribe_output import RangedBody, extract_transcript, iter_segments
+
+transcript = extract_transcript(RangedBody(s3, bucket, key))
+
+for segment in iter_segments(RangedBody(s3, bucket, key), max_seconds=30):
+    print(segment.start, segment.end, segment.text)
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, Tuple
+
+DEFAULT_RANGE_SIZE = 256 * 1024
+DEFAULT_SEGMENT_SECONDS = 30.0
+
+TRANSCRIPT_PATH = ("results", "transcripts", 0, "transcript")
+
+Path = Tuple[Any, ...]
+
+# One JSON token: a string, a structural character or a bare scalar
+_TOKEN_RE = re.compile(
+    r'\s*(?:("[^"\\]*(?:\\.[^"\\]*)*")|([{}\[\]:,])|([^\s{}\[\]:,"]+))'
+)
+_SENTENCE_END = (".", "?", "!")
+
+
+class RangedBody:
+    """
+    Iterable view of an S3 object, fetched in ``range_size`` pieces.
+
+    Only the ranges that are actually consumed are requested; ``requests``
+    and ``bytes_read`` report how much of the object was downloaded.
+    """
+
+    def __init__(self, s3: Any, bucket: str, key: str, *, range_size: int = DEFAULT_RANGE_SIZE) -> None:
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.range_size = range_size
+        self.size: int | None = None
+        self.requests = 0
+        self.bytes_read = 0
+
+    def __iter__(self) -> Iterator[bytes]:
+        range_size = self.range_size
+        offset = 0
+        while self.size is None or offset < self.size:
+            response = self.s3.get_object(
+                Bucket=self.bucket,
+                Key=self.key,
+                Range=f"bytes={offset}-{offset + range_size - 1}",
+            )
+            self.requests += 1
+            data = response["Body"].read()
+            # "bytes 0-262143/5120000" → total object size
+            content_range = response.get("ContentRange", "")
+            if "/" in content_range:
+                self.size = int(content_range.rsplit("/", 1)[1])
+            if not data:
+                return
+            self.bytes_read += len(data)
+            offset += len(data)
+            yield data
+            if self.size is None and len(data) < range_size:
+                return
+
+
+@dataclass(frozen=True)
+class Segment:
+    """A stretch of transcript with its start and end time in seconds."""
+
+    start: float
+    end: float
+    text: str
+
+    def format(self) -> str:
+        """``[00:01:30-00:02:00] text`` – the form written to the KB."""
+        return f"[{_timestamp(self.start)}-{_timestamp(self.end)}] {self.text}"
+
+
+def iter_json_values(body: Any, select: Callable[[Path], bool]) -> Iterator[Tuple[Path, Any]]:
+    """
+    Yield ``(path, value)`` for every value in *body* whose path is selected.
+
+    *body* is ``bytes``/``str``, a stream with ``iter_chunks`` or ``read``
+    (e.g. a botocore ``StreamingBody``), or an iterable of byte chunks such
+    as :py:class:`RangedBody`.  Paths are tuples of
+    object keys and array indices, e.g. ``("results", "items", 3)``.
+    Unselected values are skipped token by token without being built, and
+    the body is only read as far as the consumer iterates.
+    """
+    lexer = _Lexer(_iter_text(body))
+    first = lexer.token()
+    if first is None:
+        raise ValueError("Empty JSON document")
+    yield from _walk(lexer, first, (), select)
+
+
+def extract_transcript(body: Any) -> str:
+    """Return ``results.transcripts[0].transcript``, reading no further than needed."""
+    for _, value in iter_json_values(body, lambda path: path == TRANSCRIPT_PATH):
+        return value
+    raise ValueError("Transcribe output has no results.transcripts[0].transcript")
+
+
+def iter_segments(body: Any, *, max_seconds: float = DEFAULT_SEGMENT_SECONDS) -> Iterator[Segment]:
+    """
+    Stream ``results.items`` into time-aligned segments.
+
+    A segment is closed at the first sentence end after *max_seconds*, or
+    unconditionally at twice that, so segments stay readable and bounded.
+    """
+
+    def is_item(path: Path) -> bool:
+        return len(path) == 3 and path[:2] == ("results", "items")
+
+    items = (value for _, value in iter_json_values(body, is_item))
+    return build_segments(items, max_seconds=max_seconds)
+
+
+def build_segments(items: Iterable[dict], *, max_seconds: float = DEFAULT_SEGMENT_SECONDS) -> Iterator[Segment]:
+    """Group Transcribe ``items`` into :py:class:`Segment` records."""
+    words: list[str] = []
+    start = end = None
+    for item in items:
+        alternatives = item.get("alternatives") or [{}]
+        content = alternatives[0].get("content", "")
+        if item.get("type") == "punctuation":
+            if words:
+                words[-1] += content
+        else:
+            if start is None:
+                start = float(item.get("start_time", 0.0))
+            end = float(item.get("end_time", start))
+            words.append(content)
+        if start is None or not words:
+            continue
+        duration = end - start
+        sentence_end = words[-1].endswith(_SENTENCE_END)
+        if (duration >= max_seconds and sentence_end) or duration >= 2 * max_seconds:
+            yield Segment(start, end, " ".join(words))
+            words, start = [], None
+    if words and start is not None:
+        yield Segment(start, end, " ".join(words))
+
+
+# ───────────────────────────  internals  ───────────────────────────
+
+
+def _timestamp(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def _iter_text(body: Any, chunk_size: int = DEFAULT_RANGE_SIZE) -> Iterator[str]:
+    """Decode *body* (bytes, str, ``iter_chunks``/``read`` stream or iterable of chunks)."""
+    if isinstance(body, (str, bytes)):
+        body = [body]
+    if hasattr(body, "iter_chunks"):
+        raw_chunks: Iterable = body.iter_chunks(chunk_size)
+    elif hasattr(body, "read"):
+        raw_chunks = iter(lambda: body.read(chunk_size), b"")
+    else:
+        raw_chunks = body
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    for raw in raw_chunks:
+        text = raw if isinstance(raw, str) else decoder.decode(raw)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class _Lexer:
+    """Pull tokens from a stream of JSON text, refilling across chunk boundaries."""
+
+    _decoder = json.JSONDecoder()
+
+    def __init__(self, texts: Iterator[str]) -> None:
+        self._texts = texts
+        self._buffer = ""
+        self._pos = 0
+        self._start = 0  # where the last returned token began
+        self._exhausted = False
+
+    def _refill(self, keep_from: int) -> bool:
+        more = next(self._texts, None)
+        if more is None:
+            self._exhausted = True
+            return False
+        self._buffer = self._buffer[keep_from:] + more
+        self._pos -= keep_from
+        self._start -= keep_from
+        return True
+
+    def token(self) -> str | None:
+        while True:
+            match = _TOKEN_RE.match(self._buffer, self._pos)
+            # A token touching the end of the buffer may continue in the next chunk
+            if (match is None or match.end() == len(self._buffer)) and not self._exhausted:
+                self._refill(self._pos)
+                continue
+            if match is None:
+                rest = self._buffer[self._pos :]
+                if rest.strip():
+                    raise ValueError(f"Malformed JSON near {rest[:40]!r}")
+                return None
+            self._start = match.start(match.lastindex)
+            self._pos = match.end()
+            return match.group(match.lastindex)
+
+    def next(self) -> str:
+        token = self.token()
+        if token is None:
+            raise ValueError("Truncated JSON document")
+        return token
+
+    def value(self, token: str) -> Any:
+        """Decode the whole value that starts with *token* (the last one returned)."""
+        if token not in ("{", "["):
+            return _scalar(token)
+        # Let the C decoder parse the container in one go; if it runs off the
+        # end of the buffer, read more and try again
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._start)
+            except json.JSONDecodeError as exc:
+                if self._exhausted or not self._refill(self._start):
+                    raise ValueError(f"Malformed JSON: {exc}") from None
+                continue
+            self._pos = end
+            return value
+
+
+def _scalar(token: str) -> Any:
+    if token.startswith('"'):
+        return token[1:-1] if "\\" not in token else json.loads(token)
+    try:
+        return json.loads(token)
+    except ValueError:
+        raise ValueError(f"Invalid JSON value {token[:40]!r}") from None
+
+
+def _walk(lexer: _Lexer, token: str, path: Path, select: Callable[[Path], bool]):
+    if select(path):
+        yield path, lexer.value(token)
+        return
+    if token == "{":
+        token = lexer.next()
+        while token != "}":
+            key = _scalar(token)
+            if lexer.next() != ":" or not isinstance(key, str):
+                raise ValueError("Expected 'key:' in JSON object")
+            yield from _walk(lexer, lexer.next(), path + (key,), select)
+            token = lexer.next()
+            if token == ",":
+                token = lexer.next()
+    elif token == "[":
+        token = lexer.next()
+        index = 0
+        while token != "]":
+            yield from _walk(lexer, token, path + (index,), select)
+            index += 1
+            token = lexer.next()
+            if token == ",":
+                token = lexer.next()
+    # Unselected scalars are skipped without being decoded
@@ -0,0 +1,145 @@
+"""
+upload_message.py
+-----------------
+The SQS message ``upload_processor`` sends to ``queue_processor``.
+
+An :py:class:`UploadMessage` holds only what cannot be derived: the bucket,
+the processed and original keys, the extension, the idempotency key (which
+doubles as the document ID), the content type and the enqueue time.  The
+S3 URIs are properties computed on access.
+
+On the wire a message is a compact, versioned JSON object with short field
+names (:py:data:`WIRE_FIELDS`), ``None`` fields omitted::
+
+    {"v":2,"b":"media","k":"processed/3f2a….pdf","o":"uploads/report.pdf",
+     "x":".pdf","i":"3f2a…","t":1718000000000}
+
+It is encoded and decoded with ``orjson`` when the bundle ships it and with
+the standard library otherwise.  :py:meth:`UploadMessage.decode` also
+accepts the previous unversioned format, so messages already in flight
+during a deployment are still processed.
+
+Usage
+~~~~~
+from upload_message import UploadMessage
+
+body = UploadMessage(bucket, new_key, key, ext, idempotency_key=ikey).encode()
+message = UploadMessage.decode(record["body"])
+message.s3_uri  # "s3://bucket/processed/…"
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, ClassVar, Dict
+
+try:
+    import orjson
+except ImportError:  # the stdlib codec produces the same documents, only slower
+    orjson = None
+
+SCHEMA_VERSION = 2
+
+# Attribute → wire name; append new optional fields, never rename or reuse one
+WIRE_FIELDS: Dict[str, str] = {
+    "bucket": "b",
+    "key": "k",
+    "original_key": "o",
+    "extension": "x",
+    "idempotency_key": "i",
+    "content_type": "c",
+    "timestamp": "t",
+}
+
+
+def dumps(value: Any) -> str:
+    """Serialize *value* as compact JSON text."""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(text: str | bytes) -> Any:
+    """Parse JSON text; raises ``ValueError`` if it is malformed."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+@dataclass(frozen=True, slots=True)
+class UploadMessage:
+    """One processed upload, waiting to be routed by ``queue_processor``."""
+
+    VERSION: ClassVar[int] = SCHEMA_VERSION
+
+    bucket: str
+    key: str
+    original_key: str
+    extension: str = ""
+    idempotency_key: str | None = None
+    content_type: str | None = None
+    # Milliseconds since the epoch at which the upload was enqueued
+    timestamp: int | None = None
+
+    @property
+    def document_id(self) -> str | None:
+        return self.idempotency_key
+
+    @property
+    def s3_uri(self) -> str:
+        return f"s3://{self.bucket}/{self.key}"
+
+    @property
+    def original_s3_uri(self) -> str:
+        return f"s3://{self.bucket}/{self.original_key}"
+
+    def to_wire(self) -> Dict[str, Any]:
+        wire: Dict[str, Any] = {"v": self.VERSION}
+        for attribute, name in WIRE_FIELDS.items():
+            value = getattr(self, attribute)
+            if value is not None:
+                wire[name] = value
+        return wire
+
+    def encode(self) -> str:
+        """The SQS message body."""
+        return dumps(self.to_wire())
+
+    @classmethod
+    def decode(cls, body: str | bytes) -> "UploadMessage":
+        """
+        Parse an SQS message body, current or legacy format.
+
+        Raises
+        ------
+        ValueError
+            If the body is not a JSON object, or a versioned one of an
+            unknown version or without the required fields.
+        """
+        data = loads(body)
+        if not isinstance(data, dict):
+            raise ValueError("Upload message must be a JSON object")
+        version = data.get("v")
+        if version is None:
+            return cls._from_legacy(data)
+        if version != SCHEMA_VERSION:
+            raise ValueError(f"Unsupported upload message version {version!r}")
+        try:
+            return cls(**{attribute: data[name] for attribute, name in WIRE_FIELDS.items() if name in data})
+        except TypeError as exc:
+            raise ValueError(f"Invalid upload message: {exc}") from None
+
+    @classmethod
+    def _from_legacy(cls, data: Dict[str, Any]) -> "UploadMessage":
+        # A missing bucket or key is left empty for the router to drop
+        key = data.get("key") or ""
+        return cls(
+            bucket=data.get("bucket") or "",
+            key=key,
+            original_key=data.get("original_key") or key,
+            extension=data.get("extension") or "",
+            idempotency_key=data.get("idempotency_key") or data.get("documentId"),
+            content_type=data.get("content_type"),
+            timestamp=data.get("timestamp"),
+        )
@@ -1,85 +1,195 @@
 import os
-import json
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import unquote_plus
 from datetime import datetime
 
-import boto3
 from botocore.exceptions import ClientError
 from aws_lambda_powertools import Logger
 from aws_lambda_powertools.utilities.data_classes import event_source, S3Event
 from aws_lambda_powertools.utilities.data_classes.appsync import scalar_types_utils
-import shortuuid
+from idempotency import (
+    STATUS_COMPLETED,
+    STATUS_IN_PROGRESS,
+    ClaimInProgress,
+    build_idempotency_store,
+    idempotency_key,
+)
+from lazy import Lazy, lazy_client
+from sqs_batch import send_message_batches
+from s3_copy import copy_object
+from upload_message import UploadMessage
 
 # ────────────────────────────  ENV  ────────────────────────────
 QUEUE   = os.getenv("QUEUE")
 BUCKET  = os.getenv("BUCKET")         
 PREFIX_INCOMING  = os.getenv("PREFIX_INCOMING",  "uploads/")   
 PREFIX_PROCESSED = os.getenv("PREFIX_PROCESSED", "processed/")
+MAX_COPY_WORKERS = int(os.getenv("MAX_COPY_WORKERS", "8"))
+# Objects above the threshold are copied as parallel UploadPartCopy ranges
+MULTIPART_COPY_THRESHOLD   = int(os.getenv("MULTIPART_COPY_THRESHOLD", str(256 * 1024 * 1024)))
+MULTIPART_COPY_PART_SIZE   = int(os.getenv("MULTIPART_COPY_PART_SIZE", str(128 * 1024 * 1024)))
+MULTIPART_COPY_CONCURRENCY = int(os.getenv("MULTIPART_COPY_CONCURRENCY", "8"))
 
 if not QUEUE or not BUCKET:
     raise ValueError("Required env vars QUEUE and BUCKET must be set")
 
 # ────────────────────────────  AWS  ────────────────────────────
-s3  = boto3.client("s3")
-sqs = boto3.client("sqs")
+# Clients are built on first use, not during the cold start's init phase
+s3  = lazy_client("s3")
+sqs = lazy_client("sqs")
 logger = Logger()
 
+# Claims bucket + key + ETag so a redelivered S3 event is not copied twice
+idempotency = Lazy(lambda: build_idempotency_store("upload"))
+
+
+class UploadsFailed(RuntimeError):
+    """Some uploads were not copied or enqueued; raised so Lambda retries the S3 event."""
+
+    def __init__(self, failed: list) -> None:
+        super().__init__(f"Failed uploads: {[(f['key'], f['stage']) for f in failed]}")
+        self.failed = failed
+
 
 @logger.inject_lambda_context(log_event=True)   
 @event_source(data_class=S3Event)                  
 def lambda_handler(event: S3Event, context):
+    """
+    Copy every uploaded object into ``PREFIX_PROCESSED`` and enqueue it.
+
+    Copies run on a bounded thread pool; messages for the successful copies
+    are sent with ``SendMessageBatch``.  S3 invokes this function
+    asynchronously and only retries an invocation that fails, so once the
+    other uploads are done any upload that failed raises
+    :py:class:`UploadsFailed`, whose ``failed`` list names the stage
+    (``copy`` / ``enqueue``) that failed.  Returns the counts of processed
+    and duplicate uploads.
+
+    Each upload is identified by ``bucket + key + ETag``; that idempotency
+    key names the processed copy and the document, and a delivery whose key
+    is already completed is counted in ``duplicates`` and skipped.  A key
+    another delivery still holds raises :py:class:`ClaimInProgress` once the
+    other uploads are done, so the S3 event is retried.  Claims that did not
+    complete, including after an unexpected exception, are released.
+    """
     logger.info(f"received s3 event {event}")
-    for record in event.records:
+    uploads = []
+    duplicates = 0
+    in_progress = []
+    completed = set()
+    try:
+        for record in event.records:
 
       
-        if record.event_name.endswith(":Copy"):
-            logger.info("Ignoring ObjectCreated:Copy event for %s", record.s3.get_object.key)
-            continue
+            if record.event_name.endswith(":Copy"):
+                logger.info("Ignoring ObjectCreated:Copy event for %s", record.s3.get_object.key)
+                continue
 
-        bucket_name = record.s3.bucket.name
-        key_raw     = record.s3.get_object.key     
-        key         = unquote_plus(key_raw)
+            bucket_name = record.s3.bucket.name
+            key_raw     = record.s3.get_object.key     
+            key         = unquote_plus(key_raw)
 
-        logger.info("Processing raw key %s", key_raw)
-        logger.info("Processing key %s", key)
+            logger.info("Processing raw key %s", key_raw)
+            logger.info("Processing key %s", key)
 
        
-        if bucket_name != BUCKET:
-            logger.warning("Skipping key from unexpected bucket %s", bucket_name)
-            continue
-        if key.startswith(PREFIX_PROCESSED):
-            logger.info("Key %s already in target prefix – skipping", key)
-            continue
-
-     
-        root, ext = os.path.splitext(key)
-        new_key   = f"{PREFIX_PROCESSED}{shortuuid.uuid()}{ext}"
-        copy_src  = {"Bucket": bucket_name, "Key": key}
-        new_s3_uri = f"s3://{bucket_name}/{new_key}"
+            if bucket_name != BUCKET:
+                logger.warning("Skipping key from unexpected bucket %s", bucket_name)
+                continue
+            if key.startswith(PREFIX_PROCESSED):
+                logger.info("Key %s already in target prefix – skipping", key)
+                continue
 
-       
-        try:
-            s3.copy_object(CopySource=copy_src, Bucket=bucket_name, Key=new_key)
-            logger.info("Copied %s  ➜  %s", key, new_key)
-        except ClientError as e:
-            logger.exception("Failed to copy object: %s", e)
-            continue  # move on to the next record
+            ikey = idempotency_key(bucket_name, key, record.s3.get_object.etag)
+            state = idempotency.claim(ikey)
+            if state == STATUS_COMPLETED:
+                logger.info("Duplicate delivery of %s (%s) – skipping", key, ikey)
+                duplicates += 1
+                continue
+            if state == STATUS_IN_PROGRESS:
+                logger.info("Delivery of %s (%s) is already in progress", key, ikey)
+                in_progress.append(key)
+                continue
 
-      
-        message = {
-            "documentId": shortuuid.uuid(),
-            "original_key": key,
-            "key": new_key,
-            "extension": ext,
-            "bucket": bucket_name,
-            "s3_uri": new_s3_uri,
-            "original_s3_uri": f"s3://{bucket_name}/{key}",
-            "timestamp": scalar_types_utils.aws_timestamp(),  # milliseconds
-        }
-
-        try:
-            resp = sqs.send_message(QueueUrl=QUEUE, MessageBody=json.dumps(message))
-            logger.info("Enqueued message %s for %s", resp.get("MessageId"), key)
-        except ClientError as e:
-            logger.exception("Failed to send SQS message: %s", e)
+            root, ext = os.path.splitext(key)
+            # Deterministic, so even an unguarded replay overwrites the same copy
+            new_key   = f"{PREFIX_PROCESSED}{ikey}{ext}"
+            uploads.append(
+                {"bucket": bucket_name, "key": key, "new_key": new_key, "extension": ext, "idempotency_key": ikey}
+            )
+
+        failed = []
+
+        # ── Copy into the processed prefix, in parallel ──────────────────
+        copied = []
+        if uploads:
+            with ThreadPoolExecutor(max_workers=min(MAX_COPY_WORKERS, len(uploads))) as pool:
+                for upload, error in zip(uploads, pool.map(_copy, uploads)):
+                    if error is None:
+                        copied.append(upload)
+                    else:
+                        failed.append({"key": upload["key"], "stage": "copy", "error": error})
+
+        # ── Enqueue one message per copied object, 10 per SQS call ───────
+        messages = {str(i): _message(upload).encode() for i, upload in enumerate(copied)}
+        send_failures = send_message_batches(sqs, QUEUE, messages)
+        for entry_id, error in send_failures.items():
+            upload = copied[int(entry_id)]
+            logger.error("Failed to send SQS message for %s: %s", upload["key"], error)
             # (optional) rollback the copy if desired
+            failed.append({"key": upload["key"], "stage": "enqueue", "error": error})
+
+        failed_keys = {f["key"] for f in failed}
+        for upload in uploads:
+            if upload["key"] not in failed_keys:
+                idempotency.complete(upload["idempotency_key"])
+                completed.add(upload["idempotency_key"])
+    finally:
+        # Failed uploads, and every upload if this invocation raised, may be retried
+        for upload in uploads:
+            if upload["idempotency_key"] not in completed:
+                idempotency.release(upload["idempotency_key"])
+
+    logger.info("Enqueued %d of %d uploads", len(copied) - len(send_failures), len(uploads))
+    # Raising makes Lambda retry the S3 event (or hand it to the DLQ);
+    # uploads completed above are duplicates on the retry
+    if failed:
+        raise UploadsFailed(failed)
+    if in_progress:
+        raise ClaimInProgress(f"Uploads still in progress elsewhere: {in_progress}")
+    return {"processed": len(uploads), "duplicates": duplicates}
+
+
+def _copy(upload: dict) -> str | None:
+    """Copy one object; returns the error message instead of raising."""
+    try:
+        result = copy_object(
+            s3,
+            upload["bucket"],
+            upload["key"],
+            upload["bucket"],
+            upload["new_key"],
+            threshold=MULTIPART_COPY_THRESHOLD,
+            part_size=MULTIPART_COPY_PART_SIZE,
+            concurrency=MULTIPART_COPY_CONCURRENCY,
+        )
+        logger.info("Copied %s  ➜  %s (%s)", upload["key"], upload["new_key"], result["method"])
+        # Lets queue_processor route files whose extension is missing or unknown
+        upload["content_type"] = result.get("content_type")
+        return None
+    except ClientError as e:
+        logger.exception("Failed to copy object: %s", e)
+        return str(e)
+
+
+def _message(upload: dict) -> UploadMessage:
+    # The document ID and S3 URIs are derived from these on the consumer side
+    return UploadMessage(
+        bucket=upload["bucket"],
+        key=upload["new_key"],
+        original_key=upload["key"],
+        extension=upload["extension"],
+        idempotency_key=upload["idempotency_key"],
+        content_type=upload.get("content_type"),
+        timestamp=scalar_types_utils.aws_timestamp(),  # milliseconds
+    )
@@ -1,4 +1,4 @@
-import { AppSyncResolverHandler } from "aws-lambda";
+import { AppSyncIdentityCognito, AppSyncResolverHandler } from "aws-lambda";
 import { SFNClient, StartExecutionCommand } from "@aws-sdk/client-sfn";
 import { MutationStartAgentStateMachineArgs } from "../appsync";
 import { logger, metrics, tracer } from "../src/powertools/utilities";
@@ -7,7 +7,9 @@ export const handler: AppSyncResolverHandler<
   MutationStartAgentStateMachineArgs,
   Boolean
 > = async (event, _context) => {
-  const input = JSON.stringify({ input: event.arguments.input });
+  // The caller's identity scopes the generated-post cache to that user
+  const userId = (event.identity as AppSyncIdentityCognito | null)?.sub;
+  const input = JSON.stringify({ input: event.arguments.input, userId });
 
   logger.info(`step functions input is ${input}`);
 
@@ -0,0 +1,399 @@
+"""
+Helpers shared by the local benchmark scripts.
+
+Run any benchmark directly, e.g.::
+
+    python test/python/benchmarks/bench_event_publisher.py
+
+Importing this module puts the Lambda bundle directories on ``sys.path``
+so the benchmarks exercise the exact modules that are deployed.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+SRC = Path(__file__).resolve().parents[3] / "src"
+
+for bundle in ("agents_resolvers", "media_processing"):
+    path = str(SRC / bundle)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+class StubEventsClient:
+    """EventBridge client stand-in that sleeps ``latency`` seconds per call."""
+
+    def __init__(self, latency: float = 0.02) -> None:
+        self.latency = latency
+        self.calls = 0
+        self.entries = 0
+
+    def put_events(self, Entries):
+        self.calls += 1
+        self.entries += len(Entries)
+        time.sleep(self.latency)
+        return {"FailedEntryCount": 0, "Entries": [{"EventId": "id"} for _ in Entries]}
+
+
+def fake_tokens(count: int = 400) -> list[str]:
+    """Return *count* short tokens resembling a streamed social-media post."""
+    words = "Ship faster with event driven serverless architectures on AWS".split()
+    return [f"{words[i % len(words)]} " for i in range(count)]
+
+
+def report(title: str, rows: list[tuple[str, ...]], headers: tuple[str, ...]) -> None:
+    """Print *rows* as a fixed-width table."""
+    widths = [max(len(str(v)) for v in col) for col in zip(headers, *rows)]
+    print(f"\n{title}")
+    print("  ".join(h.ljust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
+
+
+class StubS3Client:
+    """S3 stand-in with fixed per-call latency and a key → size table.
+
+    With ``bytes_per_second`` set, copy calls also take time proportional to
+    the bytes they move, like a single server-side copy stream does.
+    """
+
+    def __init__(
+        self, latency: float = 0.03, sizes: dict | None = None, bytes_per_second: float = 0.0
+    ) -> None:
+        self.latency = latency
+        self.sizes = sizes or {}
+        self.bytes_per_second = bytes_per_second
+        self.calls: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _call(self, name: str, nbytes: int = 0) -> None:
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        transfer = nbytes / self.bytes_per_second if self.bytes_per_second else 0.0
+        time.sleep(self.latency + transfer)
+
+    def copy_object(self, CopySource=None, **_):
+        size = self.sizes.get(CopySource["Key"], 1024) if CopySource else 0
+        self._call("copy_object", size)
+        return {}
+
+    def head_object(self, Bucket, Key, **_):
+        self._call("head_object")
+        return {"ContentLength": self.sizes.get(Key, 1024), "ETag": '"etag"'}
+
+    def create_multipart_upload(self, **_):
+        self._call("create_multipart_upload")
+        return {"UploadId": "upload"}
+
+    def upload_part_copy(self, CopySourceRange, PartNumber, **_):
+        start, end = map(int, CopySourceRange.removeprefix("bytes=").split("-"))
+        self._call("upload_part_copy", end - start + 1)
+        return {"CopyPartResult": {"ETag": f'"part-{PartNumber}"'}}
+
+    def complete_multipart_upload(self, **_):
+        self._call("complete_multipart_upload")
+        return {}
+
+    def abort_multipart_upload(self, **_):
+        self._call("abort_multipart_upload")
+        return {}
+
+
+class StubSqsClient:
+    """SQS stand-in with fixed per-call latency."""
+
+    def __init__(self, latency: float = 0.02) -> None:
+        self.latency = latency
+        self.calls: dict[str, int] = {}
+
+    def _call(self, name: str) -> None:
+        self.calls[name] = self.calls.get(name, 0) + 1
+        time.sleep(self.latency)
+
+    def send_message(self, **_):
+        self._call("send_message")
+        return {"MessageId": "id"}
+
+    def send_message_batch(self, Entries, **_):
+        self._call("send_message_batch")
+        return {"Successful": [{"Id": e["Id"]} for e in Entries], "Failed": []}
+
+
+def s3_put_event(keys, bucket: str) -> dict:
+    """Minimal S3 ObjectCreated:Put notification for *keys*."""
+    return {
+        "Records": [
+            {
+                "eventSource": "aws:s3",
+                "eventName": "ObjectCreated:Put",
+                "s3": {"bucket": {"name": bucket}, "object": {"key": key, "size": 1024, "eTag": "etag"}},
+            }
+            for key in keys
+        ]
+    }
+
+
+def transcribe_result(minutes: int, words_per_minute: int = 150) -> bytes:
+    """Amazon Transcribe output JSON for *minutes* of speech, sentences of 12 words."""
+    words = minutes * words_per_minute
+    step = 60.0 / words_per_minute
+    items, text = [], []
+    for i in range(words):
+        word = f"word{i % 997}"
+        text.append(word)
+        items.append(
+            {
+                "id": len(items),
+                "type": "pronunciation",
+                "alternatives": [{"confidence": "0.998", "content": word}],
+                "start_time": f"{i * step:.3f}",
+                "end_time": f"{(i + 1) * step:.3f}",
+                "speaker_label": f"spk_{i // 200 % 2}",
+            }
+        )
+        if i % 12 == 11:
+            text[-1] += "."
+            items.append(
+                {"id": len(items), "type": "punctuation", "alternatives": [{"confidence": "0.0", "content": "."}]}
+            )
+    doc = {
+        "jobName": "bench",
+        "accountId": "123456789012",
+        "status": "COMPLETED",
+        "results": {"transcripts": [{"transcript": " ".join(text)}], "items": items},
+    }
+    return json.dumps(doc).encode("utf-8")
+
+
+class StubBedrockServer:
+    """Local keep-alive HTTP endpoint that answers every call like ``Converse``.
+
+    ``latency`` is slept per request and ``connect_delay`` once per new
+    connection, standing in for the TLS handshake with the real endpoint.
+    """
+
+    RESPONSE = json.dumps(
+        {
+            "output": {"message": {"role": "assistant", "content": [{"text": "ok"}]}},
+            "stopReason": "end_turn",
+            "usage": {"inputTokens": 1, "outputTokens": 1, "totalTokens": 2},
+            "metrics": {"latencyMs": 1},
+        }
+    ).encode()
+
+    def __init__(self, latency: float = 0.05, connect_delay: float = 0.03) -> None:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        stub = self
+        self.latency = latency
+        self.connect_delay = connect_delay
+        self.connections = 0
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+                time.sleep(stub.connect_delay)
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(stub.latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(stub.RESPONSE)))
+                self.end_headers()
+                self.wfile.write(stub.RESPONSE)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 256
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def __enter__(self) -> "StubBedrockServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class FakeConverseClient:
+    """``bedrock-runtime`` stand-in for ``ConverseStream`` that models prompt caching.
+
+    Tokens are estimated at four characters each.  Every ``cachePoint`` in
+    the request – tool definitions first, then system, then messages – marks
+    a prefix; one of at least ``min_cache_tokens`` is written to the cache
+    and read back by later requests with the same prefix within ``ttl``
+    seconds, as Bedrock does.  A write becomes readable once the writing
+    request has processed it, so a concurrent burst starts with misses.  Time to first token is ``base_latency`` plus
+    ``prefill_per_token`` per processed input token (``cached_per_token``
+    for tokens read from the cache), then ``output_tokens`` tokens stream
+    ``token_latency`` apart.  ``usage`` reports the same split.
+    """
+
+    def __init__(
+        self,
+        *,
+        output_tokens: int = 40,
+        base_latency: float = 0.15,
+        prefill_per_token: float = 0.0002,
+        cached_per_token: float = 0.00002,
+        token_latency: float = 0.0,
+        min_cache_tokens: int = 1024,
+        ttl: float = 300.0,
+    ) -> None:
+        self.output_tokens = output_tokens
+        self.base_latency = base_latency
+        self.prefill_per_token = prefill_per_token
+        self.cached_per_token = cached_per_token
+        self.token_latency = token_latency
+        self.min_cache_tokens = min_cache_tokens
+        self.ttl = ttl
+        self.requests: list[dict] = []
+        self._cache: dict[int, tuple[float, float]] = {}  # prefix → (readable at, expires at)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _blocks(request: dict):
+        yield from (request.get("toolConfig") or {}).get("tools", [])
+        yield from request.get("system", [])
+        for message in request.get("messages", []):
+            yield from message.get("content", [])
+
+    def usage(self, request: dict) -> dict:
+        """Input, cache-read and cache-write tokens for *request*, updating the cache."""
+        total, prefix, checkpoints = 0, [], []
+        for block in self._blocks(request):
+            if "cachePoint" in block:
+                checkpoints.append((total, hash(tuple(prefix))))
+                continue
+            text = json.dumps(block, sort_keys=True)
+            total += len(text) // 4
+            prefix.append(text)
+
+        read = written = 0
+        now = time.monotonic()
+        with self._lock:
+            for tokens, key in checkpoints:
+                if tokens < self.min_cache_tokens:
+                    continue
+                readable_at, expires_at = self._cache.get(key, (0.0, 0.0))
+                if readable_at <= now < expires_at:
+                    read, written = tokens, 0
+                    self._cache[key] = (readable_at, now + self.ttl)
+                    continue
+                written = tokens - read
+                if expires_at <= now:
+                    prefill = self.base_latency + tokens * self.prefill_per_token
+                    self._cache[key] = (now + prefill, now + self.ttl)
+        return {"inputTokens": total - read - written, "cacheReadInputTokens": read, "cacheWriteInputTokens": written}
+
+    def converse_stream(self, **request):
+        with self._lock:
+            self.requests.append(request)
+        usage = self.usage(request)
+        return {"stream": self._events(usage)}
+
+    def _events(self, usage: dict):
+        started = time.perf_counter()
+        processed = usage["inputTokens"] + usage["cacheWriteInputTokens"]
+        time.sleep(
+            self.base_latency
+            + processed * self.prefill_per_token
+            + usage["cacheReadInputTokens"] * self.cached_per_token
+        )
+        yield {"messageStart": {"role": "assistant"}}
+        for i in range(self.output_tokens):
+            if i and self.token_latency:
+                time.sleep(self.token_latency)
+            yield {"contentBlockDelta": {"delta": {"text": f"tok{i} "}, "contentBlockIndex": 0}}
+        yield {"contentBlockStop": {"contentBlockIndex": 0}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+        total = sum(usage.values()) + self.output_tokens
+        yield {
+            "metadata": {
+                "usage": {**usage, "outputTokens": self.output_tokens, "totalTokens": total},
+                "metrics": {"latencyMs": int((time.perf_counter() - started) * 1000)},
+            }
+        }
+
+
+def make_pdf(pages: list[str | None]) -> bytes:
+    """
+    Minimal PDF with one page per entry of *pages*.
+
+    A string becomes a text layer (one ``Tj`` per line); ``None`` becomes a
+    page holding only an image, like a scan.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    image = len(objects) + 1
+    objects.append(b"<< /Type /XObject /Subtype /Image /Width 1 /Height 1 /ColorSpace /DeviceGray "
+                   b"/BitsPerComponent 8 /Length 1 >>\nstream\n\x80\nendstream")
+    kids = []
+    for text in pages:
+        if text is None:
+            content = b"q 612 0 0 792 0 0 cm /Im1 Do Q"
+        else:
+            lines = [line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") for line in text.splitlines()]
+            content = b"BT /F1 10 Tf 14 TL 40 760 Td " + b" ".join(
+                f"({line}) Tj T*".encode("latin-1", "replace") for line in lines
+            ) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 3 0 R >> /XObject << /Im1 %d 0 R >> >> >>" % (len(objects), image)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids),
+        len(kids),
+    )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+
+def make_docx(paragraphs: list[str]) -> bytes:
+    """Minimal ``.docx`` holding *paragraphs*."""
+    import zipfile
+
+    body = "".join(
+        f'<w:p><w:r><w:t xml:space="preserve">{escape(text)}</w:t></w:r></w:p>' for text in paragraphs
+    )
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{body}</w:body></w:document>"
+    )
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", '<?xml version="1.0"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"/>')
+        archive.writestr("word/document.xml", document)
+    return out.getvalue()
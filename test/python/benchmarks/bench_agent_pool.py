@@ -0,0 +1,91 @@
+"""
+Measure the per-invocation overhead removed by the warm-container agent pool.
+
+"cold" rebuilds the model + agent and calls ``asyncio.run`` on every
+invocation, as ``index.lambda_handler`` used to; "warm" goes through
+``AgentPool`` and ``run_coroutine``.  When ``strands`` is installed the real
+``BedrockModel``/``Agent`` constructors are timed (no Bedrock call is made);
+otherwise a stub with ``--construct-cost`` seconds of setup is used.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from _support import report
+
+from agent_pool import AgentPool, run_coroutine
+
+
+def stub_factory(cost: float):
+    class StubAgent:
+        def __init__(self):
+            time.sleep(cost)
+            self.messages = []
+
+    return lambda *_: StubAgent()
+
+
+def strands_factory():
+    try:
+        from strands import Agent
+        from strands.models import BedrockModel
+    except ImportError:
+        return None
+
+    def build(model_id, temperature, system_prompt):
+        model = BedrockModel(model_id=model_id, region_name="us-east-1", temperature=temperature)
+        return Agent(model=model, system_prompt=system_prompt, callback_handler=None)
+
+    return build
+
+
+async def invocation():
+    # Stand-in for process_streaming_response once the model has answered
+    await asyncio.sleep(0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invocations", type=int, default=200)
+    parser.add_argument("--construct-cost", type=float, default=0.005)
+    args = parser.parse_args()
+
+    factory = strands_factory()
+    source = "strands" if factory else f"stub ({args.construct_cost * 1000:.1f} ms)"
+    factory = factory or stub_factory(args.construct_cost)
+    key = ("us.anthropic.claude-3-7-sonnet-20250219-v1:0", 0.3, "system prompt")
+
+    cold = []
+    for _ in range(args.invocations):
+        start = time.perf_counter()
+        factory(*key)
+        asyncio.run(invocation())
+        cold.append(time.perf_counter() - start)
+
+    pool = AgentPool(factory)
+    warm = []
+    for _ in range(args.invocations):
+        start = time.perf_counter()
+        with pool.acquire(*key):
+            run_coroutine(invocation())
+        warm.append(time.perf_counter() - start)
+    # The first pooled invocation is the container's cold start
+    warm = warm[1:]
+
+    rows = [
+        (name, f"{statistics.median(s) * 1000:.3f} ms", f"{max(s) * 1000:.3f} ms")
+        for name, s in (("cold", cold), ("warm", warm))
+    ]
+    report(
+        f"{args.invocations} invocations, agent construction: {source}",
+        rows,
+        ("mode", "p50 overhead", "max overhead"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Compare per-module default Bedrock clients with the shared, tuned client.
+
+Before ``bedrock_clients``, ``invoke_agent`` and every Strands model built
+their own client with botocore defaults.  The benchmark sends ``--bursts``
+rounds of ``--workers`` simultaneous ``Converse`` calls – the shape of a
+batch of agents – to a local stub endpoint that charges ``--connect-delay``
+per new connection (the TLS handshake) and ``--latency`` per request:
+
+* *default* – one client with botocore's defaults (10 pooled connections);
+* *per-agent defaults* – one default client per worker, as when every pooled
+  Strands agent owns a ``BedrockModel``, first used in the first burst;
+* *shared tuned* – the single client from :py:func:`bedrock_clients.bedrock_client`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _support import StubBedrockServer, report
+
+import boto3
+
+import bedrock_clients
+
+REQUEST = {"modelId": "m", "messages": [{"role": "user", "content": [{"text": "hi"}]}]}
+
+
+def run_bursts(clients, workers, bursts):
+    barrier = threading.Barrier(workers)
+    latencies = []
+
+    def call(i):
+        barrier.wait()
+        start = time.perf_counter()
+        clients[i % len(clients)].converse(**REQUEST)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(workers) as pool:
+        for _ in range(bursts):
+            list(pool.map(call, range(workers)))
+    return time.perf_counter() - start, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--bursts", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--connect-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+
+    rows = []
+    with StubBedrockServer(args.latency, args.connect_delay) as stub:
+        scenarios = {
+            "default": lambda: [
+                boto3.client("bedrock-runtime", region_name="us-east-1", endpoint_url=stub.url)
+            ],
+            "per-agent defaults": lambda: [
+                boto3.client("bedrock-runtime", region_name="us-east-1", endpoint_url=stub.url)
+                for _ in range(args.workers)
+            ],
+            "shared tuned": lambda: [
+                bedrock_clients.bedrock_client("bedrock-runtime", region_name="us-east-1", endpoint_url=stub.url)
+            ],
+        }
+        for name, build in scenarios.items():
+            clients = build()
+            stub.connections = 0
+            elapsed, latencies = run_bursts(clients, args.workers, args.bursts)
+            latencies.sort()
+            rows.append(
+                (
+                    name,
+                    stub.connections,
+                    f"{len(latencies) / elapsed:.0f}",
+                    f"{statistics.median(latencies) * 1000:.1f}",
+                    f"{latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}",
+                )
+            )
+
+    report(
+        f"{args.bursts} bursts x {args.workers} calls, {args.latency * 1000:.0f} ms per call, "
+        f"{args.connect_delay * 1000:.0f} ms per new connection",
+        rows,
+        ("clients", "connections", "calls/s", "p50 ms", "p99 ms"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compare per-token PutEvents calls with the coalescing publisher.
+
+The agent stream is simulated by emitting tokens every ``--token-interval``
+seconds; the stubbed EventBridge client sleeps ``--latency`` seconds per
+call.  Reported numbers are per generated post.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from _support import StubEventsClient, fake_tokens, report
+
+from event_publisher import CoalescingEventPublisher
+
+
+def per_token(client, tokens, token_interval):
+    for token in tokens:
+        time.sleep(token_interval)
+        client.put_events(
+            Entries=[
+                {
+                    "Source": "generatedText.response",
+                    "DetailType": "generated.text",
+                    "Detail": json.dumps({"input": token}),
+                    "EventBusName": "bench",
+                }
+            ]
+        )
+
+
+def coalesced(client, tokens, token_interval):
+    publisher = CoalescingEventPublisher(client, "bench")
+    for token in tokens:
+        time.sleep(token_interval)
+        publisher.add(token)
+    publisher.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tokens", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--token-interval", type=float, default=0.002)
+    args = parser.parse_args()
+
+    tokens = fake_tokens(args.tokens)
+    rows = []
+    for name, fn in (("per-token", per_token), ("coalesced", coalesced)):
+        client = StubEventsClient(latency=args.latency)
+        start = time.perf_counter()
+        fn(client, tokens, args.token_interval)
+        elapsed = time.perf_counter() - start
+        rows.append((name, client.calls, client.entries, f"{elapsed:.3f}s"))
+
+    report(
+        f"{args.tokens} tokens/post, {args.latency * 1000:.0f} ms per PutEvents",
+        rows,
+        ("mode", "calls", "entries", "wall time"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Compare per-record latency of the agent and direct KB write paths.
+
+Both paths use stubs with configurable latency: the agent path pays for
+building the Strands agent once (``--construct-cost``) plus a model round
+trip per record (``--model-latency``) before the ingest call; the direct
+path only pays for the ingest call (``--ingest-latency``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from _support import report
+
+from kb_writer import DirectKnowledgeBaseWriter
+
+
+class StubBedrockAgentClient:
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+
+    def list_data_sources(self, **_):
+        return {"dataSourceSummaries": [{"dataSourceId": "ds"}]}
+
+    def get_data_source(self, **_):
+        return {"dataSource": {"dataSourceConfiguration": {"type": "CUSTOM"}}}
+
+    def ingest_knowledge_base_documents(self, documents, **_):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {"documentDetails": [{"status": "STARTING"} for _ in documents]}
+
+
+class StubAgentPath:
+    def __init__(self, client, construct_cost, model_latency):
+        self.client = client
+        self.construct_cost = construct_cost
+        self.model_latency = model_latency
+        self.agent = None
+
+    def store(self, text, metadata=None):
+        if self.agent is None:
+            time.sleep(self.construct_cost)
+            self.agent = object()
+        time.sleep(self.model_latency)
+        return self.client.ingest_knowledge_base_documents(documents=[text])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=50)
+    parser.add_argument("--construct-cost", type=float, default=0.2)
+    parser.add_argument("--model-latency", type=float, default=0.4)
+    parser.add_argument("--ingest-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    paths = {
+        "agent": StubAgentPath(
+            StubBedrockAgentClient(args.ingest_latency), args.construct_cost, args.model_latency
+        ),
+        "direct": DirectKnowledgeBaseWriter(StubBedrockAgentClient(args.ingest_latency), "kb"),
+    }
+
+    rows = []
+    for name, path in paths.items():
+        samples = []
+        for i in range(args.records):
+            start = time.perf_counter()
+            path.store(f"record {i}", metadata={"userId": "bench"})
+            samples.append(time.perf_counter() - start)
+        rows.append(
+            (
+                name,
+                f"{samples[0] * 1000:.1f} ms",
+                f"{statistics.median(samples) * 1000:.1f} ms",
+                f"{sum(samples):.2f}s",
+            )
+        )
+
+    report(
+        f"{args.records} records",
+        rows,
+        ("path", "first record", "p50 per record", "total"),
+    )
+
+
+if __name__ == "__main__":
+    main()
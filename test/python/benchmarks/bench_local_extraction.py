@@ -0,0 +1,114 @@
+"""
+Latency and cost per document: in-Lambda extraction vs the extract-text workflow.
+
+A local corpus of born-digital PDFs, a scanned PDF, ``.txt`` and ``.docx``
+files is extracted with :py:mod:`local_extract`.  The measured time is
+priced as Lambda compute at ``--memory-mb``.  The workflow column is a
+model of the Step Functions path each file took before, based on
+``workflow/extract_text_from_file_workflow.asl.json``:
+
+* PDFs: ``StartDocumentTextDetection``, then 10 s ``Wait`` /
+  ``GetDocumentTextDetection`` polls until Textract finishes
+  (``--textract-base`` + ``--textract-per-page`` seconds), priced per page
+  plus one state transition per state entered;
+* ``.txt`` / ``.docx``: ``DetectDocumentText`` rejects these formats, so the
+  workflow fails instead of extracting anything.
+
+A scanned PDF pays for the text-layer check *and* the workflow.  KB writes
+cost the same on both paths and are left out.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import time
+
+from _support import make_docx, make_pdf, report
+
+from local_extract import extract_text
+
+# us-east-1 list prices
+LAMBDA_GB_SECOND = 0.0000166667
+TEXTRACT_ASYNC_PAGE = 0.0015
+SFN_TRANSITION = 0.000025
+POLL_SECONDS = 10
+# NormalizeInput, ProcessFiles, RememberFile, DetectFileType, Start..., Pass, invoke agent
+FIXED_TRANSITIONS = 7
+# WaitForPDFConversion, GetDocumentTextDetection, IsPDFConversionComplete
+TRANSITIONS_PER_POLL = 3
+
+PARAGRAPH = "Quarterly revenue grew in every region while operating costs stayed flat year over year."
+
+
+def corpus() -> list[tuple[str, str, bytes, int]]:
+    def text_pdf(pages):
+        return make_pdf(["\n".join([f"Page {i}"] + [PARAGRAPH] * 30) for i in range(pages)])
+
+    return [
+        ("notes.txt", ".txt", ("\n".join([PARAGRAPH] * 200)).encode(), 1),
+        ("memo.docx", ".docx", make_docx([PARAGRAPH] * 200), 1),
+        ("brief.pdf", ".pdf", text_pdf(5), 5),
+        ("report.pdf", ".pdf", text_pdf(50), 50),
+        ("manual.pdf", ".pdf", text_pdf(200), 200),
+        ("scan.pdf", ".pdf", make_pdf([None] * 20), 20),
+    ]
+
+
+def workflow_model(extension: str, pages: int, args) -> tuple[float | None, float | None]:
+    """(seconds, dollars) of the extract-text workflow for one file."""
+    if extension != ".pdf":
+        return None, None
+    polls = max(1, math.ceil((args.textract_base + pages * args.textract_per_page) / POLL_SECONDS))
+    seconds = polls * POLL_SECONDS
+    cost = pages * TEXTRACT_ASYNC_PAGE + (FIXED_TRANSITIONS + polls * TRANSITIONS_PER_POLL) * SFN_TRANSITION
+    return seconds, cost
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--memory-mb", type=int, default=1769, help="1769 MB buys one full vCPU")
+    parser.add_argument("--workers", type=int, default=0, help="processes per PDF, 0 = CPU count")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--textract-base", type=float, default=5.0)
+    parser.add_argument("--textract-per-page", type=float, default=0.1)
+    args = parser.parse_args()
+
+    rows = []
+    for name, extension, data, pages in corpus():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            extraction = extract_text(data, extension, workers=args.workers or None)
+            timings.append(time.perf_counter() - start)
+        local_seconds = min(timings)
+        local_cost = local_seconds * args.memory_mb / 1024 * LAMBDA_GB_SECOND
+        flow_seconds, flow_cost = workflow_model(extension, pages, args)
+
+        if extraction is None:  # scanned: the check is paid on top of the workflow
+            path = "workflow"
+            seconds, cost = local_seconds + flow_seconds, local_cost + flow_cost
+        else:
+            path = "local"
+            seconds, cost = local_seconds, local_cost
+        rows.append(
+            (
+                name,
+                pages,
+                path,
+                f"{seconds * 1000:,.0f}",
+                f"${cost:.7f}",
+                "fails" if flow_seconds is None else f"{flow_seconds * 1000:,.0f}",
+                "-" if flow_cost is None else f"${flow_cost:.7f}",
+            )
+        )
+
+    report(
+        f"Per document, Lambda at {args.memory_mb} MB; workflow times are modelled",
+        rows,
+        ("document", "pages", "path now", "ms now", "cost now", "workflow ms", "workflow cost"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Input tokens and latency of bursts of agent calls, with and without prompt caching.
+
+Each scenario sends ``--calls`` prompts (``--concurrency`` at a time) through
+real Strands agents built like the deployed ones, on a
+:py:class:`_support.FakeConverseClient` in place of ``bedrock-runtime``:
+
+* ``post agent`` – ``index.py``'s social-media agent: system prompt only;
+* ``tool agent`` – an agent that converses with the ``use_llm`` and
+  ``memory`` tool definitions loaded (``agent_util.py``'s KB saver only
+  makes direct tool calls, which never reach the model);
+* ``post agent, long prompt`` – the post agent with its system prompt
+  grown to about ``--long-prompt-tokens`` (e.g. a brand guide).
+
+With caching on, the agents carry the checkpoints from
+:py:func:`bedrock_clients.cached_system_prompt` and
+``bedrock_model(cache_tools=True)``.
+Prefixes below ``--min-cache-tokens`` (1,024 for Claude 3.7 Sonnet) are
+never cached, exactly as on Bedrock.  "Billed input" weighs cache writes at
+1.25 and cache reads at 0.1 of an input token, as Bedrock prices them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from _support import FakeConverseClient, report
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("EVENT_BUS_NAME", "bench")
+os.environ.setdefault("STRANDS_KNOWLEDGE_BASE_ID", "bench")
+
+import agent_util  # noqa: E402
+import bedrock_clients  # noqa: E402
+import index  # noqa: E402
+from strands import Agent  # noqa: E402
+
+CACHE_WRITE_WEIGHT = 1.25
+CACHE_READ_WEIGHT = 0.1
+
+
+def scenarios(long_prompt_tokens: int):
+    from strands_tools import memory, use_llm
+
+    repeats = max(1, long_prompt_tokens * 4 // len(index.SYSTEM_PROMPT))
+    return [
+        ("post agent", index.SYSTEM_PROMPT, []),
+        ("tool agent", agent_util.SYSTEM_PROMPT, [use_llm, memory]),
+        ("post agent, long prompt", index.SYSTEM_PROMPT * repeats, []),
+    ]
+
+
+async def burst(args, system_prompt: str, tools: list, cache: bool) -> dict:
+    client = FakeConverseClient(
+        output_tokens=args.output_tokens,
+        base_latency=args.base_latency,
+        prefill_per_token=args.prefill_ms_per_1k / 1000 / 1000,
+        cached_per_token=args.prefill_ms_per_1k / 1000 / 1000 / 10,
+        min_cache_tokens=args.min_cache_tokens,
+    )
+    model = bedrock_clients.bedrock_model(
+        model_id=index.MODEL_ID, region_name="us-east-1", temperature=0.3, cache_tools=cache and bool(tools)
+    )
+    model.client = client
+    prompt = bedrock_clients.cached_system_prompt(system_prompt, enabled=cache)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies, usages = [], []
+
+    async def call(i: int) -> None:
+        async with semaphore:
+            agent = Agent(model=model, system_prompt=prompt, tools=tools, callback_handler=None)
+            start = time.perf_counter()
+            result = await agent.invoke_async(f"Write a post about launch week, day {i}")
+            latencies.append(time.perf_counter() - start)
+            usages.append(result.metrics.accumulated_usage)
+
+    await asyncio.gather(*(call(i) for i in range(args.calls)))
+    total = {key: sum(u.get(key, 0) for u in usages) for key in ("inputTokens", "cacheReadInputTokens", "cacheWriteInputTokens")}
+    return {
+        **total,
+        "hits": sum(1 for u in usages if u.get("cacheReadInputTokens")),
+        "billed": total["inputTokens"]
+        + CACHE_WRITE_WEIGHT * total["cacheWriteInputTokens"]
+        + CACHE_READ_WEIGHT * total["cacheReadInputTokens"],
+        "mean": statistics.fmean(latencies),
+        "p95": statistics.quantiles(latencies, n=20)[-1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--output-tokens", type=int, default=40)
+    parser.add_argument("--base-latency", type=float, default=0.15, help="seconds before any prefill")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=200.0, help="per 1k uncached input tokens")
+    parser.add_argument("--min-cache-tokens", type=int, default=1024)
+    parser.add_argument("--long-prompt-tokens", type=int, default=3000)
+    args = parser.parse_args()
+
+    rows = []
+    for name, system_prompt, tools in scenarios(args.long_prompt_tokens):
+        baseline = None
+        for cache in (False, True):
+            result = asyncio.run(burst(args, system_prompt, tools, cache))
+            baseline = baseline or result
+            rows.append(
+                (
+                    name,
+                    "on" if cache else "off",
+                    f"{result['hits']}/{args.calls}",
+                    f"{result['inputTokens']:,}",
+                    f"{result['cacheReadInputTokens']:,}",
+                    f"{result['cacheWriteInputTokens']:,}",
+                    f"{result['billed']:,.0f}",
+                    f"{result['billed'] / baseline['billed']:.0%}",
+                    f"{result['mean'] * 1000:.0f}",
+                    f"{result['p95'] * 1000:.0f}",
+                )
+            )
+
+    report(
+        f"{args.calls} calls per burst, {args.concurrency} concurrent, "
+        f"prefixes cached from {args.min_cache_tokens:,} tokens",
+        rows,
+        ("agent", "cache", "hits", "input", "cache read", "cache write", "billed input", "of off", "mean ms", "p95 ms"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Wall time of single ``CopyObject`` versus parallel ``UploadPartCopy``.
+
+The stub S3 client charges a fixed latency per call plus transfer time at
+``--mbps`` per request, so a single copy is bound by one stream while a
+multipart copy scales with ``--concurrency``.  Only needs the standard
+library.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from _support import StubS3Client, report
+from s3_copy import MB, copy_object
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", default="100,1024,4096")
+    parser.add_argument("--part-size-mb", type=int, default=128)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--mbps", type=float, default=2000.0, help="per-request copy rate (MB/s)")
+    parser.add_argument("--latency", type=float, default=0.03)
+    args = parser.parse_args()
+
+    rows = []
+    for size_mb in (int(s) for s in args.sizes_mb.split(",")):
+        sizes = {"uploads/video.mp4": size_mb * MB}
+        for mode, threshold in (("single", float("inf")), ("multipart", 0)):
+            s3 = StubS3Client(args.latency, sizes, bytes_per_second=args.mbps * MB)
+            start = time.perf_counter()
+            result = copy_object(
+                s3,
+                "bench-bucket",
+                "uploads/video.mp4",
+                "bench-bucket",
+                "processed/video.mp4",
+                threshold=threshold,
+                part_size=args.part_size_mb * MB,
+                concurrency=args.concurrency,
+            )
+            elapsed = time.perf_counter() - start
+            rows.append((f"{size_mb} MB", mode, result.get("parts", 1), sum(s3.calls.values()), f"{elapsed:.2f}s"))
+
+    report("server-side copy", rows, ("object", "mode", "parts", "AWS calls", "wall time"))
+
+
+if __name__ == "__main__":
+    main()
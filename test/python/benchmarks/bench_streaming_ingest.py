@@ -0,0 +1,110 @@
+"""
+Peak memory of chunking large ``.csv`` / ``.md`` uploads.
+
+"full-read" mirrors the old ``queue_processor`` path (``Body.read().decode()``
+then chunking the whole string); "streaming" uses ``iter_decoded_lines`` +
+``iter_chunks`` as ``KnowledgeBaseSaver.store_stream`` does.  Each run
+happens in a fresh process over a synthetic body generated on the fly, and
+reports the peak RSS increase over an idle interpreter.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import resource
+import time
+
+from _support import report
+
+MB = 1024 * 1024
+
+
+class SyntheticBody:
+    """Lazily generated CSV or markdown body of roughly *size* bytes."""
+
+    def __init__(self, size: int, kind: str) -> None:
+        self.size = size
+        self.kind = kind
+
+    def _lines(self):
+        produced = 0
+        i = 0
+        if self.kind == "csv":
+            header = "id,platform,title,body\n"
+            produced += len(header)
+            yield header
+        while produced < self.size:
+            if self.kind == "csv":
+                line = f"{i},LINKEDIN,Post {i},Ship faster with serverless – café edition {i}.\n"
+            else:
+                line = f"Paragraph {i} explains event-driven design. It has two sentences.\n\n"
+            produced += len(line)
+            i += 1
+            yield line
+
+    def iter_chunks(self, chunk_size: int):
+        buffer = bytearray()
+        for line in self._lines():
+            buffer += line.encode("utf-8")
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer[:chunk_size])
+                del buffer[:chunk_size]
+        if buffer:
+            yield bytes(buffer)
+
+    def read(self) -> bytes:
+        return b"".join(self.iter_chunks(1 * MB))
+
+
+def _run(mode: str, size: int, kind: str, queue) -> None:
+    from chunking import iter_chunks, iter_decoded_lines, split_document
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    body = SyntheticBody(size, kind)
+    start = time.perf_counter()
+    if mode == "streaming":
+        count = sum(1 for _ in iter_chunks(iter_decoded_lines(body), kind=kind))
+    else:
+        count = len(split_document(body.read().decode("utf-8", errors="replace"), kind=kind))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    queue.put((count, elapsed, peak * 1024))  # ru_maxrss is KiB on Linux
+
+
+def measure(mode: str, size: int, kind: str):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run, args=(mode, size, kind, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", default="10,100,1024")
+    parser.add_argument("--kind", choices=("csv", "text"), default="csv")
+    parser.add_argument(
+        "--max-full-read-mb",
+        type=int,
+        default=100,
+        help="skip the full-read mode above this size (it needs several GB at 1 GB)",
+    )
+    args = parser.parse_args()
+
+    rows = []
+    for size_mb in (int(s) for s in args.sizes_mb.split(",")):
+        modes = ["streaming"]
+        if size_mb <= args.max_full_read_mb:
+            modes.insert(0, "full-read")
+        for mode in modes:
+            count, elapsed, peak = measure(mode, size_mb * MB, args.kind)
+            rows.append((f"{size_mb} MB", mode, count, f"{elapsed:.1f}s", f"{peak / MB:.1f} MB"))
+
+    report(f"{args.kind} uploads", rows, ("file", "mode", "chunks", "time", "peak RSS +"))
+
+
+if __name__ == "__main__":
+    main()
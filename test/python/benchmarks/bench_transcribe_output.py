@@ -0,0 +1,84 @@
+"""
+Memory and latency of reading an hour-long Amazon Transcribe result.
+
+"json.loads" mirrors the old ``extract_text_handler`` path (download the
+whole object, parse it all); "transcript" is ``extract_transcript`` over a
+``RangedBody`` and stops after the transcript field; "segments" streams
+every item into time-aligned segments.  The stub S3 client charges a fixed
+latency per GET plus transfer time at ``--mbps``.  Peak memory is measured
+with ``tracemalloc`` in a separate run from the timing.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import time
+import tracemalloc
+
+from _support import report, transcribe_result
+from transcribe_output import RangedBody, extract_transcript, iter_segments
+
+MB = 1024 * 1024
+
+
+class StubS3:
+    def __init__(self, data: bytes, latency: float, bytes_per_second: float) -> None:
+        self.data = data
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+
+    def get_object(self, Bucket, Key, Range=None):
+        start, end = (0, len(self.data) - 1)
+        if Range:
+            start, end = map(int, Range.removeprefix("bytes=").split("-"))
+        piece = self.data[start : end + 1]
+        time.sleep(self.latency + len(piece) / self.bytes_per_second)
+        return {
+            "Body": io.BytesIO(piece),
+            "ContentRange": f"bytes {start}-{start + len(piece) - 1}/{len(self.data)}",
+        }
+
+
+def run(mode: str, s3: StubS3, range_size: int):
+    if mode == "json.loads":
+        data = json.loads(s3.get_object(Bucket="b", Key="k")["Body"].read())
+        return len(data["results"]["transcripts"][0]["transcript"]), len(s3.data)
+    body = RangedBody(s3, "b", "k", range_size=range_size)
+    if mode == "transcript":
+        return len(extract_transcript(body)), body.bytes_read
+    return sum(1 for _ in iter_segments(body)), body.bytes_read
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=int, default=60)
+    parser.add_argument("--range-kb", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.02, help="per GET (s)")
+    parser.add_argument("--mbps", type=float, default=80.0, help="transfer rate (MB/s)")
+    args = parser.parse_args()
+
+    data = transcribe_result(args.minutes)
+    rows = []
+    for mode in ("json.loads", "transcript", "segments"):
+        s3 = StubS3(data, args.latency, args.mbps * MB)
+        start = time.perf_counter()
+        result, fetched = run(mode, s3, args.range_kb * 1024)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        run(mode, StubS3(data, 0.0, float("inf")), args.range_kb * 1024)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows.append((mode, result, f"{fetched / MB:.1f} MB", f"{elapsed * 1000:.0f} ms", f"{peak / MB:.1f} MB"))
+
+    report(
+        f"{args.minutes}-minute transcript ({len(data) / MB:.1f} MB)",
+        rows,
+        ("mode", "chars/segments", "fetched", "latency", "peak alloc"),
+    )
+
+
+if __name__ == "__main__":
+    main()
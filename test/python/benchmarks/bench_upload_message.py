@@ -0,0 +1,144 @@
+"""
+Codec cost of the upload → queue message, per batch of bulk-import messages.
+
+Each round builds ``--messages`` uploads and measures both sides of the
+queue: encoding them as ``upload_processor`` does and decoding them (plus
+reading every field the router uses) as ``queue_processor`` does.  Compared:
+
+* ``v1 json`` – the previous message: a dict with redundant URIs and
+  document ID, ``json.dumps`` to send, ``json.loads`` to receive and another
+  ``json.dumps`` for the debug log line;
+* ``v2 json`` – :py:class:`upload_message.UploadMessage` on the stdlib codec;
+* ``v2 orjson`` – the same envelope on ``orjson``, as deployed.
+
+Reported per message: encode and decode time and SQS payload bytes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+from _support import report
+
+import upload_message
+from upload_message import UploadMessage
+
+
+def uploads(count: int) -> list[dict]:
+    return [
+        {
+            "bucket": "media-bucket",
+            "key": f"uploads/imports/2024-06/batch-{i // 1000:03d}/Quarterly report {i}.pdf",
+            "new_key": f"processed/{i:064x}.pdf",
+            "extension": ".pdf",
+            "idempotency_key": f"{i:064x}",
+            "content_type": "application/pdf",
+            "timestamp": 1718000000000 + i,
+        }
+        for i in range(count)
+    ]
+
+
+def encode_v1(upload: dict) -> str:
+    bucket, key, new_key = upload["bucket"], upload["key"], upload["new_key"]
+    return json.dumps(
+        {
+            "documentId": upload["idempotency_key"],
+            "idempotency_key": upload["idempotency_key"],
+            "original_key": key,
+            "key": new_key,
+            "extension": upload["extension"],
+            "content_type": upload["content_type"],
+            "bucket": bucket,
+            "s3_uri": f"s3://{bucket}/{new_key}",
+            "original_s3_uri": f"s3://{bucket}/{key}",
+            "timestamp": upload["timestamp"],
+        }
+    )
+
+
+def decode_v1(body: str) -> tuple:
+    message = json.loads(body)
+    json.dumps(message)  # the eager debug log line
+    return message["bucket"], message["key"], message.get("extension", ""), message.get("idempotency_key")
+
+
+def encode_v2(upload: dict) -> str:
+    return UploadMessage(
+        upload["bucket"],
+        upload["new_key"],
+        upload["key"],
+        upload["extension"],
+        idempotency_key=upload["idempotency_key"],
+        content_type=upload["content_type"],
+        timestamp=upload["timestamp"],
+    ).encode()
+
+
+def decode_v2(body: str) -> tuple:
+    message = UploadMessage.decode(body)
+    return message.bucket, message.key, message.extension, message.idempotency_key
+
+
+def measure(batch: list[dict], encode, decode, repeat: int) -> tuple[float, float, float]:
+    """Best (encode seconds, decode seconds) over *repeat* rounds, and mean payload bytes."""
+    encode_times, decode_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        bodies = [encode(upload) for upload in batch]
+        encoded = time.perf_counter()
+        for body in bodies:
+            decode(body)
+        encode_times.append(encoded - start)
+        decode_times.append(time.perf_counter() - encoded)
+    size = sum(len(body.encode()) for body in bodies) / len(bodies)
+    return min(encode_times), min(decode_times), size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    batch = uploads(args.messages)
+    fast_codec = upload_message.orjson
+    variants = [("v1 json", encode_v1, decode_v1, None), ("v2 json", encode_v2, decode_v2, None)]
+    if fast_codec is not None:
+        variants.append(("v2 orjson", encode_v2, decode_v2, fast_codec))
+
+    rows = []
+    baseline = None
+    for name, encode, decode, codec in variants:
+        upload_message.orjson = codec
+        try:
+            encode_s, decode_s, size = measure(batch, encode, decode, args.repeat)
+        finally:
+            upload_message.orjson = fast_codec
+        total = encode_s + decode_s
+        baseline = baseline or (total, size)
+        rows.append(
+            (
+                name,
+                f"{encode_s / len(batch) * 1e6:.2f}",
+                f"{decode_s / len(batch) * 1e6:.2f}",
+                f"{total * 1000:.1f}",
+                f"{baseline[0] / total:.2f}x",
+                f"{size:.0f}",
+                f"{size / baseline[1]:.0%}",
+            )
+        )
+
+    report(
+        f"{args.messages:,} messages, best of {args.repeat}",
+        rows,
+        ("codec", "encode µs/msg", "decode µs/msg", "batch ms", "speedup", "bytes/msg", "of v1"),
+    )
+    if fast_codec is None:
+        print("\norjson is not installed; only the stdlib codec was measured")
+
+
+if __name__ == "__main__":
+    main()
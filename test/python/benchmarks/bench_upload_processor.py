@@ -0,0 +1,58 @@
+"""
+Throughput of ``upload_processor`` for bulk uploads.
+
+"serial" replays the old behaviour (one ``copy_object`` and one
+``send_message`` per record, one after another); "handler" runs the real
+``lambda_handler`` (parallel copies + ``SendMessageBatch``).  Both talk to
+stub clients with fixed latency.  Requires the packages from
+``src/media_processing/requirements.txt``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import time
+
+from _support import StubS3Client, StubSqsClient, report, s3_put_event
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("QUEUE", "https://sqs.local/bench")
+os.environ.setdefault("BUCKET", "bench-bucket")
+
+import upload_processor  # noqa: E402
+
+
+def serial(keys, s3, sqs):
+    for key in keys:
+        s3.copy_object(CopySource={"Bucket": "bench-bucket", "Key": key}, Bucket="bench-bucket", Key=key)
+        sqs.send_message(QueueUrl="queue", MessageBody=key)
+
+
+def handler(keys, s3, sqs):
+    upload_processor.s3, upload_processor.sqs = s3, sqs
+    upload_processor.lambda_handler(s3_put_event(keys, "bench-bucket"), None)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--s3-latency", type=float, default=0.03)
+    parser.add_argument("--sqs-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    keys = [f"uploads/file-{i}.pdf" for i in range(args.files)]
+    rows = []
+    for name, fn in (("serial", serial), ("handler", handler)):
+        s3, sqs = StubS3Client(args.s3_latency), StubSqsClient(args.sqs_latency)
+        start = time.perf_counter()
+        fn(keys, s3, sqs)
+        elapsed = time.perf_counter() - start
+        calls = sum(s3.calls.values()) + sum(sqs.calls.values())
+        rows.append((name, calls, f"{elapsed:.2f}s", f"{args.files / elapsed:.0f} files/s"))
+
+    report(f"{args.files} uploaded files", rows, ("mode", "AWS calls", "wall time", "throughput"))
+
+
+if __name__ == "__main__":
+    main()
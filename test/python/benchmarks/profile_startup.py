@@ -0,0 +1,161 @@
+"""
+Cold-start profile of the Python Lambda handlers.
+
+Each handler module is imported in a fresh interpreter started with
+``-X importtime``, like a new Lambda container, and the script reports:
+
+* the wall time of the import and of the module body itself (the init
+  code at the top of the handler);
+* the import time broken down by top-level package (summed ``self``
+  times from ``-X importtime``, so the shares add up to the whole);
+* the first-use cost of every :py:class:`lazy.Lazy` object the module
+  defers, built one after the other in definition order.
+
+Every measurement is the best of ``--repeat`` fresh processes.  ``--json``
+prints the numbers instead of tables so a CI job can track regressions::
+
+    python test/python/benchmarks/profile_startup.py
+    python test/python/benchmarks/profile_startup.py queue_processor --top 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from _support import SRC, report
+
+# Handler module → bundle directory it is deployed from
+HANDLERS = {
+    "upload_processor": "media_processing",
+    "queue_processor": "media_processing",
+    "extract_text_handler": "media_processing",
+    "index": "agents_resolvers",
+    "invoke_agent": "agents_resolvers",
+}
+
+# Placeholders for the env vars the handlers read at import time
+ENV = {
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "POWERTOOLS_METRICS_NAMESPACE": "startup-profile",
+    "QUEUE": "https://sqs.us-east-1.amazonaws.com/123456789012/profile",
+    "BUCKET": "profile-bucket",
+    "STRANDS_KNOWLEDGE_BASE_ID": "kb-profile",
+    "EVENT_BUS_NAME": "profile-bus",
+    "AGENT_ID": "agent-profile",
+    "AGENT_ALIAS": "alias-profile",
+}
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+module = __import__(sys.argv[1])
+imported = time.perf_counter() - start
+try:
+    from lazy import Lazy
+except ImportError:
+    Lazy = ()
+lazies = {}
+for name, value in list(vars(module).items()):
+    if isinstance(value, Lazy):
+        value.get()
+        lazies[name] = value.build_seconds
+print(json.dumps({"import_s": imported, "lazy_s": lazies}))
+"""
+
+IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def profile_once(module: str) -> dict:
+    """Import *module* in a fresh interpreter and collect its timings."""
+    env = {**ENV, **os.environ, "PYTHONPATH": str(SRC / HANDLERS.get(module, "media_processing"))}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, module],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+        return {"module": module, "error": error}
+
+    packages: dict[str, float] = defaultdict(float)
+    body_s = 0.0
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if not match:
+            continue
+        self_us, _, indent, name = match.groups()
+        packages[name.split(".")[0]] += int(self_us) / 1e6
+        if name == module and not indent:
+            body_s = int(self_us) / 1e6
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {
+        "module": module,
+        "import_s": result["import_s"],
+        "body_s": body_s,
+        "lazy_s": result["lazy_s"],
+        "packages": dict(packages),
+    }
+
+
+def profile(module: str, repeat: int) -> dict:
+    runs = [profile_once(module) for _ in range(repeat)]
+    ok = [r for r in runs if "error" not in r]
+    if not ok:
+        return runs[0]
+    best = min(ok, key=lambda r: r["import_s"])
+    lazy_names = best["lazy_s"].keys()
+    best["lazy_s"] = {name: min(r["lazy_s"].get(name, float("inf")) for r in ok) for name in lazy_names}
+    return best
+
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=list(HANDLERS), help="handler modules to profile")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes per module (best is kept)")
+    parser.add_argument("--top", type=int, default=8, help="packages listed per module")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = [profile(module, args.repeat) for module in args.modules]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    rows = []
+    for r in results:
+        if "error" in r:
+            rows.append((r["module"], "-", "-", "-", r["error"]))
+            continue
+        lazies = ", ".join(f"{name} {ms(s)}" for name, s in r["lazy_s"].items()) or "-"
+        rows.append((r["module"], ms(r["import_s"]), ms(r["body_s"]), ms(sum(r["lazy_s"].values())), lazies))
+    report(
+        f"Cold start (Python {sys.version.split()[0]}, best of {args.repeat})",
+        rows,
+        ("module", "import", "module body", "first use", "deferred objects"),
+    )
+
+    for r in results:
+        if "error" in r:
+            continue
+        total = sum(r["packages"].values())
+        top = sorted(r["packages"].items(), key=lambda kv: kv[1], reverse=True)[: args.top]
+        report(
+            f"{r['module']}: import time by package",
+            [(name, ms(s), f"{s / total:.0%}") for name, s in top],
+            ("package", "self", "share"),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Shared pytest configuration for the Python Lambda sources.
+
+Each Lambda bundle under ``src/`` is deployed as a flat directory, so the
+modules import each other by bare name (``from agent_util import ...``).
+Mirror that here by putting every bundle directory on ``sys.path``, along
+with ``benchmarks/`` for its document and event generators (``_support``).
+A module shipped in more than one bundle (``lazy.py``, ``rate_limiter.py``,
+...) is a copy of the same file; ``unit/test_bundles.py`` fails when the
+copies differ.
+
+The end-to-end benchmarks in ``e2e/`` are marked ``e2e`` and only run with
+``--e2e``.
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[2] / "src"
+
+for bundle in ("agents_resolvers", "media_processing"):
+    path = str(SRC / bundle)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+# Tests reuse the generators and table printer of the standalone benchmarks
+BENCHMARKS = str(Path(__file__).resolve().parent / "benchmarks")
+if BENCHMARKS not in sys.path:
+    sys.path.insert(0, BENCHMARKS)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--e2e", action="store_true", help="run the end-to-end benchmarks in test/python/e2e"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "e2e: end-to-end benchmark, only run with --e2e")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--e2e"):
+        return
+    skip = pytest.mark.skip(reason="end-to-end benchmark; run with --e2e")
+    for item in items:
+        if "e2e" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture
+def lambda_context():
+    """Minimal Lambda context, as required by Powertools' ``inject_lambda_context``."""
+    return SimpleNamespace(
+        function_name="test-function",
+        memory_limit_in_mb=128,
+        invoked_function_arn="arn:aws:lambda:us-east-1:123456789012:function:test-function",
+        aws_request_id="test-request",
+    )
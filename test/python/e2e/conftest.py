@@ -0,0 +1,178 @@
+"""
+Fixtures for the end-to-end benchmarks of the Python Lambda handlers.
+
+The handlers run unmodified against moto's S3, SQS, Step Functions and
+EventBridge; Bedrock is replaced by the fakes in :py:mod:`fakes`.  Each
+benchmark is timed with ``pytest-benchmark`` and reports p50/p99 latency,
+throughput, AWS calls per invocation and the process' peak RSS::
+
+    python -m pytest test/python/e2e --e2e
+
+Load and latency are tuned with the ``E2E_*`` environment variables listed
+in :py:mod:`settings`.
+
+Save a run with ``--benchmark-save=<name>`` and compare later runs against
+it with ``--benchmark-compare`` to catch regressions; the extra columns are
+kept in each benchmark's ``extra_info``.
+"""
+
+from __future__ import annotations
+
+import os
+import resource
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+import pytest
+
+from settings import ROUNDS, WARMUP_ROUNDS
+
+ROOT = Path(__file__).resolve().parents[3]
+
+
+REGION = "us-east-1"
+BUCKET = "e2e-bucket"
+QUEUE = "e2e-queue"
+EVENT_BUS = "e2e-bus"
+ROLE_ARN = "arn:aws:iam::123456789012:role/e2e"
+FUNCTION_ARN = f"arn:aws:lambda:{REGION}:123456789012:function:e2e"
+WORKFLOWS = {
+    "extract_text": ROOT / "workflow" / "extract_text_from_file_workflow.asl.json",
+    "transcribe": ROOT / "workflow" / "transcribe_media_workflow.asl.json",
+}
+
+
+@dataclass
+class E2EResult:
+    name: str
+    p50_ms: float
+    p99_ms: float
+    throughput: float
+    unit: str
+    calls: Dict[str, float]
+    peak_rss_mb: float
+
+
+RESULTS: List[E2EResult] = []
+
+
+def percentile(data: List[float], q: float) -> float:
+    """Nearest-rank percentile of *data* (``q`` in 0–100)."""
+    ordered = sorted(data)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def peak_rss_mb() -> float:
+    """High-water mark of this process' resident set size."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    """moto-backed clients with the bucket, queue, state machines and bus created."""
+    moto = pytest.importorskip("moto")
+    import boto3
+
+    from fakes import AwsCallCounter
+
+    monkeypatch.setenv("AWS_DEFAULT_REGION", REGION)
+    with moto.mock_aws():
+        clients = SimpleNamespace(
+            s3=boto3.client("s3", region_name=REGION),
+            sqs=boto3.client("sqs", region_name=REGION),
+            sfn=boto3.client("stepfunctions", region_name=REGION),
+            events=boto3.client("events", region_name=REGION),
+        )
+        clients.s3.create_bucket(Bucket=BUCKET)
+        queue_url = clients.sqs.create_queue(QueueName=QUEUE)["QueueUrl"]
+        clients.events.create_event_bus(Name=EVENT_BUS)
+        state_machines = {}
+        for route, path in WORKFLOWS.items():
+            definition = path.read_text().replace("${FUNCTION_ARN}", FUNCTION_ARN)
+            state_machines[route] = clients.sfn.create_state_machine(
+                name=f"e2e-{route}", definition=definition, roleArn=ROLE_ARN
+            )["stateMachineArn"]
+
+        counter = AwsCallCounter()
+        counter.watch(clients.s3, clients.sqs, clients.sfn, clients.events)
+        yield SimpleNamespace(
+            **vars(clients),
+            bucket=BUCKET,
+            queue_url=queue_url,
+            event_bus=EVENT_BUS,
+            state_machines=state_machines,
+            calls=counter,
+        )
+
+
+@pytest.fixture
+def measure(benchmark, aws):
+    """
+    Time ``fn(*setup())`` over ``E2E_ROUNDS`` rounds and record the results.
+
+    ``setup`` runs before every round, outside the timing and without its
+    AWS calls being counted, so each round can use fresh objects and keys.
+    *items* is how many records / tokens one call handles, for throughput.
+    """
+
+    def run(
+        fn: Callable, setup: Callable[[], tuple] = tuple, *, items: int = 1, unit: str = "calls"
+    ) -> E2EResult:
+        def round_setup():
+            with aws.calls.paused():
+                return setup(), {}
+
+        aws.calls.reset()
+        benchmark.pedantic(
+            fn, setup=round_setup, rounds=ROUNDS, warmup_rounds=WARMUP_ROUNDS, iterations=1
+        )
+        data = benchmark.stats.stats.data
+        invocations = ROUNDS + WARMUP_ROUNDS
+        result = E2EResult(
+            name=benchmark.name,
+            p50_ms=percentile(data, 50) * 1000,
+            p99_ms=percentile(data, 99) * 1000,
+            throughput=items * len(data) / sum(data),
+            unit=f"{unit}/s",
+            calls={op: n / invocations for op, n in sorted(aws.calls.calls.items())},
+            peak_rss_mb=peak_rss_mb(),
+        )
+        benchmark.extra_info.update(
+            p50_ms=result.p50_ms,
+            p99_ms=result.p99_ms,
+            throughput=result.throughput,
+            throughput_unit=result.unit,
+            aws_calls_per_invocation=result.calls,
+            peak_rss_mb=result.peak_rss_mb,
+        )
+        RESULTS.append(result)
+        return result
+
+    return run
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not RESULTS:
+        return
+    headers = ("benchmark", "p50", "p99", "throughput", "AWS calls / invocation", "peak RSS")
+    rows = [
+        (
+            r.name,
+            f"{r.p50_ms:.1f} ms",
+            f"{r.p99_ms:.1f} ms",
+            f"{r.throughput:,.0f} {r.unit}",
+            ", ".join(f"{op} {n:.3g}" for op, n in r.calls.items()) or "-",
+            f"{r.peak_rss_mb:.0f} MB",
+        )
+        for r in RESULTS
+    ]
+    widths = [max(len(str(v)) for v in col) for col in zip(headers, *rows)]
+    terminalreporter.section("end-to-end benchmarks")
+    for row in (headers, *rows):
+        terminalreporter.write_line("  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
@@ -0,0 +1,161 @@
+"""
+Stand-ins for the services moto cannot emulate, plus an AWS call counter.
+
+* :py:class:`FakeStreamingModel` – Strands model that streams canned tokens
+  with a configurable time-to-first-token and inter-token latency.
+* :py:class:`FakeBedrockAgentClient` – ``bedrock-agent`` client for the
+  Knowledge Base's direct-ingestion calls.
+* :py:class:`FakeAgentRuntimeClient` – ``bedrock-agent-runtime`` client
+  whose ``invoke_agent`` streams a completion chunk by chunk.
+
+Every fake reports its calls to an :py:class:`AwsCallCounter`, which also
+counts the operations of real (moto-backed) boto3 clients.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+from strands.models import Model
+
+
+class AwsCallCounter:
+    """Count AWS operations as ``service.Operation`` while not paused."""
+
+    def __init__(self) -> None:
+        self.calls: Dict[str, int] = {}
+        self._paused = False
+        self._lock = threading.Lock()
+
+    def watch(self, *clients: Any) -> None:
+        """Count every operation the given boto3 *clients* send."""
+        for client in clients:
+            client.meta.events.register("before-call", self._before_call)
+
+    def _before_call(self, model, **_) -> None:
+        self.record(f"{model.service_model.service_name}.{model.name}")
+
+    def record(self, operation: str) -> None:
+        with self._lock:
+            if not self._paused:
+                self.calls[operation] = self.calls.get(operation, 0) + 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls.clear()
+
+    @contextmanager
+    def paused(self) -> Iterator[None]:
+        """Don't count the calls made inside the block (fixture setup)."""
+        self._paused = True
+        try:
+            yield
+        finally:
+            self._paused = False
+
+
+class FakeStreamingModel(Model):
+    """Strands model that streams *tokens* as one assistant text block."""
+
+    def __init__(
+        self,
+        tokens: list[str],
+        *,
+        first_token_latency: float = 0.0,
+        token_latency: float = 0.0,
+        counter: AwsCallCounter | None = None,
+    ) -> None:
+        self.tokens = tokens
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.counter = counter
+        self.config: Dict[str, Any] = {"model_id": "fake-model"}
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        if self.counter is not None:
+            self.counter.record("bedrock-runtime.ConverseStream")
+        start = time.perf_counter()
+        yield {"messageStart": {"role": "assistant"}}
+        yield {"contentBlockStart": {"start": {}}}
+        await asyncio.sleep(self.first_token_latency)
+        for i, token in enumerate(self.tokens):
+            if i and self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield {"contentBlockDelta": {"delta": {"text": token}}}
+        yield {"contentBlockStop": {}}
+        yield {"messageStop": {"stopReason": "end_turn"}}
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        yield {
+            "metadata": {
+                "usage": {
+                    "inputTokens": prompt_tokens,
+                    "outputTokens": len(self.tokens),
+                    "totalTokens": prompt_tokens + len(self.tokens),
+                },
+                "metrics": {"latencyMs": int((time.perf_counter() - start) * 1000)},
+            }
+        }
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        raise NotImplementedError("FakeStreamingModel only streams text")
+        yield  # pragma: no cover - makes this an async generator
+
+
+class FakeBedrockAgentClient:
+    """``bedrock-agent`` stand-in that accepts every ingested document."""
+
+    def __init__(self, counter: AwsCallCounter, latency: float = 0.0) -> None:
+        self.counter = counter
+        self.latency = latency
+
+    def list_data_sources(self, **_):
+        self.counter.record("bedrock-agent.ListDataSources")
+        return {"dataSourceSummaries": [{"dataSourceId": "ds-e2e"}]}
+
+    def get_data_source(self, **_):
+        self.counter.record("bedrock-agent.GetDataSource")
+        return {"dataSource": {"dataSourceConfiguration": {"type": "CUSTOM"}}}
+
+    def ingest_knowledge_base_documents(self, documents, **_):
+        self.counter.record("bedrock-agent.IngestKnowledgeBaseDocuments")
+        time.sleep(self.latency)
+        return {"documentDetails": [{"status": "STARTING"} for _ in documents]}
+
+
+class FakeAgentRuntimeClient:
+    """``bedrock-agent-runtime`` stand-in streaming *chunks* of a completion."""
+
+    def __init__(
+        self,
+        counter: AwsCallCounter,
+        chunks: list[str],
+        *,
+        first_chunk_latency: float = 0.0,
+        chunk_latency: float = 0.0,
+    ) -> None:
+        self.counter = counter
+        self.chunks = chunks
+        self.first_chunk_latency = first_chunk_latency
+        self.chunk_latency = chunk_latency
+
+    def invoke_agent(self, **_):
+        self.counter.record("bedrock-agent-runtime.InvokeAgent")
+        return {"completion": self._completion()}
+
+    def _completion(self):
+        time.sleep(self.first_chunk_latency)
+        for i, chunk in enumerate(self.chunks):
+            if i and self.chunk_latency:
+                time.sleep(self.chunk_latency)
+            yield {"chunk": {"bytes": chunk.encode("utf-8")}}
+        yield {"trace": {"trace": {}}}
@@ -0,0 +1,21 @@
+"""
+Load and latency of the end-to-end benchmarks, from environment variables.
+
+* ``E2E_ROUNDS`` / ``E2E_WARMUP_ROUNDS`` – timed and untimed rounds (20 / 2).
+* ``E2E_BATCH`` – S3 / SQS records per invocation (10).
+* ``E2E_TOKENS`` – tokens streamed by the fake model and agent (200).
+* ``E2E_FIRST_TOKEN_LATENCY`` / ``E2E_TOKEN_LATENCY`` – seconds (0.05 / 0.001).
+* ``E2E_BEDROCK_LATENCY`` – seconds per fake KB ingestion call (0.01).
+* ``E2E_TRANSCRIPT_MINUTES`` – length of the benchmarked transcript (10).
+"""
+
+import os
+
+ROUNDS = int(os.environ.get("E2E_ROUNDS", "20"))
+WARMUP_ROUNDS = int(os.environ.get("E2E_WARMUP_ROUNDS", "2"))
+BATCH = int(os.environ.get("E2E_BATCH", "10"))
+TOKENS = int(os.environ.get("E2E_TOKENS", "200"))
+FIRST_TOKEN_LATENCY = float(os.environ.get("E2E_FIRST_TOKEN_LATENCY", "0.05"))
+TOKEN_LATENCY = float(os.environ.get("E2E_TOKEN_LATENCY", "0.001"))
+BEDROCK_LATENCY = float(os.environ.get("E2E_BEDROCK_LATENCY", "0.01"))
+TRANSCRIPT_MINUTES = int(os.environ.get("E2E_TRANSCRIPT_MINUTES", "10"))
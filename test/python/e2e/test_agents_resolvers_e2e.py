@@ -0,0 +1,89 @@
+"""
+End-to-end benchmarks of the agent resolvers.
+
+``index.lambda_handler`` runs a real Strands ``Agent`` over
+:py:class:`fakes.FakeStreamingModel` and publishes the generated text to a
+moto event bus; ``invoke_agent.handler`` streams a fake Bedrock Agent
+completion to the same bus.  Throughput is in streamed tokens per second.
+"""
+
+import pytest
+
+pytest.importorskip("moto")
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("aws_lambda_powertools")
+pytest.importorskip("strands")
+
+from _support import fake_tokens  # noqa: E402
+from agent_pool import AgentPool  # noqa: E402
+from fakes import FakeAgentRuntimeClient, FakeStreamingModel  # noqa: E402
+from response_cache import InMemoryResponseStore, ResponseCache  # noqa: E402
+from settings import FIRST_TOKEN_LATENCY, TOKEN_LATENCY, TOKENS  # noqa: E402
+from strands import Agent  # noqa: E402
+
+pytestmark = pytest.mark.e2e
+
+
+def _index(aws, monkeypatch):
+    monkeypatch.setenv("POWERTOOLS_METRICS_NAMESPACE", "e2e")
+    monkeypatch.setenv("EVENT_BUS_NAME", aws.event_bus)
+    monkeypatch.setenv("STRANDS_KNOWLEDGE_BASE_ID", "kb-e2e")
+    import index
+
+    def build_agent(model_id, temperature, system_prompt):
+        model = FakeStreamingModel(
+            fake_tokens(TOKENS),
+            first_token_latency=FIRST_TOKEN_LATENCY,
+            token_latency=TOKEN_LATENCY,
+            counter=aws.calls,
+        )
+        return Agent(model=model, system_prompt=system_prompt, callback_handler=None)
+
+    monkeypatch.setattr(index, "client", aws.events)
+    monkeypatch.setattr(index, "EVENT_BUS_NAME", aws.event_bus)
+    monkeypatch.setattr(index, "agent_pool", AgentPool(build_agent))
+
+    return index
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["model", "cache_hit"])
+def test_index_lambda_handler(aws, measure, lambda_context, monkeypatch, cached):
+    index = _index(aws, monkeypatch)
+    monkeypatch.setattr(index, "response_cache", ResponseCache(InMemoryResponseStore()))
+    event = {"input": {"topic": "Launch week", "cache": cached}, "userId": "user-e2e"}
+    if cached:
+        with aws.calls.paused():
+            index.lambda_handler(event, lambda_context)
+
+    def run():
+        assert index.lambda_handler(event, lambda_context) == {"status": "success"}
+
+    result = measure(run, items=TOKENS, unit="tokens")
+    assert result.calls.get("bedrock-runtime.ConverseStream", 0) == (0 if cached else 1)
+    assert result.calls["events.PutEvents"] >= 1
+
+
+def test_invoke_agent_handler(aws, measure, lambda_context, monkeypatch):
+    monkeypatch.setenv("POWERTOOLS_METRICS_NAMESPACE", "e2e")
+    monkeypatch.setenv("AGENT_ID", "agent-e2e")
+    monkeypatch.setenv("AGENT_ALIAS", "alias-e2e")
+    import invoke_agent
+
+    runtime = FakeAgentRuntimeClient(
+        aws.calls,
+        fake_tokens(TOKENS),
+        first_chunk_latency=FIRST_TOKEN_LATENCY,
+        chunk_latency=TOKEN_LATENCY,
+    )
+    monkeypatch.setattr(invoke_agent, "bedrock_agent_runtime_client", runtime)
+    monkeypatch.setattr(invoke_agent, "events_client", aws.events)
+    monkeypatch.setattr(invoke_agent, "EVENT_BUS_NAME", aws.event_bus)
+    event = {"arguments": {"input": {"query": "Draft a launch post", "session_id": "s-e2e", "stream": True}}}
+
+    def run():
+        response = invoke_agent.handler(event, lambda_context)
+        assert response["response"] == "".join(runtime.chunks), response
+
+    result = measure(run, items=TOKENS, unit="tokens")
+    assert result.calls["bedrock-agent-runtime.InvokeAgent"] == 1
+    assert result.calls["events.PutEvents"] >= 1
@@ -0,0 +1,149 @@
+"""
+End-to-end benchmarks of the media-processing pipeline.
+
+``upload_processor`` copies fresh S3 uploads and enqueues them on a moto
+queue; ``queue_processor`` consumes those very messages, starting moto Step
+Functions executions and writing ``.md`` files to a fake Knowledge Base;
+``extract_text_handler`` ingests a Transcribe result stored in moto S3.
+"""
+
+import itertools
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("moto")
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("aws_lambda_powertools")
+pytest.importorskip("strands")
+
+from _support import s3_put_event, transcribe_result  # noqa: E402
+from agent_util import KnowledgeBaseSaver  # noqa: E402
+from fakes import FakeBedrockAgentClient  # noqa: E402
+from idempotency import InMemoryIdempotencyStore  # noqa: E402
+from settings import BATCH, BEDROCK_LATENCY, TRANSCRIPT_MINUTES  # noqa: E402
+
+pytestmark = pytest.mark.e2e
+
+MARKDOWN = "# Launch notes\n\n" + "Serverless pipelines scale with traffic. " * 200
+EXTENSIONS = (".pdf", ".mp4", ".md")
+
+
+@pytest.fixture
+def pipeline(aws, monkeypatch):
+    """Point the handlers at the moto clients and a fake Knowledge Base."""
+    # Imported here so the env they need at import time doesn't leak into
+    # the unit tests collected alongside
+    monkeypatch.setenv("POWERTOOLS_METRICS_NAMESPACE", "e2e")
+    monkeypatch.setenv("STRANDS_KNOWLEDGE_BASE_ID", "kb-e2e")
+    monkeypatch.setenv("QUEUE", aws.queue_url)
+    monkeypatch.setenv("BUCKET", aws.bucket)
+    import extract_text_handler
+    import queue_processor
+    import upload_processor
+
+    monkeypatch.setattr(upload_processor, "s3", aws.s3)
+    monkeypatch.setattr(upload_processor, "sqs", aws.sqs)
+    monkeypatch.setattr(upload_processor, "QUEUE", aws.queue_url)
+    monkeypatch.setattr(upload_processor, "BUCKET", aws.bucket)
+    monkeypatch.setattr(upload_processor, "idempotency", InMemoryIdempotencyStore())
+
+    saver = KnowledgeBaseSaver(
+        "kb-e2e",
+        write_mode="direct",
+        kb_client=FakeBedrockAgentClient(aws.calls, BEDROCK_LATENCY),
+        deduplicator=None,
+    )
+    monkeypatch.setattr(queue_processor, "s3_client", aws.s3)
+    monkeypatch.setattr(queue_processor, "sfn_client", aws.sfn)
+    monkeypatch.setattr(queue_processor, "saver", saver)
+    monkeypatch.setattr(queue_processor, "idempotency", InMemoryIdempotencyStore())
+    monkeypatch.setenv("EXTRACT_TEXT_STATE_MACHINE_ARN", aws.state_machines["extract_text"])
+    monkeypatch.setenv("TRANSCRIBE_MEDIA_STATE_MACHINE_ARN", aws.state_machines["transcribe"])
+
+    monkeypatch.setattr(extract_text_handler, "s3", aws.s3)
+    monkeypatch.setattr(extract_text_handler, "saver", saver)
+
+    uploads = itertools.count()
+
+    def upload(count, extensions=EXTENSIONS):
+        """Put *count* new objects under ``uploads/`` and return their S3 event."""
+        keys = []
+        for _ in range(count):
+            n = next(uploads)
+            extension = extensions[n % len(extensions)]
+            key = f"uploads/file-{n}{extension}"
+            body = MARKDOWN if extension == ".md" else os.urandom(1024)
+            aws.s3.put_object(Bucket=aws.bucket, Key=key, Body=body)
+            keys.append(key)
+        return s3_put_event(keys, aws.bucket)
+
+    def receive():
+        """Drain the queue into an SQS Lambda event."""
+        records = []
+        while True:
+            messages = aws.sqs.receive_message(QueueUrl=aws.queue_url, MaxNumberOfMessages=10)
+            if not messages.get("Messages"):
+                return {"Records": records}
+            for message in messages["Messages"]:
+                records.append(
+                    {"messageId": message["MessageId"], "body": message["Body"], "eventSource": "aws:sqs"}
+                )
+            aws.sqs.delete_message_batch(
+                QueueUrl=aws.queue_url,
+                Entries=[
+                    {"Id": str(i), "ReceiptHandle": m["ReceiptHandle"]}
+                    for i, m in enumerate(messages["Messages"])
+                ],
+            )
+
+    return SimpleNamespace(
+        upload_processor=upload_processor,
+        queue_processor=queue_processor,
+        extract_text_handler=extract_text_handler,
+        upload=upload,
+        receive=receive,
+    )
+
+
+def test_upload_processor(aws, pipeline, measure, lambda_context):
+    def run(event):
+        result = pipeline.upload_processor.lambda_handler(event, lambda_context)
+        assert result["processed"] == BATCH, result
+
+    measure(run, lambda: (pipeline.upload(BATCH),), items=BATCH, unit="records")
+
+
+def test_queue_processor(aws, pipeline, measure, lambda_context):
+    def setup():
+        pipeline.upload_processor.lambda_handler(pipeline.upload(BATCH), lambda_context)
+        return (pipeline.receive(),)
+
+    def run(event):
+        assert len(event["Records"]) == BATCH
+        result = pipeline.queue_processor.lambda_handler(event, lambda_context)
+        assert result == {"batchItemFailures": []}
+
+    result = measure(run, setup, items=BATCH, unit="records")
+    # One execution per state machine per batch, however many files it holds
+    assert result.calls["stepfunctions.StartExecution"] == len(aws.state_machines)
+
+
+@pytest.mark.parametrize("segment_seconds", [0, 30], ids=["transcript", "segments"])
+def test_extract_text_handler(aws, pipeline, measure, lambda_context, monkeypatch, segment_seconds):
+    handler = pipeline.extract_text_handler
+    monkeypatch.setattr(handler, "TRANSCRIPT_SEGMENT_SECONDS", segment_seconds)
+    transcript = transcribe_result(TRANSCRIPT_MINUTES)
+    transcripts = itertools.count()
+
+    def setup():
+        key = f"transcriptions/job-{next(transcripts)}.json"
+        aws.s3.put_object(Bucket=aws.bucket, Key=key, Body=transcript)
+        return ({"transcriptionFileUri": f"https://{aws.bucket}.s3.us-east-1.amazonaws.com/{key}"},)
+
+    result = measure(
+        lambda event: handler.lambda_handler(event, lambda_context), setup, unit="transcripts"
+    )
+    # The handler logs rather than raises, so check the transcript reached the KB
+    assert result.calls["bedrock-agent.IngestKnowledgeBaseDocuments"] >= 1
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+
+import pytest
+
+from agent_pool import AgentPool, get_event_loop, run_coroutine
+
+
+class FakeAgent:
+    def __init__(self, key):
+        self.key = key
+        self.messages = []
+
+
+def make_pool():
+    return AgentPool(lambda *key: FakeAgent(key))
+
+
+def test_warm_acquire_reuses_agent_for_same_key():
+    pool = make_pool()
+
+    with pool.acquire("model", 0.3, "prompt") as first:
+        pass
+    with pool.acquire("model", 0.3, "prompt") as second:
+        pass
+
+    assert first is second
+    assert (pool.created, pool.reused) == (1, 1)
+
+
+def test_different_keys_get_different_agents():
+    pool = make_pool()
+
+    with pool.acquire("model", 0.3, "prompt") as first:
+        pass
+    with pool.acquire("model", 0.7, "prompt") as second:
+        pass
+
+    assert first is not second
+    assert second.key == ("model", 0.7, "prompt")
+
+
+def test_conversation_is_reset_between_invocations():
+    pool = make_pool()
+
+    with pool.acquire("model", 0.3, "prompt") as agent:
+        agent.messages.append({"role": "user", "content": "topic"})
+
+    assert agent.messages == []
+
+
+def test_second_acquire_sees_clean_state_and_metrics():
+    strands = pytest.importorskip("strands")
+    from strands.models import BedrockModel
+
+    pool = AgentPool(
+        lambda model_id, temperature, prompt: strands.Agent(
+            model=BedrockModel(model_id=model_id, region_name="us-east-1"), system_prompt=prompt
+        )
+    )
+
+    with pool.acquire("model", 0.3, "prompt") as agent:
+        agent.state.set("caller", "user-1")
+        agent.event_loop_metrics.cycle_count = 3
+        agent.event_loop_metrics.traces.append(object())
+    with pool.acquire("model", 0.3, "prompt") as again:
+        assert again is agent
+        assert again.state.get() == {}
+        assert again.event_loop_metrics.cycle_count == 0
+        assert again.event_loop_metrics.traces == []
+        assert again.trace_span is None
+
+
+def test_concurrent_callers_never_share_an_agent():
+    pool = make_pool()
+
+    with pool.acquire("model", 0.3, "prompt") as first:
+        with pool.acquire("model", 0.3, "prompt") as second:
+            assert first is not second
+    assert pool.created == 2
+
+
+def test_agent_is_returned_even_when_invocation_fails():
+    pool = make_pool()
+
+    try:
+        with pool.acquire("model", 0.3, "prompt") as agent:
+            agent.messages.append("partial")
+            raise RuntimeError("stream failed")
+    except RuntimeError:
+        pass
+
+    with pool.acquire("model", 0.3, "prompt") as again:
+        assert again is agent
+        assert again.messages == []
+
+
+def test_run_coroutine_reuses_the_event_loop():
+    async def current_loop():
+        return asyncio.get_running_loop()
+
+    def in_fresh_thread():
+        # Mimic the Lambda runtime: a single thread with no running loop
+        loops.append(run_coroutine(current_loop()))
+        loops.append(run_coroutine(current_loop()))
+        assert get_event_loop() is loops[0]
+
+    loops = []
+    thread = threading.Thread(target=in_fresh_thread)
+    thread.start()
+    thread.join()
+
+    assert loops[0] is loops[1]
+    assert not loops[0].is_closed()
@@ -0,0 +1,213 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("strands")
+
+from agent_util import SYSTEM_PROMPT, KnowledgeBaseSaver  # noqa: E402
+from dedup import ContentDeduplicator, InMemoryLRUStore  # noqa: E402
+from rate_limiter import RateLimiter  # noqa: E402
+
+
+class FakeMemoryTool:
+    def __init__(self, fail_on=(), latency=0.0):
+        self.calls = []
+        self.fail_on = set(fail_on)
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def memory(self, **payload):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            self.calls.append(payload)
+            if payload["metadata"]["chunk_index"] in self.fail_on:
+                # Strands direct tool calls report failures, they do not raise
+                return {"status": "error", "content": [{"text": "Error: payload too large"}]}
+            return {"status": "success", "chunk": payload["metadata"]["chunk_index"]}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class FakeAgent:
+    def __init__(self, tool):
+        self.tool = tool
+
+
+def make_saver(tool, **kwargs):
+    return KnowledgeBaseSaver("kb-id", agent=FakeAgent(tool), **kwargs)
+
+
+def long_text(sentences=400):
+    return " ".join(f"Sentence {i} is part of a long transcript." for i in range(sentences))
+
+
+def test_store_document_tags_each_chunk_with_index_and_document_id():
+    tool = FakeMemoryTool()
+    saver = make_saver(tool)
+
+    results = saver.store_document(long_text(), document_id="doc-1", metadata={"userId": "u"}, max_tokens=128)
+
+    assert len(results) > 1
+    assert [r["chunk_index"] for r in results] == list(range(len(results)))
+    assert all(r["status"] == "success" and r["document_id"] == "doc-1" for r in results)
+    for call in tool.calls:
+        assert call["metadata"]["document_id"] == "doc-1"
+        assert call["metadata"]["userId"] == "u"
+        assert call["metadata"]["chunk_count"] == len(results)
+        assert call["STRANDS_KNOWLEDGE_BASE_ID"] == "kb-id"
+
+
+def test_store_document_is_bounded_by_max_workers():
+    tool = FakeMemoryTool(latency=0.01)
+    saver = make_saver(tool, max_workers=3)
+
+    results = saver.store_document(long_text(), max_tokens=64, overlap_tokens=0)
+
+    assert len(results) > 3
+    assert 1 < tool.max_in_flight <= 3
+
+
+def test_store_document_reports_failed_chunks_individually():
+    tool = FakeMemoryTool(fail_on={1})
+    saver = make_saver(tool)
+
+    results = saver.store_document(long_text(), max_tokens=128)
+
+    assert results[1]["status"] == "error"
+    assert "payload too large" in results[1]["error"]
+    assert all(r["status"] == "success" for i, r in enumerate(results) if i != 1)
+
+
+def test_writes_are_rate_limited_and_throttling_is_flagged():
+    class ThrottlingTool(FakeMemoryTool):
+        def memory(self, **payload):
+            if payload["metadata"]["chunk_index"] == 1:
+                return {
+                    "status": "error",
+                    "content": [{"text": "Error: An error occurred (ThrottlingException): Too many requests"}],
+                }
+            return super().memory(**payload)
+
+    limiter = RateLimiter(rate=1000, burst=100, backoff_base=0.001)
+    saver = make_saver(ThrottlingTool(), rate_limiter=limiter)
+
+    results = saver.store_document(long_text(), max_tokens=128)
+
+    assert results[1]["status"] == "error" and results[1]["throttled"]
+    assert not any(r.get("throttled") for i, r in enumerate(results) if i != 1)
+    stats = limiter.drain_stats()
+    assert (stats.acquired, stats.throttles) == (len(results), 1)
+
+
+def test_store_document_skips_chunks_already_ingested_for_user():
+    tool = FakeMemoryTool()
+    saver = make_saver(tool, deduplicator=ContentDeduplicator(InMemoryLRUStore()))
+    text = long_text()
+
+    first = saver.store_document(text, document_id="doc", metadata={"userId": "u"}, max_tokens=128)
+    calls_after_first = len(tool.calls)
+    second = saver.store_document(text, document_id="doc", metadata={"userId": "u"}, max_tokens=128)
+
+    assert all(r["status"] == "success" for r in first)
+    assert all(r["status"] == "skipped" for r in second)
+    assert len(tool.calls) == calls_after_first
+
+
+def test_text_shared_with_another_document_is_stored_again():
+    tool = FakeMemoryTool()
+    saver = make_saver(tool, deduplicator=ContentDeduplicator(InMemoryLRUStore()))
+    text = long_text()
+
+    saver.store_document(text, document_id="report-2024", metadata={"userId": "u"}, max_tokens=128)
+    later = saver.store_document(text, document_id="report-2025", metadata={"userId": "u"}, max_tokens=128)
+
+    assert all(r["status"] == "success" for r in later)
+    assert {call["metadata"]["document_id"] for call in tool.calls[-len(later):]} == {"report-2025"}
+
+
+def test_failed_chunks_are_not_remembered():
+    tool = FakeMemoryTool(fail_on={0})
+    saver = make_saver(tool, deduplicator=ContentDeduplicator(InMemoryLRUStore()))
+
+    first = saver.store_document("Only one chunk.", document_id="doc", metadata={"userId": "u"})
+    tool.fail_on.clear()
+    retry = saver.store_document("Only one chunk.", document_id="doc", metadata={"userId": "u"})
+
+    assert first[0]["status"] == "error" and not first[0].get("throttled")
+    assert retry[0]["status"] == "success"
+
+
+class FakeBedrockAgentClient:
+    def __init__(self):
+        self.documents = []
+
+    def list_data_sources(self, knowledgeBaseId, maxResults):
+        return {"dataSourceSummaries": [{"dataSourceId": "ds-1"}]}
+
+    def get_data_source(self, knowledgeBaseId, dataSourceId):
+        return {"dataSource": {"dataSourceConfiguration": {"type": "CUSTOM"}}}
+
+    def ingest_knowledge_base_documents(self, knowledgeBaseId, dataSourceId, documents):
+        self.documents.extend(documents)
+        return {"documentDetails": [{"status": "STARTING"} for _ in documents]}
+
+
+def test_direct_mode_writes_without_building_an_agent():
+    client = FakeBedrockAgentClient()
+    saver = KnowledgeBaseSaver("kb-id", write_mode="direct", kb_client=client)
+
+    result = saver.store_text("already extracted", metadata={"userId": "u"})
+
+    assert result["status"] == "success"
+    assert saver._agent is None
+    assert len(client.documents) == 1
+
+
+def test_direct_mode_can_be_selected_per_call():
+    tool = FakeMemoryTool()
+    client = FakeBedrockAgentClient()
+    saver = KnowledgeBaseSaver("kb-id", agent=FakeAgent(tool), kb_client=client)
+
+    saver.store_document(long_text(), max_tokens=128, direct=True)
+
+    assert tool.calls == []
+    assert len(client.documents) > 1
+
+
+def test_write_mode_defaults_to_environment(monkeypatch):
+    monkeypatch.setenv("KB_WRITE_MODE", "direct")
+
+    assert KnowledgeBaseSaver("kb-id").write_mode == "direct"
+
+
+def test_store_stream_stores_chunks_while_reading():
+    tool = FakeMemoryTool()
+    saver = make_saver(tool, max_workers=2)
+    consumed = []
+
+    def lines():
+        for i in range(2_000):
+            consumed.append(i)
+            yield f"Line {i} of a very large markdown upload."
+
+    results = saver.store_stream(lines(), document_id="doc", max_tokens=64, overlap_tokens=0)
+
+    assert len(consumed) == 2_000
+    assert [r["chunk_index"] for r in results] == list(range(len(results)))
+    assert all(r["status"] == "success" for r in results)
+    assert all("chunk_count" not in call["metadata"] for call in tool.calls)
+
+
+def test_saver_agent_has_no_prompt_cache_checkpoints(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    agent = KnowledgeBaseSaver("kb-id").agent
+
+    assert "cache_config" not in agent.model.get_config()
+    assert agent.system_prompt == SYSTEM_PROMPT
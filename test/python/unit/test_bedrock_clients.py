@@ -0,0 +1,173 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+
+import bedrock_clients  # noqa: E402
+
+CONVERSE_RESPONSE = json.dumps(
+    {
+        "output": {"message": {"role": "assistant", "content": [{"text": "ok"}]}},
+        "stopReason": "end_turn",
+        "usage": {"inputTokens": 1, "outputTokens": 1, "totalTokens": 2},
+        "metrics": {"latencyMs": 1},
+    }
+).encode()
+
+
+class StubBedrock(ThreadingHTTPServer):
+    """Keep-alive HTTP server answering every request with a Converse response."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), _Handler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.requests += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(CONVERSE_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(CONVERSE_RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    bedrock_clients.reset()
+    server = StubBedrock(latency=0.05)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    bedrock_clients.reset()
+
+
+def converse_in_bursts(client, workers, bursts):
+    """*bursts* rounds of *workers* simultaneous calls, like a batch of agents."""
+    request = {"modelId": "m", "messages": [{"role": "user", "content": [{"text": "hi"}]}]}
+    barrier = threading.Barrier(workers)
+
+    def call(_):
+        barrier.wait()
+        return client.converse(**request)
+
+    with ThreadPoolExecutor(workers) as pool:
+        for _ in range(bursts):
+            list(pool.map(call, range(workers)))
+
+
+def test_config_is_tuned():
+    config = bedrock_clients.client_config()
+
+    assert config.max_pool_connections == bedrock_clients.MAX_POOL_CONNECTIONS
+    assert config.retries == {"mode": "adaptive", "max_attempts": bedrock_clients.MAX_ATTEMPTS}
+    assert config.tcp_keepalive is True
+    assert bedrock_clients.client_config(read_timeout=5).read_timeout == 5
+
+
+def test_one_client_per_service_and_region(stub):
+    first = bedrock_clients.bedrock_client("bedrock-runtime", region_name="us-east-1")
+
+    assert bedrock_clients.bedrock_client("bedrock-runtime", region_name="us-east-1") is first
+    assert bedrock_clients.bedrock_client("bedrock-runtime", region_name="us-west-2") is not first
+
+
+def test_strands_models_share_the_client(stub):
+    pytest.importorskip("strands")
+    models = [
+        bedrock_clients.bedrock_model(model_id="m", region_name="us-east-1", endpoint_url=stub.url)
+        for _ in range(2)
+    ]
+
+    assert models[0].client is models[1].client
+    assert models[0].client is bedrock_clients.bedrock_client(
+        "bedrock-runtime", region_name="us-east-1", endpoint_url=stub.url
+    )
+
+
+def test_shared_pool_keeps_connections_across_bursts(stub):
+    workers, bursts = 24, 5
+    default = boto3.client("bedrock-runtime", region_name="us-east-1", endpoint_url=stub.url)
+    converse_in_bursts(default, workers, bursts)
+    default_connections, stub.connections = stub.connections, 0
+
+    shared = bedrock_clients.bedrock_client("bedrock-runtime", region_name="us-east-1", endpoint_url=stub.url)
+    converse_in_bursts(shared, workers, bursts)
+
+    assert stub.requests == 2 * workers * bursts
+    # The default pool keeps 10 connections, so later bursts reconnect the rest
+    assert stub.connections <= workers
+    assert default_connections > 2 * workers
+
+
+def test_prompt_cache_checkpoints_follow_the_tools_and_system_prompt(monkeypatch):
+    pytest.importorskip("strands")
+    from _support import FakeConverseClient
+    from strands import Agent, tool
+
+    @tool
+    def lookup(query: str) -> str:
+        """Look something up."""
+        return query
+
+    client = FakeConverseClient(base_latency=0, prefill_per_token=0, min_cache_tokens=100)
+    model = bedrock_clients.bedrock_model(model_id="anthropic.claude", region_name="us-east-1", cache_tools=True)
+    model.client = client
+    prompt = bedrock_clients.cached_system_prompt("You write posts. " * 50)
+    usages = [
+        Agent(model=model, system_prompt=prompt, tools=[lookup], callback_handler=None)(f"Topic {i}").metrics.accumulated_usage
+        for i in range(2)
+    ]
+
+    request = client.requests[0]
+    assert request["system"][-1] == {"cachePoint": {"type": "default"}}
+    assert request["toolConfig"]["tools"][-1] == {"cachePoint": {"type": "default"}}
+    assert request["messages"][-1]["content"][-1] == {"cachePoint": {"type": "default"}}
+    assert usages[0]["cacheWriteInputTokens"] > 0 and usages[0]["cacheReadInputTokens"] == 0
+    # The second call reads the shared prefix and writes only its own prompt
+    assert 0 < usages[1]["cacheWriteInputTokens"] < usages[1]["cacheReadInputTokens"]
+    assert usages[1]["cacheReadInputTokens"] + usages[1]["cacheWriteInputTokens"] == usages[0]["cacheWriteInputTokens"]
+
+
+def test_prompt_cache_can_be_turned_off(monkeypatch):
+    pytest.importorskip("strands")
+    monkeypatch.setattr(bedrock_clients, "PROMPT_CACHE", False)
+
+    assert bedrock_clients.cached_system_prompt("static") == "static"
+    assert bedrock_clients.cached_system_prompt("static", enabled=True)[-1] == {"cachePoint": {"type": "default"}}
+    model = bedrock_clients.bedrock_model(model_id="m", region_name="us-east-1", cache_tools=True)
+    assert not model.get_config().get("cache_config")
+    assert not model.get_config().get("cache_tools")
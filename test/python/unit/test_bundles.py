@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[3] / "src"
+
+BUNDLES = sorted({path.parent for path in SRC.glob("*/*.py")})
+
+
+def shared_modules():
+    """Module names that ship in more than one Lambda bundle."""
+    names = {}
+    for bundle in BUNDLES:
+        for module in bundle.glob("*.py"):
+            names.setdefault(module.name, []).append(bundle)
+    return sorted(name for name, bundles in names.items() if len(bundles) > 1)
+
+
+def test_known_shared_modules_are_discovered():
+    assert {"bedrock_clients.py", "lazy.py", "memory_table.py", "rate_limiter.py"} <= set(shared_modules())
+
+
+@pytest.mark.parametrize("name", shared_modules())
+def test_shared_module_copies_are_identical(name):
+    copies = {bundle.name: (bundle / name).read_text() for bundle in BUNDLES if (bundle / name).exists()}
+
+    assert len(set(copies.values())) == 1, f"{name} differs between bundles {sorted(copies)}"
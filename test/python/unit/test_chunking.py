@@ -0,0 +1,138 @@
+import io
+
+import pytest
+
+from chunking import estimate_tokens, iter_chunks, iter_decoded_lines, split_document
+
+
+def prose(sentences):
+    return " ".join(f"Sentence number {i} talks about serverless posts." for i in range(sentences))
+
+
+def test_short_document_is_a_single_chunk():
+    chunks = split_document("One sentence. Two sentences.")
+
+    assert [c.text for c in chunks] == ["One sentence. Two sentences."]
+    assert chunks[0].index == 0
+
+
+def test_chunks_respect_token_budget_and_sentence_boundaries():
+    chunks = split_document(prose(200), max_tokens=64, overlap_tokens=16)
+
+    assert len(chunks) > 1
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert estimate_tokens(chunk.text) <= 64
+        assert chunk.text.startswith("Sentence number")
+        assert chunk.text.endswith("posts.")
+
+
+def test_consecutive_chunks_overlap():
+    chunks = split_document(prose(50), max_tokens=64, overlap_tokens=16)
+
+    for previous, current in zip(chunks, chunks[1:]):
+        last_sentence = previous.text.rsplit("Sentence", 1)[1]
+        assert current.text.startswith("Sentence" + last_sentence)
+
+
+def test_no_overlap_reconstructs_the_document():
+    text = prose(50)
+
+    chunks = split_document(text, max_tokens=64, overlap_tokens=0)
+
+    assert " ".join(c.text for c in chunks) == text
+
+
+def test_csv_splits_on_rows_and_repeats_header():
+    rows = "\n".join(f"{i},post {i},LINKEDIN" for i in range(300))
+    text = "id,title,platform\n" + rows
+
+    chunks = split_document(text, kind="csv", max_tokens=100, overlap_tokens=0)
+
+    assert len(chunks) > 1
+    body_rows = []
+    for chunk in chunks:
+        lines = chunk.text.split("\n")
+        assert lines[0] == "id,title,platform"
+        assert estimate_tokens(chunk.text) <= 100
+        body_rows.extend(lines[1:])
+    assert body_rows == rows.split("\n")
+
+
+def test_oversized_sentence_is_hard_split():
+    text = "word " * 1000 + "x" * 5000
+
+    chunks = split_document(text, max_tokens=50, overlap_tokens=0)
+
+    assert all(estimate_tokens(c.text) <= 50 for c in chunks)
+    assert "".join(c.text.replace(" ", "") for c in chunks) == text.replace(" ", "")
+
+
+def test_invalid_overlap_is_rejected():
+    with pytest.raises(ValueError):
+        split_document("text", max_tokens=10, overlap_tokens=10)
+
+
+class ChunkedBody:
+    """Mimics botocore's StreamingBody.iter_chunks with tiny chunks."""
+
+    def __init__(self, data, size):
+        self.data = data
+        self.size = size
+
+    def iter_chunks(self, chunk_size):
+        for i in range(0, len(self.data), self.size):
+            yield self.data[i : i + self.size]
+
+
+def test_decoded_lines_survive_multibyte_characters_split_across_chunks():
+    text = "naïve café\nrésumé 🚀 launch\r\nlast line without newline"
+
+    lines = list(iter_decoded_lines(ChunkedBody(text.encode(), size=3)))
+
+    assert lines == ["naïve café", "résumé 🚀 launch", "last line without newline"]
+
+
+def test_decoded_lines_accept_plain_file_objects():
+    lines = list(iter_decoded_lines(io.BytesIO(b"a\nb\n"), chunk_size=1))
+
+    assert lines == ["a", "b"]
+
+
+def test_streaming_chunks_match_in_memory_split():
+    text = "\n\n".join(prose(20) for _ in range(5))
+    csv = "id,title\n" + "\n".join(f"{i},post {i}" for i in range(500))
+
+    for body, kind in ((text, "text"), (csv, "csv")):
+        streamed = list(
+            iter_chunks(iter_decoded_lines(ChunkedBody(body.encode(), 7)), kind=kind, max_tokens=80)
+        )
+        assert streamed == split_document(body, kind=kind, max_tokens=80)
+
+
+def test_streaming_is_lazy():
+    consumed = []
+
+    def lines():
+        for i in range(10_000):
+            consumed.append(i)
+            yield f"Line {i} of an endless transcript."
+
+    first = next(iter_chunks(lines(), max_tokens=32, overlap_tokens=0))
+
+    assert first.index == 0
+    assert len(consumed) < 20
+
+
+def test_text_without_blank_lines_or_punctuation_is_not_buffered_whole():
+    consumed = []
+
+    def lines():
+        for i in range(100_000):
+            consumed.append(i)
+            yield f"word {i} keeps going without any sentence or paragraph break"
+
+    first = next(iter_chunks(lines(), max_tokens=32, overlap_tokens=0))
+
+    assert estimate_tokens(first.text) <= 32
+    assert len(consumed) < 1_000
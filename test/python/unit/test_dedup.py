@@ -0,0 +1,96 @@
+from dedup import (
+    ContentDeduplicator,
+    InMemoryLRUStore,
+    TableDedupStore,
+    TieredDedupStore,
+    content_key,
+)
+from memory_table import InMemoryTable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_key_ignores_whitespace_differences_but_not_user_or_document():
+    assert content_key("Hello   world\n", "u1", "d1") == content_key(" Hello world", "u1", "d1")
+    assert content_key("Hello world", "u1", "d1") != content_key("Hello world", "u2", "d1")
+    assert content_key("Hello world", "u1", "d1") != content_key("Hello world", "u1", "d2")
+    assert content_key("Hello world", "u1", "d1") != content_key("Hello there", "u1", "d1")
+
+
+def test_remembered_text_is_a_duplicate_for_same_user_and_document_only():
+    dedup = ContentDeduplicator(InMemoryLRUStore())
+
+    assert not dedup.is_duplicate("chunk", "u1", "d1")
+    dedup.remember("chunk", "u1", "d1")
+
+    assert dedup.is_duplicate("chunk", "u1", "d1")
+    assert not dedup.is_duplicate("chunk", "u2", "d1")
+    assert not dedup.is_duplicate("chunk", "u1", "d2")
+    assert (dedup.hits, dedup.misses) == (1, 3)
+
+
+def test_lru_expires_entries_after_ttl():
+    clock = FakeClock()
+    store = InMemoryLRUStore(clock=clock)
+
+    store.add("k", ttl_seconds=60)
+    clock.now += 59
+    assert store.contains("k")
+    clock.now += 2
+    assert not store.contains("k")
+    assert len(store) == 0
+
+
+def test_lru_evicts_least_recently_used():
+    store = InMemoryLRUStore(max_entries=2)
+
+    store.add("a", 60)
+    store.add("b", 60)
+    store.contains("a")
+    store.add("c", 60)
+
+    assert store.contains("a")
+    assert not store.contains("b")
+    assert store.contains("c")
+
+
+def test_table_store_honours_ttl_attribute():
+    clock = FakeClock()
+    table = InMemoryTable()
+    store = TableDedupStore(table, clock=clock)
+
+    store.add("k", ttl_seconds=60)
+    assert table.items["KBDEDUP#k"]["expires_at"] == 1_060
+    assert store.contains("k")
+
+    # DynamoDB TTL deletion is lazy; expired items must not count
+    clock.now += 61
+    assert not store.contains("k")
+
+
+def test_tiered_store_backfills_the_lru_from_the_table():
+    lru = InMemoryLRUStore()
+    table_store = TableDedupStore(InMemoryTable())
+    table_store.add("k", 60)
+    tiered = TieredDedupStore(lru, table_store, ttl_seconds=60)
+
+    assert not lru.contains("k")
+    assert tiered.contains("k")
+    assert lru.contains("k")
+
+
+def test_tiered_store_writes_through_to_every_tier():
+    lru = InMemoryLRUStore()
+    table = InMemoryTable()
+    tiered = TieredDedupStore(lru, TableDedupStore(table))
+
+    tiered.add("k", 60)
+
+    assert lru.contains("k")
+    assert "KBDEDUP#k" in table.items
@@ -0,0 +1,325 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from event_publisher import (
+    AsyncEventPublisher,
+    MAX_BYTES_PER_CALL,
+    MAX_ENTRIES_PER_CALL,
+    CoalescingEventPublisher,
+    FlushTimer,
+    entry_size,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingClient:
+    def __init__(self, failures=None):
+        # failures: list of sets of entry indexes to reject, one per call
+        self.failures = list(failures or [])
+        self.batches = []
+
+    def put_events(self, Entries):
+        self.batches.append(list(Entries))
+        rejected = self.failures.pop(0) if self.failures else set()
+        return {
+            "FailedEntryCount": len(rejected),
+            "Entries": [
+                {"ErrorCode": "ThrottlingException"} if i in rejected else {"EventId": str(i)}
+                for i in range(len(Entries))
+            ],
+        }
+
+
+def details(batch):
+    return [json.loads(entry["Detail"]) for entry in batch]
+
+
+def make_publisher(client, **kwargs):
+    clock = kwargs.pop("clock", FakeClock())
+    return CoalescingEventPublisher(
+        client, "bus", clock=clock, sleep=lambda _: None, **kwargs
+    )
+
+
+def test_tokens_within_window_are_coalesced_into_one_entry():
+    client = RecordingClient()
+    publisher = make_publisher(client)
+
+    for token in ["Hello", ", ", "world"]:
+        publisher.add(token)
+    publisher.flush()
+
+    assert len(client.batches) == 1
+    assert details(client.batches[0]) == [{"input": "Hello, world", "sequence": 0}]
+
+
+def test_time_window_flushes_in_order_with_sequence_numbers():
+    client = RecordingClient()
+    clock = FakeClock()
+    publisher = make_publisher(client, clock=clock, flush_interval=0.1)
+
+    publisher.add("a")
+    clock.now = 0.05
+    publisher.add("b")
+    clock.now = 0.15
+    publisher.add("c")
+    publisher.add("d")
+    publisher.flush()
+
+    sent = [d for batch in client.batches for d in details(batch)]
+    assert sent == [{"input": "abc", "sequence": 0}, {"input": "d", "sequence": 1}]
+
+
+def test_byte_budget_closes_frames_and_packs_ten_per_call():
+    client = RecordingClient()
+    publisher = make_publisher(client, max_frame_bytes=4)
+
+    for _ in range(25):
+        publisher.add("abcd")
+    publisher.flush()
+
+    assert [len(batch) for batch in client.batches] == [10, 10, 5]
+    sequences = [d["sequence"] for batch in client.batches for d in details(batch)]
+    assert sequences == list(range(25))
+    assert all(len(batch) <= MAX_ENTRIES_PER_CALL for batch in client.batches)
+
+
+def test_calls_never_exceed_request_size_limit():
+    client = RecordingClient()
+    publisher = make_publisher(client, max_frame_bytes=100 * 1024)
+
+    for _ in range(5):
+        publisher.add("x" * 100 * 1024)
+    publisher.flush()
+
+    for batch in client.batches:
+        assert sum(entry_size(entry) for entry in batch) <= MAX_BYTES_PER_CALL
+
+
+def test_only_failed_entries_are_retried():
+    client = RecordingClient(failures=[{1, 3}])
+    publisher = make_publisher(client, max_frame_bytes=1)
+
+    for token in "abcde":
+        publisher.add(token)
+    publisher.flush()
+
+    assert len(client.batches) == 2
+    assert [d["input"] for d in details(client.batches[1])] == ["b", "d"]
+    assert publisher.entries_sent == 5
+    assert publisher.entries_retried == 2
+    assert publisher.entries_failed == 0
+
+
+def test_entries_are_dropped_after_max_retries():
+    client = RecordingClient(failures=[{0}, {0}, {0}])
+    publisher = make_publisher(client, max_retries=2)
+
+    publisher.add("lost")
+    publisher.flush()
+
+    assert len(client.batches) == 3
+    assert publisher.entries_failed == 1
+
+
+def test_each_put_events_call_latency_is_recorded():
+    clock = FakeClock()
+
+    class TimedClient(RecordingClient):
+        def put_events(self, Entries):
+            clock.now += 0.025
+            return super().put_events(Entries)
+
+    publisher = make_publisher(TimedClient(failures=[{0}]), clock=clock)
+    publisher.add("retried")
+    publisher.flush()
+
+    assert publisher.publish_latencies == [pytest.approx(0.025)] * 2
+
+
+def test_rejects_frame_budget_larger_than_call_limit():
+    with pytest.raises(ValueError):
+        CoalescingEventPublisher(RecordingClient(), "bus", max_frame_bytes=MAX_BYTES_PER_CALL)
+
+
+class SlowClient(RecordingClient):
+    def __init__(self, latency):
+        super().__init__()
+        self.latency = latency
+
+    def put_events(self, Entries):
+        time.sleep(self.latency)
+        return super().put_events(Entries)
+
+
+def test_async_publisher_does_not_block_the_event_loop():
+    client = SlowClient(latency=0.05)
+    publisher = AsyncEventPublisher(
+        CoalescingEventPublisher(client, "bus", max_frame_bytes=1, sleep=lambda _: None)
+    )
+
+    async def produce():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        tick_task = asyncio.create_task(ticker())
+        async with publisher:
+            start = time.perf_counter()
+            for token in "abcdefghij":
+                await publisher.publish(token)
+            produced_in = time.perf_counter() - start
+        tick_task.cancel()
+        return produced_in, ticks
+
+    produced_in, ticks = asyncio.run(produce())
+
+    # Producing never waits for the 10 x 50 ms of network time
+    assert produced_in < 0.05
+    assert ticks > 5
+    sent = [d["input"] for batch in client.batches for d in details(batch)]
+    assert "".join(sent) == "abcdefghij"
+
+
+def test_async_publisher_applies_backpressure_when_queue_is_full():
+    client = SlowClient(latency=0.02)
+    publisher = AsyncEventPublisher(
+        CoalescingEventPublisher(client, "bus", max_frame_bytes=1, sleep=lambda _: None),
+        max_pending=2,
+    )
+
+    async def produce():
+        async with publisher:
+            for token in "abcdef":
+                await publisher.publish(token)
+                assert publisher._queue.qsize() <= 2
+
+    asyncio.run(produce())
+    sent = [d["input"] for batch in client.batches for d in details(batch)]
+    assert sent == list("abcdef")
+
+
+def test_async_publisher_surfaces_worker_errors_on_drain():
+    class FailingClient:
+        def put_events(self, Entries):
+            raise RuntimeError("boom")
+
+    publisher = AsyncEventPublisher(CoalescingEventPublisher(FailingClient(), "bus"))
+
+    async def produce():
+        async with publisher:
+            await publisher.publish("token")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(produce())
+
+
+def test_extra_detail_fields_are_attached_to_every_frame():
+    client = RecordingClient()
+    publisher = make_publisher(client, detail={"session_id": "s-1"}, max_frame_bytes=1)
+
+    publisher.add("a")
+    publisher.add("b")
+    publisher.flush()
+
+    assert details(client.batches[0]) == [
+        {"session_id": "s-1", "input": "a", "sequence": 0},
+        {"session_id": "s-1", "input": "b", "sequence": 1},
+    ]
+
+
+def test_oversized_token_is_split_into_frames_within_budget():
+    client = RecordingClient()
+    publisher = make_publisher(client, max_frame_bytes=100 * 1024)
+
+    token = "x" * (300 * 1024)
+    publisher.add(token)
+    publisher.flush()
+
+    sent = [d["input"] for batch in client.batches for d in details(batch)]
+    assert "".join(sent) == token
+    assert all(len(text) <= 100 * 1024 for text in sent)
+    for batch in client.batches:
+        assert sum(entry_size(entry) for entry in batch) <= MAX_BYTES_PER_CALL
+
+
+def test_frame_budget_counts_json_escaping():
+    client = RecordingClient()
+    publisher = make_publisher(client, max_frame_bytes=1024)
+
+    # Each of these grows to 2, 6 and 12 bytes in the Detail JSON
+    for token in ['"' * 300, "é" * 300, "😀" * 300, "a\\n" * 100]:
+        publisher.add(token)
+    publisher.flush()
+
+    entries = [entry for batch in client.batches for entry in batch]
+    empty = len(json.dumps({"input": "", "sequence": len(entries)}))
+    assert all(len(entry["Detail"]) <= 1024 + empty for entry in entries)
+    assert "".join(d["input"] for d in details(entries)) == '"' * 300 + "é" * 300 + "😀" * 300 + "a\\n" * 100
+
+
+def test_async_publisher_does_not_hang_when_the_worker_dies_with_a_full_queue():
+    class FailingClient:
+        def put_events(self, Entries):
+            time.sleep(0.01)
+            raise RuntimeError("boom")
+
+    publisher = AsyncEventPublisher(
+        CoalescingEventPublisher(FailingClient(), "bus", flush_interval=0, sleep=lambda _: None),
+        max_pending=2,
+    )
+
+    async def produce():
+        publisher.start()
+        for token in "abcdefghij":
+            await publisher.publish(token)
+        await publisher.drain()
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(asyncio.wait_for(produce(), timeout=2))
+
+
+def test_async_publisher_flushes_when_the_window_expires_during_a_pause():
+    client = RecordingClient()
+    publisher = AsyncEventPublisher(CoalescingEventPublisher(client, "bus", flush_interval=0.05))
+
+    async def produce():
+        async with publisher:
+            await publisher.publish("before the tool call")
+            # The model pauses; no token arrives to trigger the window check
+            await asyncio.sleep(0.3)
+            published = len(client.batches)
+            await publisher.publish("after")
+        return published
+
+    assert asyncio.run(produce()) == 1
+    assert [d["input"] for batch in client.batches for d in details(batch)] == ["before the tool call", "after"]
+
+
+def test_flush_timer_publishes_buffered_text_while_the_producer_blocks():
+    client = RecordingClient()
+    publisher = CoalescingEventPublisher(client, "bus", flush_interval=0.05)
+
+    with FlushTimer(publisher):
+        publisher.add("buffered")
+        time.sleep(0.3)
+        published = len(client.batches)
+    publisher.flush()
+
+    assert published == 1
+    assert publisher.flush_due_in() is None
+    assert [d["input"] for batch in client.batches for d in details(batch)] == ["buffered"]
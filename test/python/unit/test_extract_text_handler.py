@@ -0,0 +1,102 @@
+import io
+import json
+import os
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("aws_lambda_powertools")
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("POWERTOOLS_METRICS_NAMESPACE", "test")
+os.environ.setdefault("STRANDS_KNOWLEDGE_BASE_ID", "kb-id")
+
+import extract_text_handler  # noqa: E402
+from lazy import Lazy  # noqa: E402
+from rate_limiter import RateLimiter  # noqa: E402
+
+URI = "https://media-bucket.s3.us-east-1.amazonaws.com/transcripts/clip.json"
+TRANSCRIPT = json.dumps({"results": {"transcripts": [{"transcript": "Hello from the launch video."}]}}).encode()
+
+
+class FakeS3:
+    def get_object(self, Bucket, Key, Range):
+        start, end = map(int, Range.removeprefix("bytes=").split("-"))
+        piece = TRANSCRIPT[start : end + 1]
+        return {"Body": io.BytesIO(piece), "ContentRange": f"bytes {start}-{end}/{len(TRANSCRIPT)}"}
+
+
+class FakeSaver:
+    def __init__(self, results):
+        self.results = results
+        self.documents = []
+        self.calls = []
+
+    def store_document(self, text, **kwargs):
+        self.documents.append(text)
+        self.calls.append(kwargs)
+        # What the rate-limited saver does for every chunk it writes
+        extract_text_handler.rate_limiter.acquire("kb")
+        return self.results
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    emitted = {}
+    monkeypatch.setattr(extract_text_handler, "s3", FakeS3())
+    monkeypatch.setattr(extract_text_handler, "rate_limiter", Lazy(lambda: RateLimiter(rate=100, burst=10)))
+    monkeypatch.setattr(
+        extract_text_handler.metrics,
+        "add_metric",
+        lambda name, unit, value: emitted.__setitem__(name, emitted.get(name, 0) + value),
+    )
+
+    def run(results, lambda_context, event=None):
+        saver = FakeSaver(results)
+        monkeypatch.setattr(extract_text_handler, "saver", saver)
+        extract_text_handler.lambda_handler(event or {"transcriptionFileUri": URI}, lambda_context)
+        return saver
+
+    run.emitted = emitted
+    return run
+
+
+def test_transcript_is_stored_with_chunk_and_limiter_metrics(handler, lambda_context):
+    saver = handler(
+        [{"chunk_index": 0, "status": "success"}, {"chunk_index": 1, "status": "skipped"}], lambda_context
+    )
+
+    assert saver.documents == ["Hello from the launch video."]
+    assert handler.emitted["KBChunksStored"] == 1
+    assert handler.emitted["KBChunksSkipped"] == 1
+    assert handler.emitted["KBChunksThrottled"] == 0
+    assert handler.emitted["RateLimitAcquired"] == 1
+
+
+def test_failed_chunks_fail_the_task_so_the_state_machine_retries(handler, lambda_context):
+    results = [
+        {"chunk_index": 0, "status": "success"},
+        {"chunk_index": 1, "status": "error", "throttled": True},
+    ]
+
+    with pytest.raises(extract_text_handler.ChunksNotStored, match=r"\[1\]"):
+        handler(results, lambda_context)
+
+    assert handler.emitted["KBChunksThrottled"] == 1
+    assert handler.emitted["RateLimitAcquired"] == 1
+
+
+def test_textract_output_from_the_workflow_is_stored(handler, lambda_context):
+    event = {"text": "Line one\nLine two", "bucket": "media-bucket", "key": "uploads/scan.pdf"}
+
+    saver = handler([{"chunk_index": 0, "status": "success"}], lambda_context, event)
+
+    assert saver.documents == ["Line one\nLine two"]
+    assert saver.calls[0]["document_id"] == "uploads/scan.pdf"
+    assert handler.emitted["KBChunksStored"] == 1
+
+
+def test_saver_is_rate_limited():
+    saver = extract_text_handler.saver._factory()
+
+    assert saver.rate_limiter is extract_text_handler.rate_limiter
@@ -0,0 +1,115 @@
+import pytest
+
+from idempotency import (
+    CLAIMED,
+    STATUS_COMPLETED,
+    STATUS_IN_PROGRESS,
+    InMemoryIdempotencyStore,
+    TableIdempotencyStore,
+    execution_name,
+    idempotency_key,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ConditionalCheckFailed(Exception):
+    def __init__(self, item=None):
+        self.response = {"Error": {"Code": "ConditionalCheckFailedException"}}
+        if item is not None:
+            # As DynamoDB returns it: low-level attribute values
+            self.response["Item"] = {k: {"S": str(v)} for k, v in item.items()}
+
+
+class ConditionalTable:
+    """DynamoDB Table stand-in that honours the store's claim condition."""
+
+    def __init__(self, return_old_items=True):
+        self.items = {}
+        self.return_old_items = return_old_items
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeValues=None, **kwargs):
+        existing = self.items.get(Item["pk"])
+        if ConditionExpression and existing and existing["expires_at"] >= ExpressionAttributeValues[":now"]:
+            returned = self.return_old_items and kwargs.get("ReturnValuesOnConditionCheckFailure") == "ALL_OLD"
+            raise ConditionalCheckFailed(existing if returned else None)
+        self.items[Item["pk"]] = dict(Item)
+        return {}
+
+    def get_item(self, Key, ConsistentRead=False):
+        item = self.items.get(Key["pk"])
+        return {"Item": dict(item)} if item else {}
+
+    def delete_item(self, Key):
+        self.items.pop(Key["pk"], None)
+        return {}
+
+
+def test_key_depends_on_bucket_key_and_etag():
+    key = idempotency_key("bucket", "uploads/a.pdf", '"abc"')
+
+    assert key == idempotency_key("bucket", "uploads/a.pdf", "abc")
+    assert key != idempotency_key("bucket", "uploads/a.pdf", "abd")
+    assert key != idempotency_key("other", "uploads/a.pdf", "abc")
+    assert len(key) == 32
+
+
+def test_execution_name_is_order_independent_and_valid():
+    assert execution_name(["k1"]) == "k1"
+    assert execution_name(["k1", "k2"]) == execution_name(["k2", "k1"])
+    assert execution_name(["k1", "k2"]) != execution_name(["k1", "k3"])
+    assert len(execution_name([f"k{i}" for i in range(100)])) <= 80
+
+
+@pytest.fixture(params=["memory", "table", "table without ALL_OLD"])
+def store_and_clock(request):
+    clock = Clock()
+    if request.param == "memory":
+        store = InMemoryIdempotencyStore(ttl_seconds=100, lock_seconds=10, clock=clock)
+    else:
+        table = ConditionalTable(return_old_items=request.param == "table")
+        store = TableIdempotencyStore(table, ttl_seconds=100, lock_seconds=10, clock=clock)
+    return store, clock
+
+
+def test_second_claim_sees_it_in_progress_until_released(store_and_clock):
+    store, _ = store_and_clock
+
+    assert store.claim("k") == CLAIMED
+    assert store.claim("k") == STATUS_IN_PROGRESS
+    store.release("k")
+    assert store.claim("k") == CLAIMED
+
+
+def test_completed_claim_is_kept_for_the_ttl(store_and_clock):
+    store, clock = store_and_clock
+    store.claim("k")
+    store.complete("k")
+
+    clock.now += 50
+    assert store.claim("k") == STATUS_COMPLETED
+    clock.now += 51
+    assert store.claim("k") == CLAIMED
+
+
+def test_abandoned_claim_lapses_after_the_lock_period(store_and_clock):
+    store, clock = store_and_clock
+    store.claim("k")
+
+    clock.now += 11
+    assert store.claim("k") == CLAIMED
+
+
+def test_table_store_propagates_other_errors():
+    class Broken(ConditionalTable):
+        def put_item(self, **_):
+            raise RuntimeError("ProvisionedThroughputExceeded")
+
+    with pytest.raises(RuntimeError):
+        TableIdempotencyStore(Broken()).claim("k")
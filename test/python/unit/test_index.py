@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("aws_lambda_powertools")
+pytest.importorskip("strands")
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("POWERTOOLS_METRICS_NAMESPACE", "test")
+os.environ.setdefault("EVENT_BUS_NAME", "bus")
+os.environ.setdefault("STRANDS_KNOWLEDGE_BASE_ID", "kb-id")
+
+import index  # noqa: E402
+from agent_pool import run_coroutine  # noqa: E402
+from rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, RateLimiter  # noqa: E402
+from response_cache import InMemoryResponseStore, ResponseCache  # noqa: E402
+
+
+class RecordingClient:
+    def __init__(self):
+        self.entries = []
+
+    def put_events(self, Entries):
+        self.entries.extend(Entries)
+        return {"FailedEntryCount": 0, "Entries": [{} for _ in Entries]}
+
+
+class FakeAgent:
+    """Replays Strands ``stream_async`` events."""
+
+    def __init__(self, events):
+        self.events = events
+
+    async def stream_async(self, prompt):
+        for event in self.events:
+            yield event
+
+
+@pytest.fixture(autouse=True)
+def response_cache(monkeypatch):
+    cache = ResponseCache(InMemoryResponseStore())
+    monkeypatch.setattr(index, "response_cache", cache)
+    return cache
+
+
+class Pool:
+    def __init__(self, events):
+        self.events = events
+        self.acquired = 0
+
+    def acquire(self, *key):
+        from contextlib import nullcontext
+
+        self.acquired += 1
+        return nullcontext(FakeAgent(self.events))
+
+
+def tool_delta(tool_use_id):
+    return {"current_tool_use": {"toolUseId": tool_use_id, "name": "memory", "input": "{"}}
+
+
+EVENTS = [
+    {"data": "Ship "},
+    tool_delta("t-1"),
+    tool_delta("t-1"),
+    {"data": "it."},
+    {"event": {"metadata": {"usage": {"inputTokens": 800, "outputTokens": 3}}}},
+]
+
+
+def test_streaming_publishes_text_and_collects_stats(monkeypatch):
+    client = RecordingClient()
+    monkeypatch.setattr(index, "client", client)
+
+    stats = run_coroutine(index.process_streaming_response(FakeAgent(EVENTS), "topic"))
+
+    text = "".join(json.loads(e["Detail"])["input"] for e in client.entries)
+    assert text == "Ship it."
+    assert stats.chunks == 2
+    assert stats.tokens == 3
+    assert stats.tool_uses == 1
+    assert len(stats.publish_latencies) == 1
+
+
+def test_handler_emits_stream_metrics(monkeypatch, lambda_context):
+    emitted = []
+    monkeypatch.setattr(index, "client", RecordingClient())
+    monkeypatch.setattr(index, "agent_pool", Pool(EVENTS))
+    monkeypatch.setattr(index, "emit_stream_metrics", lambda metrics, stats: emitted.append(stats))
+
+    assert index.lambda_handler({"input": {"topic": "Launch"}}, lambda_context) == {"status": "success"}
+    assert [s.tokens for s in emitted] == [3]
+
+
+def test_strands_is_not_forced_to_debug():
+    assert logging.getLogger("strands").level >= logging.INFO
+
+
+def test_batch_tags_events_with_topic_and_platform(monkeypatch, lambda_context):
+    client = RecordingClient()
+    monkeypatch.setattr(index, "client", client)
+    monkeypatch.setattr(index, "agent_pool", Pool(EVENTS))
+
+    event = {"input": {"topics": [{"id": "t-1", "topic": "Launch"}, "Pricing"], "platforms": ["x", "linkedin"]}}
+    response = index.lambda_handler(event, lambda_context)
+
+    assert response["status"] == "success"
+    assert [(r["topic_id"], r["platform"]) for r in response["results"]] == [
+        ("t-1", "x"), ("t-1", "linkedin"), ("1", "x"), ("1", "linkedin"),
+    ]
+    details = [json.loads(e["Detail"]) for e in client.entries]
+    text = {}
+    for detail in details:
+        key = (detail["topic_id"], detail["platform"])
+        text[key] = text.get(key, "") + detail["input"]
+    assert set(text.values()) == {"Ship it."} and len(text) == 4
+
+
+def test_cache_hit_replays_the_same_events_without_the_model(monkeypatch, lambda_context, response_cache):
+    pool = Pool(EVENTS)
+    monkeypatch.setattr(index, "agent_pool", pool)
+    streams = []
+    for topic in ("Launch week", "launch  week", "Launch week"):
+        client = RecordingClient()
+        monkeypatch.setattr(index, "client", client)
+        index.lambda_handler({"input": {"topic": topic}, "userId": "user-1"}, lambda_context)
+        streams.append([json.loads(e["Detail"]) for e in client.entries])
+
+    assert pool.acquired == 1
+    assert streams[1] == streams[2] == streams[0] == [{"input": "Ship it.", "sequence": 0}]
+    assert (response_cache.exact_hits, response_cache.normalized_hits) == (1, 1)
+
+
+def test_cached_posts_are_not_shared_between_users(monkeypatch, lambda_context, response_cache):
+    pool = Pool(EVENTS)
+    monkeypatch.setattr(index, "agent_pool", pool)
+    monkeypatch.setattr(index, "client", RecordingClient())
+
+    for user_id in ("user-1", "user-2", "user-1"):
+        index.lambda_handler({"input": {"topic": "Launch week"}, "userId": user_id}, lambda_context)
+
+    assert pool.acquired == 2
+    assert response_cache.exact_hits == 1
+
+
+def test_requests_without_a_user_bypass_the_cache(monkeypatch, lambda_context, response_cache):
+    pool = Pool(EVENTS)
+    monkeypatch.setattr(index, "agent_pool", pool)
+    monkeypatch.setattr(index, "client", RecordingClient())
+
+    for _ in range(2):
+        index.lambda_handler({"input": {"topic": "Launch week"}}, lambda_context)
+
+    assert pool.acquired == 2
+    assert response_cache.misses == 0
+
+
+def test_cache_can_be_bypassed(monkeypatch, lambda_context):
+    pool = Pool(EVENTS)
+    monkeypatch.setattr(index, "agent_pool", pool)
+    monkeypatch.setattr(index, "client", RecordingClient())
+
+    for _ in range(2):
+        index.lambda_handler({"input": {"topic": "Launch", "cache": False}, "userId": "user-1"}, lambda_context)
+
+    assert pool.acquired == 2
+
+
+def test_model_calls_are_admitted_by_priority(monkeypatch, lambda_context):
+    class RecordingLimiter(RateLimiter):
+        def __init__(self):
+            super().__init__()
+            self.admitted = []
+
+        async def acquire_async(self, key, priority=PRIORITY_BACKGROUND, **kwargs):
+            self.admitted.append((key, priority))
+            return await super().acquire_async(key, priority, **kwargs)
+
+    limiter = RecordingLimiter()
+    monkeypatch.setattr(index, "rate_limiter", limiter)
+    monkeypatch.setattr(index, "agent_pool", Pool(EVENTS))
+    monkeypatch.setattr(index, "client", RecordingClient())
+
+    index.lambda_handler({"input": {"topic": "Launch"}}, lambda_context)
+    index.lambda_handler({"input": {"topics": ["Roadmap", "Pricing"]}}, lambda_context)
+
+    assert limiter.admitted == [
+        (index.MODEL_ID, PRIORITY_INTERACTIVE), (index.MODEL_ID, PRIORITY_BACKGROUND), (index.MODEL_ID, PRIORITY_BACKGROUND),
+    ]
@@ -0,0 +1,121 @@
+import json
+import os
+import time
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("aws_lambda_powertools")
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AGENT_ID", "agent")
+os.environ.setdefault("AGENT_ALIAS", "alias")
+os.environ.setdefault("POWERTOOLS_METRICS_NAMESPACE", "test")
+
+import invoke_agent  # noqa: E402
+from event_publisher import CoalescingEventPublisher  # noqa: E402
+from stream_metrics import StreamStats  # noqa: E402
+
+
+class RecordingClient:
+    def __init__(self):
+        self.batches = []
+
+    def put_events(self, Entries):
+        self.batches.append(list(Entries))
+        return {"FailedEntryCount": 0, "Entries": [{} for _ in Entries]}
+
+
+def completion(*parts):
+    return [{"chunk": {"bytes": part}} for part in parts] + [{"trace": {}}]
+
+
+def test_chunks_are_concatenated_without_spurious_spaces():
+    text = invoke_agent.collect_completion(completion(b"Hel", b"lo, wor", b"ld"))
+
+    assert text == "Hello, world"
+
+
+def test_multibyte_characters_split_across_chunks_are_preserved():
+    encoded = "café 🚀".encode()
+
+    text = invoke_agent.collect_completion(completion(encoded[:4], encoded[4:8], encoded[8:]))
+
+    assert text == "café 🚀"
+
+
+def test_streaming_forwards_first_chunk_immediately_then_frames():
+    client = RecordingClient()
+    publisher = CoalescingEventPublisher(
+        client, "bus", detail={"session_id": "s-1"}, flush_interval=60
+    )
+
+    text = invoke_agent.collect_completion(completion(b"one ", b"two ", b"three"), publisher)
+
+    frames = [json.loads(e["Detail"]) for batch in client.batches for e in batch]
+    assert text == "one two three"
+    assert frames[0] == {"session_id": "s-1", "input": "one ", "sequence": 0}
+    assert "".join(f["input"] for f in frames) == text
+
+
+def test_text_buffered_before_a_tool_call_is_published_during_it():
+    client = RecordingClient()
+    publisher = CoalescingEventPublisher(client, "bus", flush_interval=0.05)
+    published_during_pause = []
+
+    def events():
+        yield {"chunk": {"bytes": b"Let me look "}}
+        yield {"chunk": {"bytes": b"that up."}}
+        # The agent calls a knowledge base; the stream blocks meanwhile
+        time.sleep(0.3)
+        published_during_pause.append(sum(len(batch) for batch in client.batches))
+        yield {"chunk": {"bytes": b" Found it."}}
+
+    text = invoke_agent.collect_completion(events(), publisher)
+
+    frames = [json.loads(e["Detail"])["input"] for batch in client.batches for e in batch]
+    assert published_during_pause == [2]
+    assert frames == ["Let me look ", "that up.", " Found it."]
+    assert text == "Let me look that up. Found it."
+
+
+def orchestration(step):
+    return {"trace": {"trace": {"orchestrationTrace": step}}}
+
+
+def test_stats_pick_up_usage_and_tool_invocations_from_traces():
+    stats = StreamStats(log_every=0)
+    events = [
+        orchestration({"modelInvocationOutput": {"metadata": {"usage": {"inputTokens": 900, "outputTokens": 30}}}}),
+        orchestration({"invocationInput": {"invocationType": "KNOWLEDGE_BASE", "traceId": "t-1"}}),
+        orchestration({"invocationInput": {"invocationType": "FINISH", "traceId": "t-2"}}),
+        orchestration({"modelInvocationOutput": {"metadata": {"usage": {"inputTokens": 1000, "outputTokens": 12}}}}),
+        {"chunk": {"bytes": b"Hello"}},
+        {"chunk": {"bytes": b", world"}},
+    ]
+
+    text = invoke_agent.collect_completion(events, stats=stats)
+
+    assert text == "Hello, world"
+    assert stats.chunks == 2
+    assert stats.tokens == 42
+    assert stats.input_tokens == 1900
+    assert stats.tool_uses == 1
+    assert stats.time_to_first_token is not None
+
+
+def test_handler_reports_stream_metrics(monkeypatch, lambda_context):
+    class Runtime:
+        def invoke_agent(self, **_):
+            return {"completion": completion(b"one ", b"two")}
+
+    emitted = []
+    monkeypatch.setattr(invoke_agent, "bedrock_agent_runtime_client", Runtime())
+    monkeypatch.setattr(invoke_agent, "emit_stream_metrics", lambda metrics, stats: emitted.append(stats))
+
+    response = invoke_agent.handler(
+        {"arguments": {"input": {"query": "hi", "session_id": "s-1", "stream": False}}}, lambda_context
+    )
+
+    assert response == {"response": "one two", "session_id": "s-1"}
+    assert [s.chunks for s in emitted] == [2]
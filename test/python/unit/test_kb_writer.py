@@ -0,0 +1,84 @@
+import pytest
+
+from kb_writer import DirectKnowledgeBaseWriter, build_document, record_id
+
+
+class FakeBedrockAgentClient:
+    def __init__(self, status="INDEXED", data_sources=None):
+        self.status = status
+        # Pages of (data source ID, type)
+        self.data_sources = data_sources or [[("ds-1", "CUSTOM")]]
+        self.ingested = []
+        self.list_calls = 0
+
+    def list_data_sources(self, knowledgeBaseId, maxResults, nextToken=0):
+        self.list_calls += 1
+        page = self.data_sources[nextToken]
+        response = {"dataSourceSummaries": [{"dataSourceId": ds} for ds, _ in page]}
+        if nextToken + 1 < len(self.data_sources):
+            response["nextToken"] = nextToken + 1
+        return response
+
+    def get_data_source(self, knowledgeBaseId, dataSourceId):
+        types = dict(ds for page in self.data_sources for ds in page)
+        return {"dataSource": {"dataSourceConfiguration": {"type": types[dataSourceId]}}}
+
+    def ingest_knowledge_base_documents(self, knowledgeBaseId, dataSourceId, documents):
+        self.ingested.append((knowledgeBaseId, dataSourceId, documents))
+        return {
+            "documentDetails": [
+                {"status": self.status, "statusReason": "bad document"} for _ in documents
+            ]
+        }
+
+
+def test_record_id_is_deterministic():
+    assert record_id("text", {"a": 1}) == record_id("text", {"a": 1})
+    assert record_id("text", {"a": 1}) != record_id("text", {"a": 2})
+    assert record_id("text", {"document_id": "doc", "chunk_index": 3}) == "doc-3"
+
+
+def test_build_document_types_metadata_attributes():
+    document = build_document("hello", {"userId": "u", "chunk_index": 2, "draft": True})
+
+    custom = document["content"]["custom"]
+    assert custom["inlineContent"]["textContent"]["data"] == "hello"
+    assert custom["sourceType"] == "IN_LINE"
+    assert document["metadata"]["inlineAttributes"] == [
+        {"key": "userId", "value": {"type": "STRING", "stringValue": "u"}},
+        {"key": "chunk_index", "value": {"type": "NUMBER", "numberValue": 2}},
+        {"key": "draft", "value": {"type": "BOOLEAN", "booleanValue": True}},
+    ]
+
+
+def test_store_ingests_into_the_custom_data_source_and_caches_it():
+    client = FakeBedrockAgentClient()
+    writer = DirectKnowledgeBaseWriter(client, "kb-1")
+
+    first = writer.store("one")
+    writer.store("two")
+
+    assert first["status"] == "success"
+    assert first["document_id"] == record_id("one")
+    assert client.list_calls == 1
+    assert [(kb, ds) for kb, ds, _ in client.ingested] == [("kb-1", "ds-1")] * 2
+
+
+def test_failed_ingestion_raises():
+    writer = DirectKnowledgeBaseWriter(FakeBedrockAgentClient(status="FAILED"), "kb-1")
+
+    with pytest.raises(RuntimeError, match="bad document"):
+        writer.store("text")
+
+
+def test_data_source_lookup_skips_non_custom_sources():
+    client = FakeBedrockAgentClient(data_sources=[[("s3-docs", "S3")], [("web", "WEB"), ("custom", "CUSTOM")]])
+
+    assert DirectKnowledgeBaseWriter(client, "kb-1").data_source_id == "custom"
+
+
+def test_missing_custom_data_source_raises():
+    client = FakeBedrockAgentClient(data_sources=[[("s3-docs", "S3")]])
+
+    with pytest.raises(ValueError, match="no CUSTOM data source.*S3"):
+        DirectKnowledgeBaseWriter(client, "kb-1").data_source_id
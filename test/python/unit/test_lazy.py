@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from lazy import Lazy
+
+SRC = Path(__file__).resolve().parents[3] / "src"
+
+
+def test_target_is_built_on_first_attribute_access_only():
+    built = []
+    lazy = Lazy(lambda: built.append("x") or SimpleNamespace(answer=42))
+
+    assert not lazy.built and built == []
+    assert lazy.answer == 42
+    assert lazy.get() is lazy.get()
+    assert lazy.built and built == ["x"]
+    assert lazy.build_seconds is not None
+
+
+def test_concurrent_first_use_builds_once():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    lazy = Lazy(factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(lazy.get())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len({id(r) for r in results}) == 1
+
+
+def test_failed_build_is_retried_on_next_use():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    lazy = Lazy(factory)
+    with pytest.raises(RuntimeError):
+        lazy.get()
+
+    assert not lazy.built
+    assert lazy.get() == "ok"
+
+
+@pytest.mark.parametrize("module", ["queue_processor", "extract_text_handler", "upload_processor"])
+def test_handler_import_builds_no_clients_and_skips_strands(module):
+    pytest.importorskip("aws_lambda_powertools")
+    pytest.importorskip("boto3")
+    code = (
+        f"import sys, {module} as m\n"
+        "from lazy import Lazy\n"
+        "lazies = [n for n, v in vars(m).items() if isinstance(v, Lazy)]\n"
+        "assert lazies and not any(getattr(m, n).built for n in lazies), lazies\n"
+        "assert 'strands' not in sys.modules\n"
+    )
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(SRC / "media_processing"),
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "STRANDS_KNOWLEDGE_BASE_ID": "kb",
+        "QUEUE": "queue",
+        "BUCKET": "bucket",
+    }
+
+    proc = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+
+    assert proc.returncode == 0, proc.stderr
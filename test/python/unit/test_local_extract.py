@@ -0,0 +1,70 @@
+import io
+import os
+
+import pytest
+
+pytest.importorskip("pypdf")
+
+from _support import make_docx, make_pdf  # noqa: E402
+from local_extract import can_extract_locally, extract_pages_parallel, extract_text  # noqa: E402
+
+PAGE = "Born-digital page {} with a real text layer"
+
+
+def test_text_layer_pdf_is_extracted_in_page_order():
+    extraction = extract_text(make_pdf([PAGE.format(i) for i in range(5)]), ".PDF", workers=1)
+
+    assert extraction.method == "pdf" and extraction.pages == 5
+    assert [line for line in extraction.text.splitlines() if line] == [PAGE.format(i) for i in range(5)]
+
+
+@pytest.mark.parametrize("pages", [[None] * 4, [PAGE.format(0)] + [None] * 9])
+def test_scanned_pdfs_need_ocr(pages):
+    assert extract_text(make_pdf(pages), ".pdf", workers=1) is None
+
+
+def test_parallel_extraction_matches_sequential():
+    from pypdf import PdfReader
+
+    data = make_pdf([PAGE.format(i) for i in range(20)])
+    reader = PdfReader(io.BytesIO(data))
+
+    assert extract_pages_parallel(data, 2, 20, workers=3) == [page.extract_text() for page in reader.pages[2:]]
+    assert extract_text(data, ".pdf", workers=4).text == extract_text(data, ".pdf", workers=1).text
+
+
+def test_workers_read_the_pdf_from_a_temporary_file(monkeypatch):
+    import local_extract
+
+    context = local_extract.multiprocessing.get_context(local_extract.START_METHOD)
+    worker_args = []
+
+    class RecordingContext:
+        def __getattr__(self, name):
+            return getattr(context, name)
+
+        def Process(self, target, args, **kwargs):
+            worker_args.append(args)
+            return context.Process(target=target, args=args, **kwargs)
+
+    monkeypatch.setattr(local_extract.multiprocessing, "get_context", lambda method: RecordingContext())
+    data = make_pdf([PAGE.format(i) for i in range(8)])
+
+    texts = extract_pages_parallel(data, 0, 8, workers=2)
+
+    assert len(texts) == 8 and len(worker_args) == 2
+    assert not any(isinstance(arg, bytes) for args in worker_args for arg in args)
+    paths = {args[1] for args in worker_args}
+    assert len(paths) == 1 and not any(os.path.exists(path) for path in paths)
+
+
+def test_txt_and_docx_are_read_directly():
+    assert extract_text("﻿Café notes".encode("utf-8"), ".txt").text == "Café notes"
+    assert extract_text("Café".encode("cp1252"), ".txt").text == "Café"
+    assert extract_text(make_docx(["Q3 & Q4", "Plan"]), ".docx").text == "Q3 & Q4\nPlan"
+
+
+def test_only_supported_extensions_are_local():
+    assert can_extract_locally(".DOCX") and not can_extract_locally(".png")
+    with pytest.raises(ValueError):
+        extract_text(b"", ".png")
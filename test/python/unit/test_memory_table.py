@@ -0,0 +1,30 @@
+import pytest
+
+from memory_table import ConditionalCheckFailed, InMemoryTable
+
+
+def test_items_are_copied_in_and_out():
+    table = InMemoryTable()
+    item = {"pk": "a", "value": 1}
+
+    table.put_item(Item=item)
+    item["value"] = 2
+    fetched = table.get_item(Key={"pk": "a"})["Item"]
+    fetched["value"] = 3
+
+    assert table.get_item(Key={"pk": "a"}) == {"Item": {"pk": "a", "value": 1}}
+    table.delete_item(Key={"pk": "a"})
+    assert table.get_item(Key={"pk": "a"}) == {}
+
+
+def test_version_conditioned_put_rejects_stale_writes():
+    table = InMemoryTable()
+    put = dict(ConditionExpression="attribute_not_exists(#k) OR #v = :version")
+
+    table.put_item(Item={"pk": "k", "version": 1}, ExpressionAttributeValues={":version": 0}, **put)
+    table.put_item(Item={"pk": "k", "version": 2}, ExpressionAttributeValues={":version": 1}, **put)
+    with pytest.raises(ConditionalCheckFailed) as raised:
+        table.put_item(Item={"pk": "k", "version": 2}, ExpressionAttributeValues={":version": 1}, **put)
+
+    assert raised.value.response["Error"]["Code"] == "ConditionalCheckFailedException"
+    assert (table.items["k"]["version"], table.conflicts) == (2, 1)
@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from post_batch import JobFailed, PostJob, is_throttling, parse_jobs, run_batch
+
+
+class ThrottlingError(Exception):
+    response = {"Error": {"Code": "ThrottlingException"}}
+
+
+async def no_sleep(delay):
+    pass
+
+
+def run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+
+def test_topics_expand_across_platforms_with_ids():
+    jobs = parse_jobs({"topics": ["Launch", {"id": "t-9", "topic": "Pricing"}], "platforms": ["x", "linkedin"]})
+
+    assert [(j.topic_id, j.platform) for j in jobs] == [("0", "x"), ("0", "linkedin"), ("t-9", "x"), ("t-9", "linkedin")]
+    assert jobs[2].detail == {"topic_id": "t-9", "platform": "x"}
+    assert parse_jobs({"topics": ["Launch"]})[0].prompt == "Launch"
+
+
+@pytest.mark.parametrize("args", [{"topics": []}, {"topics": [{"id": 1}]}, {"topics": ["a"] * 3, "platforms": ["x", "y"]}])
+def test_invalid_batches_are_rejected(args):
+    with pytest.raises(ValueError):
+        parse_jobs(args, max_jobs=5)
+
+
+def test_concurrency_is_bounded_and_order_kept():
+    in_flight, peak = 0, 0
+
+    async def generate(job):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return job.topic_id
+
+    jobs = [PostJob(str(i), f"topic {i}") for i in range(10)]
+    results = run(run_batch(jobs, generate, concurrency=3))
+
+    assert peak == 3
+    assert [r["result"] for r in results] == [str(i) for i in range(10)]
+
+
+def test_throttled_jobs_are_retried_with_backoff():
+    calls, delays = [], []
+
+    async def generate(job):
+        calls.append(job.topic_id)
+        if calls.count(job.topic_id) < 3:
+            raise ThrottlingError()
+        return "ok"
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    result = run(run_batch([PostJob("0", "a")], generate, max_attempts=3, base_delay=1.0, sleep=sleep))[0]
+
+    assert result["status"] == "success" and result["attempts"] == 3
+    assert len(delays) == 2 and delays[0] <= 2.0 and delays[1] <= 4.0
+
+
+def test_other_errors_and_partial_streams_are_not_retried():
+    attempts = {"bad": 0, "partial": 0, "throttled": 0}
+
+    async def generate(job):
+        attempts[job.topic_id] += 1
+        if job.topic_id == "bad":
+            raise KeyError("x")
+        if job.topic_id == "partial":
+            raise JobFailed("mid-stream") from ThrottlingError()
+        raise ThrottlingError()
+
+    jobs = [PostJob(name, name) for name in attempts]
+    results = run(run_batch(jobs, generate, max_attempts=2, sleep=no_sleep))
+
+    assert [r["status"] for r in results] == ["error"] * 3
+    assert attempts == {"bad": 1, "partial": 1, "throttled": 2}
+
+
+def test_strands_throttling_exception_is_recognised():
+    strands = pytest.importorskip("strands.types.exceptions")
+
+    assert is_throttling(strands.ModelThrottledException("slow down"))
+    assert not is_throttling(ValueError())
@@ -0,0 +1,314 @@
+import io
+import json
+import os
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("aws_lambda_powertools")
+pytest.importorskip("strands")
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("POWERTOOLS_METRICS_NAMESPACE", "test")
+os.environ.setdefault("STRANDS_KNOWLEDGE_BASE_ID", "kb-id")
+
+import queue_processor  # noqa: E402
+from _support import make_docx, make_pdf  # noqa: E402
+from idempotency import CLAIMED, STATUS_COMPLETED, InMemoryIdempotencyStore  # noqa: E402
+
+ARNS = {
+    "EXTRACT_TEXT_STATE_MACHINE_ARN": "arn:extract",
+    "TRANSCRIBE_MEDIA_STATE_MACHINE_ARN": "arn:transcribe",
+}
+
+
+class FakeS3:
+    def __init__(self, objects):
+        self.objects = objects
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise KeyError(Key)
+        body = self.objects[Key]
+        return {"Body": io.BytesIO(body if isinstance(body, bytes) else body.encode())}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise KeyError(Key)
+        return {"ContentLength": len(self.objects[Key])}
+
+
+class AlreadyExists(Exception):
+    response = {"Error": {"Code": "ExecutionAlreadyExists"}}
+
+
+class FakeSfn:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.started = []
+        self.names = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def start_execution(self, stateMachineArn, input, name=None, **_):
+        with self._lock:
+            if name is not None and name in self.names:
+                raise AlreadyExists()
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+            self.started.append((stateMachineArn, json.loads(input)))
+            self.names.append(name)
+        return {"executionArn": f"arn:exec:{len(self.started)}"}
+
+
+class FakeSaver:
+    def __init__(self):
+        self.documents = []
+
+    def store_stream(self, lines, **kwargs):
+        self.documents.append("\n".join(lines))
+        return [{"chunk_index": 0, "status": "success"}]
+
+    def store_document(self, text, **kwargs):
+        self.documents.append(text)
+        return [{"chunk_index": 0, "status": "success"}]
+
+
+def sqs_record(message_id, key, extension, idempotency_key=None):
+    body = {"bucket": "bucket", "key": key, "extension": extension, "documentId": message_id}
+    if idempotency_key:
+        body["idempotency_key"] = idempotency_key
+    return {"messageId": message_id, "body": json.dumps(body)}
+
+
+@pytest.fixture
+def fakes(monkeypatch):
+    for name, value in ARNS.items():
+        monkeypatch.setenv(name, value)
+    s3, sfn, saver = FakeS3({"notes.md": "# Notes"}), FakeSfn(latency=0.02), FakeSaver()
+    monkeypatch.setattr(queue_processor, "s3_client", s3)
+    monkeypatch.setattr(queue_processor, "sfn_client", sfn)
+    monkeypatch.setattr(queue_processor, "saver", saver)
+    monkeypatch.setattr(queue_processor, "idempotency", InMemoryIdempotencyStore())
+    return s3, sfn, saver
+
+
+def test_records_are_routed_and_grouped_per_state_machine(fakes, lambda_context):
+    _, sfn, saver = fakes
+    records = [sqs_record(f"m{i}", f"doc{i}.pdf", ".pdf") for i in range(8)]
+    records.append(sqs_record("video", "clip.mp4", ".mp4"))
+    records.append(sqs_record("md", "notes.md", ".md"))
+
+    response = queue_processor.lambda_handler({"Records": records}, lambda_context)
+
+    assert response == {"batchItemFailures": []}
+    started = dict(sfn.started)
+    assert len(sfn.started) == 2
+    assert [f["object_key"] for f in started["arn:extract"]["files"]] == [f"doc{i}.pdf" for i in range(8)]
+    assert started["arn:transcribe"]["files"] == [
+        {"bucket_name": "bucket", "object_key": "clip.mp4", "filename": "clip.mp4", "file_extension": ".mp4"}
+    ]
+    assert saver.documents == ["# Notes"]
+
+
+def test_large_groups_are_split_and_started_concurrently(fakes, monkeypatch, lambda_context):
+    _, sfn, _ = fakes
+    monkeypatch.setattr(queue_processor, "MAX_CONCURRENT_RECORDS", 4)
+    monkeypatch.setattr(queue_processor, "MAX_FILES_PER_EXECUTION", 3)
+    records = [sqs_record(f"m{i}", f"doc{i}.pdf", ".pdf") for i in range(10)]
+
+    queue_processor.lambda_handler({"Records": records}, lambda_context)
+
+    assert sorted(len(payload["files"]) for _, payload in sfn.started) == [1, 3, 3, 3]
+    assert 1 < sfn.max_in_flight <= 4
+
+
+def test_content_type_routes_files_without_a_known_extension(fakes, lambda_context):
+    _, sfn, _ = fakes
+    record = sqs_record("webm", "clip.webm", ".webm")
+    body = json.loads(record["body"])
+    record["body"] = json.dumps({**body, "content_type": "video/webm"})
+
+    queue_processor.lambda_handler({"Records": [record, sqs_record("exe", "setup.exe", ".exe")]}, lambda_context)
+
+    assert [(arn, len(p["files"])) for arn, p in sfn.started] == [("arn:transcribe", 1)]
+
+
+def test_failed_execution_start_fails_only_its_records(fakes, monkeypatch, lambda_context):
+    _, sfn, _ = fakes
+    start = sfn.start_execution
+
+    def flaky(stateMachineArn, input, **kwargs):
+        if stateMachineArn == "arn:transcribe":
+            raise RuntimeError("ThrottlingException")
+        return start(stateMachineArn, input, **kwargs)
+
+    monkeypatch.setattr(sfn, "start_execution", flaky)
+    records = [
+        sqs_record("pdf", "doc.pdf", ".pdf"),
+        sqs_record("v1", "a.mp4", ".mp4"),
+        sqs_record("v2", "b.mov", ".mov"),
+    ]
+
+    response = queue_processor.lambda_handler({"Records": records}, lambda_context)
+
+    assert sorted(f["itemIdentifier"] for f in response["batchItemFailures"]) == ["v1", "v2"]
+
+
+def test_only_failed_messages_are_reported(fakes, lambda_context):
+    records = [
+        sqs_record("ok", "doc.pdf", ".pdf"),
+        sqs_record("missing", "missing.md", ".md"),
+        {"messageId": "garbled", "body": "not json"},
+    ]
+
+    response = queue_processor.lambda_handler({"Records": records}, lambda_context)
+
+    failed = sorted(f["itemIdentifier"] for f in response["batchItemFailures"])
+    assert failed == ["garbled", "missing"]
+
+
+def test_partial_kb_failure_fails_the_record(fakes, monkeypatch, lambda_context):
+    _, _, saver = fakes
+    monkeypatch.setattr(
+        saver, "store_stream", lambda lines, **_: [{"chunk_index": 0, "status": "error"}]
+    )
+
+    response = queue_processor.lambda_handler(
+        {"Records": [sqs_record("md", "notes.md", ".md")]}, lambda_context
+    )
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "md"}]}
+
+
+def test_per_record_latency_is_emitted(fakes, monkeypatch, lambda_context):
+    emitted = []
+    monkeypatch.setattr(
+        queue_processor.metrics, "add_metric", lambda name, unit, value: emitted.append(name)
+    )
+
+    queue_processor.lambda_handler({"Records": [sqs_record("ok", "doc.pdf", ".pdf")]}, lambda_context)
+
+    assert "RecordProcessingLatency" in emitted
+
+
+def test_redelivered_messages_are_dropped(fakes, lambda_context):
+    _, sfn, saver = fakes
+    records = [
+        sqs_record("pdf", "doc.pdf", ".pdf", idempotency_key="k-pdf"),
+        sqs_record("md", "notes.md", ".md", idempotency_key="k-md"),
+    ]
+
+    queue_processor.lambda_handler({"Records": records}, lambda_context)
+    response = queue_processor.lambda_handler({"Records": records}, lambda_context)
+
+    assert response == {"batchItemFailures": []}
+    assert len(sfn.started) == 1
+    assert saver.documents == ["# Notes"]
+
+
+def test_messages_still_in_progress_are_retried_not_dropped(fakes, lambda_context):
+    _, sfn, _ = fakes
+    store = queue_processor.idempotency
+    store.claim("k-stuck")  # held by an invocation that crashed or is still running
+    record = sqs_record("pdf", "doc.pdf", ".pdf", idempotency_key="k-stuck")
+
+    in_progress = queue_processor.lambda_handler({"Records": [record]}, lambda_context)
+    store.release("k-stuck")  # the claim lapses
+    retried = queue_processor.lambda_handler({"Records": [record]}, lambda_context)
+
+    assert in_progress == {"batchItemFailures": [{"itemIdentifier": "pdf"}]}
+    assert retried == {"batchItemFailures": []}
+    assert sfn.names == ["k-stuck"]
+
+
+def test_executions_get_deterministic_names(fakes, monkeypatch, lambda_context):
+    _, sfn, _ = fakes
+    records = [sqs_record(f"m{i}", f"doc{i}.pdf", ".pdf", idempotency_key=f"k{i}") for i in range(3)]
+
+    queue_processor.lambda_handler({"Records": records}, lambda_context)
+    # The same batch after the claims expired: SFN rejects the known name
+    monkeypatch.setattr(queue_processor, "idempotency", InMemoryIdempotencyStore())
+    response = queue_processor.lambda_handler({"Records": list(reversed(records))}, lambda_context)
+
+    assert response == {"batchItemFailures": []}
+    assert len(sfn.started) == 1
+    assert sfn.names[0].startswith("batch-")
+
+
+def test_failed_start_releases_the_claim(fakes, monkeypatch, lambda_context):
+    _, sfn, _ = fakes
+    start = sfn.start_execution
+
+    def broken(**_):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(sfn, "start_execution", broken)
+    record = sqs_record("pdf", "doc.pdf", ".pdf", idempotency_key="k-pdf")
+
+    failed = queue_processor.lambda_handler({"Records": [record]}, lambda_context)
+    monkeypatch.setattr(sfn, "start_execution", start)
+    retried = queue_processor.lambda_handler({"Records": [record]}, lambda_context)
+
+    assert failed == {"batchItemFailures": [{"itemIdentifier": "pdf"}]}
+    assert retried == {"batchItemFailures": []}
+    assert sfn.names == ["k-pdf"]
+
+
+def test_born_digital_documents_are_extracted_without_the_workflow(fakes, lambda_context):
+    s3, sfn, saver = fakes
+    s3.objects.update(
+        {
+            "report.pdf": make_pdf(["Quarterly results grew across every region."] * 3),
+            "scan.pdf": make_pdf([None, None]),
+            "notes.txt": "Plain notes".encode(),
+            "memo.docx": make_docx(["Memo line one", "Memo line two"]),
+        }
+    )
+    records = [
+        sqs_record("pdf", "report.pdf", ".pdf", idempotency_key="k-pdf"),
+        sqs_record("scan", "scan.pdf", ".pdf", idempotency_key="k-scan"),
+        sqs_record("txt", "notes.txt", ".txt"),
+        sqs_record("docx", "memo.docx", ".docx"),
+    ]
+
+    response = queue_processor.lambda_handler({"Records": records}, lambda_context)
+
+    assert response == {"batchItemFailures": []}
+    assert [f["object_key"] for _, p in sfn.started for f in p["files"]] == ["scan.pdf"]
+    assert sorted(doc.splitlines()[0] for doc in saver.documents) == [
+        "Memo line one",
+        "Plain notes",
+        "Quarterly results grew across every region.",
+    ]
+    assert queue_processor.idempotency.claim("k-pdf") == STATUS_COMPLETED
+
+
+def test_oversized_documents_use_the_workflow(fakes, monkeypatch, lambda_context):
+    s3, sfn, saver = fakes
+    monkeypatch.setattr(queue_processor, "LOCAL_EXTRACT_MAX_BYTES", 10)
+    s3.objects["notes.txt"] = b"x" * 11
+
+    queue_processor.lambda_handler({"Records": [sqs_record("txt", "notes.txt", ".txt")]}, lambda_context)
+
+    assert len(sfn.started) == 1 and saver.documents == []
+
+
+def test_failed_store_of_extracted_text_fails_the_record(fakes, monkeypatch, lambda_context):
+    s3, sfn, saver = fakes
+    s3.objects["notes.txt"] = b"Plain notes"
+    monkeypatch.setattr(saver, "store_document", lambda text, **_: [{"chunk_index": 0, "status": "error"}])
+
+    response = queue_processor.lambda_handler(
+        {"Records": [sqs_record("txt", "notes.txt", ".txt", idempotency_key="k-txt")]}, lambda_context
+    )
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "txt"}]}
+    assert sfn.started == []
+    assert queue_processor.idempotency.claim("k-txt") == CLAIMED
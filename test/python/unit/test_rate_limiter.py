@@ -0,0 +1,203 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from memory_table import InMemoryTable
+from rate_limiter import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    LocalBucketBackend,
+    RateLimiter,
+    RateLimitTimeout,
+    TableBucketBackend,
+    build_rate_limiter,
+    is_throttling,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class Throttled(Exception):
+    response = {"Error": {"Code": "ThrottlingException"}}
+
+
+def make_limiter(clock, **kwargs):
+    kwargs.setdefault("background_reserve", 0)
+    return RateLimiter(clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def test_bucket_admits_a_burst_then_the_refill_rate():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=2, burst=3)
+
+    waits = [limiter.acquire("model") for _ in range(5)]
+
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3:] == pytest.approx([0.5, 0.5])
+    stats = limiter.drain_stats()
+    assert (stats.acquired, stats.queue_wait, stats.max_queue_wait) == (5, pytest.approx(1.0), pytest.approx(0.5))
+    assert limiter.drain_stats().acquired == 0
+
+
+def test_keys_have_their_own_buckets_and_rates():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=1, burst=1, rates={"slow": 0.25})
+
+    assert limiter.acquire("a") == limiter.acquire("slow") == 0
+    assert limiter.acquire("a") == pytest.approx(1)
+    assert limiter.acquire("slow") == pytest.approx(3)
+
+
+def test_a_zero_key_rate_disables_that_key_only(monkeypatch):
+    monkeypatch.setenv("BEDROCK_RATE_LIMITS", '{"unlimited": 0}')
+    monkeypatch.delenv("BEDROCK_RATE_LIMIT_TABLE_NAME", raising=False)
+    limiter = build_rate_limiter()
+    clock = FakeClock()
+    limiter._clock, limiter._sleep = clock, clock.sleep
+
+    waits = [limiter.acquire("unlimited") for _ in range(30)]
+    limiter.observe("unlimited", Throttled())
+
+    assert waits == [0] * len(waits) and clock.sleeps == []
+    assert limiter.limits("model") and not limiter.limits("unlimited")
+    assert limiter.drain_stats().acquired == 0
+
+
+def test_negative_key_rates_are_rejected():
+    with pytest.raises(ValueError, match="slow"):
+        RateLimiter(rates={"slow": -1})
+
+
+def test_throttling_halves_the_rate_pauses_the_key_and_recovers():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=4, burst=10, min_rate=1, backoff_base=2, recovery=0.25)
+
+    limiter.acquire("model")
+    limiter.observe("model", Throttled())
+    limiter.observe("model", Throttled())
+    limiter.observe("model", Throttled())
+    assert limiter.current_rate("model") == 1
+
+    # The third consecutive throttle pauses the key for 4-8 s
+    assert 4 <= limiter.acquire("model") <= 8
+    limiter.observe("model", ValueError("not throttling"))
+    assert limiter.current_rate("model") == 1
+    for _ in range(5):
+        limiter.observe("model")
+    assert limiter.current_rate("model") == 4
+    assert limiter.drain_stats().throttles == 3
+
+
+def test_background_callers_leave_a_reserve_for_interactive_ones():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=1, burst=5, background_reserve=0.4)
+
+    background = [limiter.acquire("model", PRIORITY_BACKGROUND) for _ in range(4)]
+    interactive = [limiter.acquire("model", PRIORITY_INTERACTIVE) for _ in range(3)]
+
+    assert background[:3] == [0, 0, 0] and background[3] == pytest.approx(1)
+    assert interactive == [0, 0, pytest.approx(1)]
+
+
+def test_waiting_interactive_callers_are_admitted_first():
+    limiter = RateLimiter(rate=20, burst=1, background_reserve=0)
+    limiter.acquire("model")
+    order = []
+
+    def call(name, priority):
+        limiter.acquire("model", priority)
+        order.append(name)
+
+    background = [threading.Thread(target=call, args=(f"b{i}", PRIORITY_BACKGROUND)) for i in range(3)]
+    for thread in background:
+        thread.start()
+    time.sleep(0.01)
+    interactive = threading.Thread(target=call, args=("interactive", PRIORITY_INTERACTIVE))
+    interactive.start()
+    for thread in background + [interactive]:
+        thread.join()
+
+    assert order.index("interactive") <= 1
+
+
+def test_max_wait_raises_instead_of_queueing():
+    clock = FakeClock()
+    limiter = make_limiter(clock, rate=0.5, burst=1)
+    limiter.acquire("model")
+
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire("model", max_wait=1)
+
+
+def test_async_acquire_and_disabled_limiter():
+    limiter = RateLimiter(rate=50, burst=1)
+
+    async def burst():
+        return await asyncio.gather(*(limiter.acquire_async("model") for _ in range(4)))
+
+    waits = asyncio.run(burst())
+    assert sorted(waits)[0] < 0.02 and sorted(waits)[-1] >= 0.04
+    assert RateLimiter(rate=0).acquire("model") == 0
+
+
+def test_table_backend_shares_buckets_between_containers():
+    clock = FakeClock()
+    table = InMemoryTable()
+    containers = [
+        make_limiter(clock, backend=TableBucketBackend(table, clock=clock), rate=1, burst=3) for _ in range(2)
+    ]
+
+    waits = [containers[i % 2].acquire("model") for i in range(4)]
+
+    assert waits[:3] == [0, 0, 0] and waits[3] == pytest.approx(1)
+    assert table.items["RATELIMIT#model"]["version"] == 5
+
+
+def test_table_backend_retries_conflicting_writes():
+    table = InMemoryTable()
+    backend = TableBucketBackend(table)
+    backend.take("model", rate=100, capacity=100)
+    original_get = table.get_item
+    raced = []
+
+    def racing_get(**kwargs):
+        item = original_get(**kwargs)
+        if not raced:  # another container writes between our read and put
+            raced.append(True)
+            backend.take("model", rate=100, capacity=100)
+        return item
+
+    table.get_item = racing_get
+    assert backend.take("model", rate=100, capacity=100) == 0
+    assert table.conflicts == 1
+    assert table.items["RATELIMIT#model"]["tokens_milli"] <= 97_100
+
+
+def test_throttling_is_recognised_across_sdks():
+    strands = pytest.importorskip("strands.types.exceptions")
+
+    assert is_throttling(Throttled())
+    assert is_throttling(strands.ModelThrottledException("slow down"))
+    assert not is_throttling(ValueError())
+
+
+def test_local_backend_refills_up_to_capacity():
+    clock = FakeClock()
+    backend = LocalBucketBackend(clock=clock)
+
+    assert [backend.take("k", rate=1, capacity=2) for _ in range(3)] == [0, 0, pytest.approx(1)]
+    clock.now += 60
+    assert [backend.take("k", rate=1, capacity=2) for _ in range(3)] == [0, 0, pytest.approx(1)]
@@ -0,0 +1,86 @@
+import pytest
+
+from memory_table import InMemoryTable
+from response_cache import (
+    InMemoryResponseStore,
+    ResponseCache,
+    TableResponseStore,
+    TieredResponseStore,
+    build_response_cache,
+    cache_key,
+)
+
+CONTEXT = ("model", 0.3, "system prompt")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_exact_then_normalized_match():
+    cache = ResponseCache(InMemoryResponseStore())
+    cache.remember("Launch  week!", "post", *CONTEXT)
+
+    assert cache.lookup("Launch  week!", *CONTEXT) == "post"
+    assert cache.lookup("  launch week!\n", *CONTEXT) == "post"
+    assert (cache.exact_hits, cache.normalized_hits, cache.misses) == (1, 1, 0)
+
+
+def test_context_and_normalize_flag_separate_entries():
+    cache = ResponseCache(InMemoryResponseStore(), normalize=False)
+    cache.remember("Launch", "post", *CONTEXT)
+
+    assert cache.lookup("launch", *CONTEXT) is None
+    assert cache.lookup("Launch", "model", 0.7, "system prompt") is None
+    assert cache_key("a", "b") != cache_key("a", "b", kind="normalized")
+
+
+def test_lru_evicts_least_recently_used_and_entries_expire():
+    clock = FakeClock()
+    store = InMemoryResponseStore(max_entries=2, clock=clock)
+    store.put("a", "A", 10)
+    store.put("b", "B", 10)
+    store.get("a")
+    store.put("c", "C", 10)
+
+    assert store.get("b") is None and store.get("a") == "A"
+    clock.now += 11
+    assert store.get("a") is None and len(store) == 1
+
+
+def test_tiered_store_backfills_memory_from_table():
+    clock = FakeClock()
+    table = InMemoryTable()
+    TableResponseStore(table, clock=clock).put("k", "from table", 60)
+    lru = InMemoryResponseStore(clock=clock)
+    tiered = TieredResponseStore(lru, TableResponseStore(table, clock=clock), ttl_seconds=60)
+
+    assert tiered.get("k") == "from table"
+    assert lru.get("k") == "from table"
+    clock.now += 61
+    assert TableResponseStore(table, clock=clock).get("k") is None
+
+
+def test_oversized_responses_are_not_written_to_the_table():
+    table = InMemoryTable()
+    TableResponseStore(table).put("k", "x" * 400_000, 60)
+
+    assert table.items == {}
+
+
+@pytest.mark.parametrize("ttl, enabled", [("0", False), ("60", True)])
+def test_build_from_environment(monkeypatch, ttl, enabled):
+    monkeypatch.delenv("RESPONSE_CACHE_TABLE_NAME", raising=False)
+    monkeypatch.setenv("RESPONSE_CACHE_TTL_SECONDS", ttl)
+    monkeypatch.setenv("RESPONSE_CACHE_NORMALIZE", "false")
+
+    cache = build_response_cache()
+
+    cache.remember("Launch", "post")
+
+    assert cache.enabled == enabled and not cache.normalize
+    assert (cache.lookup("Launch") == "post") == enabled
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from routing import ROUTE_EXTRACT_TEXT, ROUTE_KB, ROUTE_TRANSCRIBE, RoutingTable
+
+
+def test_default_routes_match_the_original_extension_lists():
+    routes = RoutingTable()
+
+    assert routes.route(".md") == routes.route(".csv") == ROUTE_KB
+    for ext in (".pdf", ".png", ".jpg", ".jpeg", ".tiff", ".tif", ".doc", ".docx", ".txt"):
+        assert routes.route(ext) == ROUTE_EXTRACT_TEXT
+    for ext in (".mp4", ".mov", ".avi", ".mkv"):
+        assert routes.route(ext) == ROUTE_TRANSCRIBE
+    assert routes.route(".exe") is None
+
+
+def test_extension_lookup_is_case_insensitive():
+    assert RoutingTable().route(".PDF") == ROUTE_EXTRACT_TEXT
+
+
+def test_mime_type_is_used_when_the_extension_is_unknown():
+    routes = RoutingTable()
+
+    assert routes.route("", content_type="text/csv; charset=utf-8") == ROUTE_KB
+    assert routes.route(".bin", content_type="video/webm") == ROUTE_TRANSCRIBE
+    assert routes.route(None, content_type="application/zip") is None
+    # A known extension wins over the MIME type
+    assert routes.route(".md", content_type="video/mp4") == ROUTE_KB
+
+
+def test_json_overrides_add_replace_and_remove_routes():
+    config = json.dumps(
+        {
+            "extensions": {"rtf": "extract_text", ".txt": "kb", ".avi": None},
+            "mime_types": {"audio/*": "transcribe"},
+        }
+    )
+
+    routes = RoutingTable.from_json(config)
+
+    assert routes.route(".rtf") == ROUTE_EXTRACT_TEXT
+    assert routes.route(".txt") == ROUTE_KB
+    assert routes.route(".avi") is None
+    assert routes.route(".pdf") == ROUTE_EXTRACT_TEXT
+    assert routes.route("", content_type="audio/mpeg") == ROUTE_TRANSCRIBE
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("ROUTING_TABLE", '{"extensions": {".rtf": "extract_text"}}')
+
+    assert RoutingTable.from_env().route(".rtf") == ROUTE_EXTRACT_TEXT
+
+
+def test_unknown_route_is_rejected():
+    with pytest.raises(ValueError, match="Unknown route"):
+        RoutingTable.from_json('{"extensions": {".rtf": "ocr"}}')
@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+from s3_copy import MB, copy_object, part_ranges
+
+
+class InMemoryS3:
+    """Local S3 stand-in covering the copy and multipart-copy calls."""
+
+    def __init__(self, objects=None, *, fail_part=None, latency=0.0):
+        self.objects = dict(objects or {})
+        self.fail_part = fail_part
+        self.latency = latency
+        self.uploads = {}
+        self.aborted = []
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def head_object(self, Bucket, Key):
+        self.calls.append("head_object")
+        body = self.objects[(Bucket, Key)]
+        return {"ContentLength": len(body), "ETag": f'"{hash(body)}"', "ContentType": "video/mp4"}
+
+    def copy_object(self, CopySource, Bucket, Key):
+        self.calls.append("copy_object")
+        self.objects[(Bucket, Key)] = self.objects[(CopySource["Bucket"], CopySource["Key"])]
+        return {}
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self.calls.append("create_multipart_upload")
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {"key": (Bucket, Key), "parts": {}, "args": kwargs}
+        return {"UploadId": upload_id}
+
+    def upload_part_copy(self, Bucket, Key, UploadId, PartNumber, CopySource, CopySourceRange, **kwargs):
+        with self._lock:
+            self.calls.append("upload_part_copy")
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+        if PartNumber == self.fail_part:
+            raise RuntimeError("InternalError")
+        body = self.objects[(CopySource["Bucket"], CopySource["Key"])]
+        assert kwargs.get("CopySourceIfMatch") == f'"{hash(body)}"'
+        start, end = map(int, CopySourceRange.removeprefix("bytes=").split("-"))
+        self.uploads[UploadId]["parts"][PartNumber] = body[start : end + 1]
+        return {"CopyPartResult": {"ETag": f'"part-{PartNumber}"'}}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.calls.append("complete_multipart_upload")
+        upload = self.uploads.pop(UploadId)
+        numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+        assert numbers == sorted(numbers)
+        self.objects[upload["key"]] = b"".join(upload["parts"][n] for n in numbers)
+        return {}
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append("abort_multipart_upload")
+        self.uploads.pop(UploadId)
+        self.aborted.append(UploadId)
+        return {}
+
+
+def test_part_ranges_cover_the_object_exactly():
+    ranges = part_ranges(12 * MB + 1, 5 * MB)
+
+    assert ranges == [(0, 5 * MB - 1), (5 * MB, 10 * MB - 1), (10 * MB, 12 * MB)]
+
+
+def test_part_ranges_respect_s3_part_limits():
+    assert part_ranges(20 * MB, 1 * MB)[0] == (0, 5 * MB - 1)
+    # 100 GB in 5 MB parts would exceed 10,000 parts; the part size grows
+    assert len(part_ranges(100 * 1024 * MB, 5 * MB)) <= 10_000
+
+
+def test_small_object_uses_single_copy():
+    s3 = InMemoryS3({("b", "src"): b"x" * 100})
+
+    result = copy_object(s3, "b", "src", "b", "dst", threshold=1024)
+
+    assert result == {"method": "copy", "size": 100, "content_type": "video/mp4"}
+    assert s3.calls == ["head_object", "copy_object"]
+    assert s3.objects[("b", "dst")] == b"x" * 100
+
+
+def test_large_object_is_copied_in_parallel_parts():
+    body = bytes(range(256)) * (12 * MB // 256) + b"tail"
+    s3 = InMemoryS3({("b", "src"): body}, latency=0.02)
+
+    result = copy_object(s3, "b", "src", "b", "dst", threshold=MB, part_size=5 * MB, concurrency=3)
+
+    assert result == {"method": "multipart", "size": len(body), "content_type": "video/mp4", "parts": 3}
+    assert s3.objects[("b", "dst")] == body
+    assert s3.max_in_flight > 1
+    assert "copy_object" not in s3.calls
+    assert s3.uploads == {}
+
+
+def test_multipart_copy_keeps_content_type():
+    s3 = InMemoryS3({("b", "src"): b"x" * (6 * MB)})
+    created = []
+    original = s3.create_multipart_upload
+
+    def spy(**kwargs):
+        created.append(kwargs)
+        return original(**kwargs)
+
+    s3.create_multipart_upload = spy
+    copy_object(s3, "b", "src", "b", "dst", threshold=MB, part_size=5 * MB)
+
+    assert created[0]["ContentType"] == "video/mp4"
+
+
+def test_failed_part_aborts_the_upload():
+    s3 = InMemoryS3({("b", "src"): b"x" * (11 * MB)}, fail_part=2)
+
+    with pytest.raises(RuntimeError, match="InternalError"):
+        copy_object(s3, "b", "src", "b", "dst", threshold=MB, part_size=5 * MB)
+
+    assert s3.aborted == ["upload-0"]
+    assert s3.uploads == {}
+    assert ("b", "dst") not in s3.objects
+    assert "complete_multipart_upload" not in s3.calls
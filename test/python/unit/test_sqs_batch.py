@@ -0,0 +1,66 @@
+from sqs_batch import send_message_batches
+
+
+class FakeSqs:
+    def __init__(self, failures=None, raise_times=0):
+        # failures: list of {entry_id: sender_fault} dicts, one per call
+        self.failures = list(failures or [])
+        self.raise_times = raise_times
+        self.calls = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.calls.append([entry["Id"] for entry in Entries])
+        if self.raise_times:
+            self.raise_times -= 1
+            raise RuntimeError("throttled")
+        rejected = self.failures.pop(0) if self.failures else {}
+        return {
+            "Successful": [{"Id": e["Id"]} for e in Entries if e["Id"] not in rejected],
+            "Failed": [
+                {"Id": i, "SenderFault": fault, "Code": "InternalError", "Message": "try again"}
+                for i, fault in rejected.items()
+            ],
+        }
+
+
+def send(sqs, count, **kwargs):
+    messages = {str(i): f"body {i}" for i in range(count)}
+    return send_message_batches(sqs, "queue", messages, sleep=lambda _: None, **kwargs)
+
+
+def test_messages_are_sent_in_batches_of_ten():
+    sqs = FakeSqs()
+
+    assert send(sqs, 23) == {}
+    assert [len(call) for call in sqs.calls] == [10, 10, 3]
+
+
+def test_only_failed_entries_are_retried():
+    sqs = FakeSqs(failures=[{"3": False, "7": False}])
+
+    assert send(sqs, 10) == {}
+    assert sqs.calls[1] == ["3", "7"]
+
+
+def test_sender_faults_are_not_retried():
+    sqs = FakeSqs(failures=[{"2": True}])
+
+    failures = send(sqs, 5)
+
+    assert list(failures) == ["2"]
+    assert "InternalError" in failures["2"]
+    assert len(sqs.calls) == 1
+
+
+def test_entries_fail_after_max_retries():
+    sqs = FakeSqs(failures=[{"1": False}] * 3)
+
+    assert list(send(sqs, 3, max_retries=2)) == ["1"]
+    assert len(sqs.calls) == 3
+
+
+def test_failed_calls_are_retried_then_reported():
+    assert send(FakeSqs(raise_times=1), 4) == {}
+
+    failures = send(FakeSqs(raise_times=5), 4, max_retries=1)
+    assert sorted(failures) == ["0", "1", "2", "3"]
@@ -0,0 +1,138 @@
+import pytest
+
+pytest.importorskip("aws_lambda_powertools")
+
+from stream_metrics import StreamStats, annotate, emit_stream_metrics  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.records = []
+
+    def debug(self, msg, *args):
+        self.records.append(("debug", msg % args))
+
+    def info(self, msg, *args):
+        self.records.append(("info", msg % args))
+
+
+class RecordingMetrics:
+    def __init__(self):
+        self.values = []
+
+    def add_metric(self, name, unit, value):
+        self.values.append((name, value))
+
+    def named(self, name):
+        return [v for n, v in self.values if n == name]
+
+
+class RecordingSubsegment:
+    def __init__(self):
+        self.annotations = {}
+        self.metadata = {}
+
+    def put_annotation(self, key, value):
+        self.annotations[key] = value
+
+    def put_metadata(self, key, value):
+        self.metadata[key] = value
+
+
+def streamed(clock, *, usage=None, tool_ids=()):
+    stats = StreamStats(clock=clock, logger=RecordingLogger(), log_every=0)
+    clock.now += 0.5  # time to first token
+    for _ in range(10):
+        stats.chunk("tok ")
+        clock.now += 0.1
+    for tool_id in tool_ids:
+        stats.tool_use(tool_id)
+    if usage:
+        stats.usage(usage)
+    return stats
+
+
+def test_time_to_first_token_and_rate_come_from_chunk_timestamps():
+    clock = FakeClock()
+    stats = streamed(clock)
+
+    assert stats.time_to_first_token == pytest.approx(0.5)
+    assert stats.tokens == 10  # no usage report: one token per chunk
+    assert stats.tokens_per_second == pytest.approx(10 / 0.9)
+
+
+def test_reported_usage_takes_precedence_over_chunk_count():
+    stats = streamed(FakeClock(), usage={"inputTokens": 1200, "outputTokens": 45})
+    stats.usage({"outputTokens": 5})
+
+    assert stats.tokens == 50
+    assert stats.input_tokens == 1200
+
+
+def test_prompt_cache_usage_is_emitted():
+    stats = streamed(FakeClock(), usage={"inputTokens": 40, "outputTokens": 10, "cacheReadInputTokens": 1500})
+    metrics = RecordingMetrics()
+
+    emit_stream_metrics(metrics, stats)
+
+    assert metrics.named("InputTokens") == [40]
+    assert metrics.named("PromptCacheReadTokens") == [1500]
+    assert metrics.named("PromptCacheWriteTokens") == [0]
+    assert metrics.named("PromptCacheHits") == [1]
+    assert stats.as_dict()["cache_read_tokens"] == 1500
+
+    uncached = RecordingMetrics()
+    emit_stream_metrics(uncached, streamed(FakeClock(), usage={"inputTokens": 40}))
+    assert uncached.named("PromptCacheHits") == []
+
+
+def test_tool_use_deltas_count_once_per_invocation():
+    stats = streamed(FakeClock(), tool_ids=["t-1", "t-1", "t-1", "t-2"])
+
+    assert stats.tool_uses == 2
+
+
+def test_chunks_are_logged_only_every_nth():
+    logger = RecordingLogger()
+    stats = StreamStats(logger=logger, log_every=4)
+    for _ in range(10):
+        stats.chunk("x")
+
+    assert [r for r, _ in logger.records] == ["debug", "debug"]
+
+
+def test_emitted_metrics_and_annotations():
+    clock = FakeClock()
+    stats = streamed(clock, tool_ids=["t-1"])
+    stats.publish_latencies.extend([0.02, 0.03])
+    metrics, subsegment = RecordingMetrics(), RecordingSubsegment()
+
+    emit_stream_metrics(metrics, stats)
+    annotate(subsegment, stats)
+
+    assert metrics.named("TimeToFirstToken") == [pytest.approx(500)]
+    assert metrics.named("OutputTokens") == [10]
+    assert metrics.named("TokensPerSecond") == [pytest.approx(10 / 0.9)]
+    assert metrics.named("ToolUseEvents") == [1]
+    assert metrics.named("EventPublishLatency") == [pytest.approx(20), pytest.approx(30)]
+    assert subsegment.annotations == {"time_to_first_token_ms": 500.0, "tokens": 10, "tool_uses": 1}
+    assert subsegment.metadata["stream"]["publish_calls"] == 2
+    assert stats.logger.records[-1][0] == "info"
+
+
+def test_empty_stream_emits_no_latency_metrics():
+    metrics = RecordingMetrics()
+
+    emit_stream_metrics(metrics, StreamStats(logger=RecordingLogger()))
+
+    assert metrics.named("TimeToFirstToken") == []
+    assert metrics.named("TokensPerSecond") == []
+    assert metrics.named("OutputTokens") == [0]
@@ -0,0 +1,121 @@
+import io
+import json
+
+import pytest
+
+from transcribe_output import (
+    RangedBody,
+    build_segments,
+    extract_transcript,
+    iter_json_values,
+    iter_segments,
+)
+
+
+def item(word, start, end):
+    return {
+        "start_time": f"{start:.2f}",
+        "end_time": f"{end:.2f}",
+        "alternatives": [{"confidence": "0.99", "content": word}],
+        "type": "pronunciation",
+    }
+
+
+def punctuation(mark):
+    return {"alternatives": [{"confidence": "0.0", "content": mark}], "type": "punctuation"}
+
+
+def transcribe_document(words=200, seconds_per_word=0.5):
+    items = []
+    for i in range(words):
+        items.append(item(f"w{i}", i * seconds_per_word, (i + 1) * seconds_per_word))
+        if i % 10 == 9:
+            items.append(punctuation("."))
+    return {
+        "jobName": "job",
+        "accountId": "123",
+        "results": {
+            "transcripts": [{"transcript": "Café \"quoted\" \\ text.\nLine two."}],
+            "items": items,
+        },
+        "status": "COMPLETED",
+    }
+
+
+class RangeS3:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.ranges = []
+
+    def get_object(self, Bucket, Key, Range):
+        start, end = map(int, Range.removeprefix("bytes=").split("-"))
+        self.ranges.append((start, end))
+        piece = self.data[start : end + 1]
+        return {
+            "Body": io.BytesIO(piece),
+            "ContentRange": f"bytes {start}-{start + len(piece) - 1}/{len(self.data)}",
+        }
+
+
+def test_extract_transcript_matches_json_loads():
+    doc = transcribe_document()
+    raw = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+
+    assert extract_transcript(raw) == doc["results"]["transcripts"][0]["transcript"]
+    assert extract_transcript(io.BytesIO(raw)) == doc["results"]["transcripts"][0]["transcript"]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_tokens_split_across_chunks(size):
+    doc = transcribe_document(words=20)
+    raw = json.dumps(doc, ensure_ascii=False, indent=1).encode("utf-8")
+    chunks = [raw[i : i + size] for i in range(0, len(raw), size)]
+
+    assert extract_transcript(chunks) == doc["results"]["transcripts"][0]["transcript"]
+    items = [v for _, v in iter_json_values(chunks, lambda p: p[:2] == ("results", "items") and len(p) == 3)]
+    assert items == doc["results"]["items"]
+
+
+def test_ranged_body_stops_after_transcript():
+    raw = json.dumps(transcribe_document(words=5000)).encode("utf-8")
+    s3 = RangeS3(raw)
+    body = RangedBody(s3, "bucket", "key", range_size=4096)
+
+    assert extract_transcript(body).startswith("Caf")
+    assert body.requests == 1
+    assert body.bytes_read == 4096 < len(raw)
+
+
+def test_ranged_body_reads_whole_object_when_iterated():
+    raw = b"x" * 10_000
+    body = RangedBody(RangeS3(raw), "bucket", "key", range_size=4096)
+
+    assert b"".join(body) == raw
+    assert body.requests == 3
+
+
+def test_segments_are_time_aligned_and_close_at_sentence_ends():
+    raw = json.dumps(transcribe_document(words=100, seconds_per_word=1.0)).encode("utf-8")
+
+    segments = list(iter_segments(raw, max_seconds=15))
+
+    assert [(s.start, s.end) for s in segments] == [(0.0, 20.0), (20.0, 40.0), (40.0, 60.0), (60.0, 80.0), (80.0, 100.0)]
+    assert segments[0].text.startswith("w0 w1 ") and segments[0].text.endswith(" w18 w19.")
+    assert "w9. w10" in segments[0].text
+    assert segments[0].format().startswith("[00:00:00-00:00:20] w0 w1")
+
+
+def test_segments_hard_split_without_punctuation():
+    items = [item(f"w{i}", i, i + 1) for i in range(50)]
+
+    segments = list(build_segments(items, max_seconds=10))
+
+    assert all(s.end - s.start <= 20 for s in segments)
+    assert " ".join(s.text for s in segments) == " ".join(f"w{i}" for i in range(50))
+
+
+def test_missing_transcript_and_malformed_json_raise():
+    with pytest.raises(ValueError, match="no results.transcripts"):
+        extract_transcript(b'{"results": {"transcripts": []}}')
+    with pytest.raises(ValueError):
+        extract_transcript(b'{"results": {"transcripts": [{"transcript": "unterminated')
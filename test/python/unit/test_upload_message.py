@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+import upload_message
+from upload_message import UploadMessage
+
+MESSAGE = UploadMessage(
+    bucket="media",
+    key="processed/abc.pdf",
+    original_key="uploads/Report Q3.pdf",
+    extension=".pdf",
+    idempotency_key="abc",
+    content_type="application/pdf",
+    timestamp=1718000000000,
+)
+
+
+@pytest.fixture(params=["orjson", "json"])
+def codec(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(upload_message, "orjson", None)
+    return request.param
+
+
+def test_round_trip_derives_the_uris(codec):
+    decoded = UploadMessage.decode(MESSAGE.encode())
+
+    assert decoded == MESSAGE
+    assert decoded.document_id == "abc"
+    assert decoded.s3_uri == "s3://media/processed/abc.pdf"
+    assert decoded.original_s3_uri == "s3://media/uploads/Report Q3.pdf"
+
+
+def test_wire_format_is_compact_and_versioned(codec):
+    body = UploadMessage("media", "processed/abc.md", "uploads/a.md", ".md").encode()
+
+    assert json.loads(body) == {"v": 2, "b": "media", "k": "processed/abc.md", "o": "uploads/a.md", "x": ".md"}
+    assert " " not in body
+    assert not hasattr(MESSAGE, "__dict__")
+
+
+def test_legacy_messages_are_accepted(codec):
+    legacy = {
+        "documentId": "abc",
+        "idempotency_key": "abc",
+        "original_key": "uploads/Report Q3.pdf",
+        "key": "processed/abc.pdf",
+        "extension": ".pdf",
+        "content_type": "application/pdf",
+        "bucket": "media",
+        "s3_uri": "s3://media/processed/abc.pdf",
+        "original_s3_uri": "s3://media/uploads/Report Q3.pdf",
+        "timestamp": 1718000000000,
+    }
+
+    assert UploadMessage.decode(json.dumps(legacy)) == MESSAGE
+    minimal = UploadMessage.decode(json.dumps({"bucket": "media", "key": "a.md", "documentId": "d"}))
+    assert (minimal.original_key, minimal.extension, minimal.document_id) == ("a.md", "", "d")
+
+
+@pytest.mark.parametrize("body", ["not json", "[1, 2]", '{"v": 3, "b": "media", "k": "a"}', '{"v": 2, "b": "media"}'])
+def test_invalid_bodies_raise_value_error(codec, body):
+    with pytest.raises(ValueError):
+        UploadMessage.decode(body)
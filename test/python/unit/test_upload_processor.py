@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("aws_lambda_powertools")
+pytest.importorskip("shortuuid")
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("POWERTOOLS_METRICS_NAMESPACE", "test")
+os.environ.setdefault("QUEUE", "https://sqs.local/queue")
+os.environ.setdefault("BUCKET", "media-bucket")
+
+import upload_processor  # noqa: E402
+from botocore.exceptions import ClientError, EndpointConnectionError  # noqa: E402
+from idempotency import ClaimInProgress, InMemoryIdempotencyStore  # noqa: E402
+from upload_message import UploadMessage  # noqa: E402
+from upload_processor import UploadsFailed  # noqa: E402
+
+
+class FakeS3:
+    def __init__(self, fail_keys=(), latency=0.0, error=None):
+        self.fail_keys = set(fail_keys)
+        self.error = error
+        self.latency = latency
+        self.copies = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def head_object(self, Bucket, Key, **_):
+        return {"ContentLength": 1024, "ETag": '"etag"'}
+
+    def copy_object(self, CopySource, Bucket, Key, **_):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_flight -= 1
+        if CopySource["Key"] in self.fail_keys and self.error is not None:
+            raise self.error
+        if CopySource["Key"] in self.fail_keys:
+            raise ClientError({"Error": {"Code": "AccessDenied"}}, "CopyObject")
+        self.copies.append((CopySource["Key"], Key))
+        return {}
+
+
+class FakeSqs:
+    def __init__(self):
+        self.batches = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.batches.append([UploadMessage.decode(e["MessageBody"]) for e in Entries])
+        return {"Successful": [{"Id": e["Id"]} for e in Entries], "Failed": []}
+
+
+def s3_event(*keys, bucket="media-bucket", etag="etag-1"):
+    return {
+        "Records": [
+            {
+                "eventName": "ObjectCreated:Put",
+                "s3": {"bucket": {"name": bucket}, "object": {"key": key, "size": 10, "eTag": etag}},
+            }
+            for key in keys
+        ]
+    }
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    s3, sqs = FakeS3(latency=0.01), FakeSqs()
+    monkeypatch.setattr(upload_processor, "s3", s3)
+    monkeypatch.setattr(upload_processor, "sqs", sqs)
+    monkeypatch.setattr(upload_processor, "idempotency", InMemoryIdempotencyStore())
+    return s3, sqs
+
+
+def test_bulk_upload_copies_in_parallel_and_enqueues_in_batches(clients, lambda_context):
+    s3, sqs = clients
+    keys = [f"uploads/file{i}.pdf" for i in range(25)]
+
+    report = upload_processor.lambda_handler(s3_event(*keys), lambda_context)
+
+    assert report == {"processed": 25, "duplicates": 0}
+    assert s3.max_in_flight > 1
+    assert [len(batch) for batch in sqs.batches] == [10, 10, 5]
+    sent = [m.original_key for batch in sqs.batches for m in batch]
+    assert sent == keys
+    assert all(m.key.startswith("processed/") for batch in sqs.batches for m in batch)
+
+
+def test_failed_copies_raise_after_the_others_are_enqueued(clients, monkeypatch, lambda_context):
+    _, sqs = clients
+    monkeypatch.setattr(upload_processor, "s3", FakeS3(fail_keys={"uploads/bad.pdf"}))
+
+    # S3 only retries an asynchronous invocation that fails
+    with pytest.raises(UploadsFailed) as raised:
+        upload_processor.lambda_handler(s3_event("uploads/good.pdf", "uploads/bad.pdf"), lambda_context)
+
+    assert [(f["key"], f["stage"]) for f in raised.value.failed] == [("uploads/bad.pdf", "copy")]
+    assert [m.original_key for m in sqs.batches[0]] == ["uploads/good.pdf"]
+
+
+def test_processed_prefix_and_foreign_buckets_are_skipped(clients, lambda_context):
+    s3, sqs = clients
+
+    upload_processor.lambda_handler(s3_event("processed/x.pdf"), lambda_context)
+    upload_processor.lambda_handler(s3_event("uploads/x.pdf", bucket="other"), lambda_context)
+
+    assert s3.copies == []
+    assert sqs.batches == []
+
+
+def test_redelivered_event_is_dropped(clients, lambda_context):
+    s3, sqs = clients
+    event = s3_event("uploads/a.pdf", "uploads/b.pdf")
+
+    first = upload_processor.lambda_handler(event, lambda_context)
+    replay = upload_processor.lambda_handler(event, lambda_context)
+
+    assert first["processed"] == 2
+    assert replay == {"processed": 0, "duplicates": 2}
+    assert len(s3.copies) == 2
+    assert sum(len(batch) for batch in sqs.batches) == 2
+
+
+def test_new_object_version_is_processed_with_a_stable_key(clients, lambda_context):
+    s3, sqs = clients
+
+    upload_processor.lambda_handler(s3_event("uploads/a.pdf", etag="v1"), lambda_context)
+    upload_processor.lambda_handler(s3_event("uploads/a.pdf", etag="v2"), lambda_context)
+
+    first, second = (batch[0] for batch in sqs.batches)
+    assert first.idempotency_key != second.idempotency_key
+    assert first.document_id == first.idempotency_key
+    assert first.key == f"processed/{first.idempotency_key}.pdf"
+    assert first.s3_uri == f"s3://media-bucket/processed/{first.idempotency_key}.pdf"
+    assert first.original_s3_uri == "s3://media-bucket/uploads/a.pdf"
+
+
+def test_failed_copy_can_be_retried(clients, monkeypatch, lambda_context):
+    _, sqs = clients
+    event = s3_event("uploads/good.pdf", "uploads/bad.pdf")
+    monkeypatch.setattr(upload_processor, "s3", FakeS3(fail_keys={"uploads/bad.pdf"}))
+    with pytest.raises(UploadsFailed):
+        upload_processor.lambda_handler(event, lambda_context)
+
+    monkeypatch.setattr(upload_processor, "s3", FakeS3())
+    report = upload_processor.lambda_handler(event, lambda_context)
+
+    assert report == {"processed": 1, "duplicates": 1}
+    assert [m.original_key for batch in sqs.batches for m in batch] == ["uploads/good.pdf", "uploads/bad.pdf"]
+
+
+def test_unexpected_copy_error_releases_the_claim_for_the_retry(clients, monkeypatch, lambda_context):
+    _, sqs = clients
+    unreachable = EndpointConnectionError(endpoint_url="https://s3.amazonaws.com")
+    monkeypatch.setattr(upload_processor, "s3", FakeS3(fail_keys={"uploads/a.pdf"}, error=unreachable))
+    with pytest.raises(EndpointConnectionError):
+        upload_processor.lambda_handler(s3_event("uploads/a.pdf"), lambda_context)
+
+    # Lambda retries the asynchronous S3 invocation in the same container
+    monkeypatch.setattr(upload_processor, "s3", FakeS3())
+    report = upload_processor.lambda_handler(s3_event("uploads/a.pdf"), lambda_context)
+
+    assert report == {"processed": 1, "duplicates": 0}
+    assert [m.original_key for batch in sqs.batches for m in batch] == ["uploads/a.pdf"]
+
+
+def test_upload_in_progress_elsewhere_is_retried(clients, lambda_context):
+    _, sqs = clients
+    event = s3_event("uploads/a.pdf", "uploads/b.pdf")
+    store = upload_processor.idempotency
+    held = upload_processor.idempotency_key("media-bucket", "uploads/b.pdf", "etag-1")
+    store.claim(held)
+
+    with pytest.raises(ClaimInProgress):
+        upload_processor.lambda_handler(event, lambda_context)
+    store.release(held)
+    retry = upload_processor.lambda_handler(event, lambda_context)
+
+    assert retry == {"processed": 1, "duplicates": 1}
+    assert [m.original_key for batch in sqs.batches for m in batch] == ["uploads/a.pdf", "uploads/b.pdf"]